@@ -0,0 +1,29 @@
+# benchmarks/hash_embedding.py
+
+import hashlib
+
+import numpy as np
+
+HASH_EMBEDDING_DIM = 64
+
+
+class HashEmbedding:
+    """
+    Bag-of-words hashed into a small unit vector; needs no model download.
+
+    A stand-in for the sentence-transformers model in tests and in
+    benchmarks run without it. Its neighbours are keyword overlap, not
+    meaning, so recall figures measured with it only compare index types
+    against each other on 64-dim vectors.
+    """
+
+    def encode(self, texts, **kwargs):
+        vectors = np.zeros((len(texts), HASH_EMBEDDING_DIM), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                digest = hashlib.md5(word.encode("utf-8")).digest()
+                vectors[row, int.from_bytes(digest[:4], "little") % HASH_EMBEDDING_DIM] += 1
+            norm = np.linalg.norm(vectors[row])
+            if norm:
+                vectors[row] /= norm
+        return vectors
@@ -0,0 +1,137 @@
+# benchmarks/index_recall.py
+"""
+Compare the vector index storage types against the exact flat index.
+
+    python -m benchmarks.index_recall --scenes 1000 --k 5 20 --output recall.json
+    python -m benchmarks.index_recall --embedder hash   # no model download
+
+Builds a RAGSearchEngine per type in index_store.INDEX_TYPES over one
+synthetic screenplay (the embeddings are encoded once and shared through
+the index cache) and reports, per type: index bytes per vector and on
+disk, the engine's memory_bytes(), recall@k of raw FAISS neighbours
+against IndexFlatL2, recall of the engine's final hybrid (dense + BM25)
+hits, and search time. Queries are action lines sampled from the script
+plus the questions used by run_benchmarks.
+
+--embedder hash swaps the sentence-transformers model for the 64-dim
+HashEmbedding; its figures compare the types on those vectors only and
+say little about recall with the real 384-dim model.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.hash_embedding import HashEmbedding
+from benchmarks.run_benchmarks import QUERY_QUESTIONS
+from benchmarks.synthetic_script import generate_screenplay_text
+from script_utils.index_store import INDEX_TYPES, index_file_name, recall_at_k
+from script_utils.parser import parse_screenplay
+from script_utils.rag_engine import CANDIDATES_PER_RESULT
+from script_utils.scheduler import generate_schedule
+
+DEFAULT_SCENES = 1000
+DEFAULT_QUERIES = 200
+TOP_K = 5
+DEFAULT_KS = (TOP_K, TOP_K * CANDIDATES_PER_RESULT)
+EMBEDDERS = ("model", "hash")
+
+
+def sample_queries(scenes, num_queries, seed=0):
+    """Action lines from random scenes, as stand-ins for user questions."""
+    lines = [line for scene in scenes for line in scene.get("actions", []) if len(line) > 20]
+    rng = random.Random(seed)
+    sampled = rng.sample(lines, min(num_queries, len(lines)))
+    return QUERY_QUESTIONS + sampled
+
+
+def _hit_recall(expected, found):
+    total = sum(len(hits) for hits in expected)
+    matched = sum(len(set(e) & set(f)) for e, f in zip(expected, found))
+    return matched / total if total else 1.0
+
+
+def compare_index_types(num_scenes=DEFAULT_SCENES, num_queries=DEFAULT_QUERIES, ks=DEFAULT_KS,
+                        index_types=INDEX_TYPES):
+    from script_utils.models import get_embedding_model
+    from script_utils.rag_engine import RAGSearchEngine
+
+    scenes = parse_screenplay(generate_screenplay_text(num_scenes))
+    schedule = generate_schedule(scenes)
+    questions = sample_queries(scenes, num_queries)
+    q_embeddings = get_embedding_model().encode(questions)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as index_dir:
+        def build(index_type):
+            return RAGSearchEngine(scenes, schedule, index_dir=index_dir, index_type=index_type,
+                                   answer_cache=False, fast_path=False)
+
+        reference = build("flat")
+        expected_hits = reference.retrieve(questions, TOP_K)[1]
+        for index_type in index_types:
+            engine = reference if index_type == "flat" else build(index_type)
+            start = time.perf_counter()
+            engine.index.search(q_embeddings, max(ks))
+            search_seconds = time.perf_counter() - start
+            results[index_type] = {
+                "bytes_per_vector": engine.index.sa_code_size(),
+                "file_bytes": os.path.getsize(os.path.join(index_dir,
+                                                           index_file_name(index_type))),
+                "engine_memory_bytes": engine.memory_bytes(),
+                "search_seconds": search_seconds,
+                **{f"recall@{k}": recall_at_k(reference.index, engine.index, q_embeddings, k)
+                   for k in ks},
+                "hybrid_hit_recall": _hit_recall(expected_hits,
+                                                 engine.retrieve(questions, TOP_K)[1]),
+            }
+    return {
+        "scenes": len(scenes),
+        "entries": len(reference.text_lookup),
+        "queries": len(questions),
+        "results": results,
+    }
+
+
+def _print_report(report, ks):
+    print(f"\n{report['scenes']} scenes, {report['entries']} index entries, "
+          f"{report['queries']} queries, {report['embedder']} embedder")
+    recall_columns = "".join(f"{f'recall@{k}':>11}" for k in ks)
+    print(f"  {'type':<6}{'B/vector':>10}{'file MB':>10}{recall_columns}{'hybrid':>9}"
+          f"{'search ms':>11}")
+    for index_type, stats in report["results"].items():
+        recalls = "".join(f"{stats[f'recall@{k}']:>11.3f}" for k in ks)
+        print(f"  {index_type:<6}{stats['bytes_per_vector']:>10}"
+              f"{stats['file_bytes'] / 1e6:>10.2f}{recalls}"
+              f"{stats['hybrid_hit_recall']:>9.3f}{stats['search_seconds'] * 1000:>11.2f}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Recall/memory of each vector index type.")
+    parser.add_argument("--scenes", type=int, default=DEFAULT_SCENES)
+    parser.add_argument("--queries", type=int, default=DEFAULT_QUERIES)
+    parser.add_argument("--k", type=int, nargs="+", default=list(DEFAULT_KS))
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES), choices=INDEX_TYPES)
+    parser.add_argument("--embedder", default="model", choices=EMBEDDERS,
+                        help="'hash' uses the 64-dim HashEmbedding instead of the real model")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    if args.embedder == "hash":
+        from script_utils.models import registry
+        registry.register("embedding", HashEmbedding)
+    try:
+        report = compare_index_types(args.scenes, args.queries, args.k, args.types)
+    except ImportError as e:
+        print(f"Embedding model unavailable: {e}", file=sys.stderr)
+        sys.exit(1)
+    report["embedder"] = args.embedder
+    _print_report(report, args.k)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,291 @@
+# benchmarks/run_benchmarks.py
+"""
+Time and memory-profile every pipeline stage on synthetic screenplays.
+
+    python -m benchmarks.run_benchmarks --sizes 100 1000 --output bench.json
+    python -m benchmarks.run_benchmarks --compare baseline.json bench.json
+
+Results are JSON: per script size, per stage, the best and median wall
+time over --repeat untraced runs, then from one more run the peak traced
+Python allocation and the peak resident memory growth of the process and
+its child processes, which also counts native buffers (FAISS, numpy,
+models) and extraction workers. Compare mode flags stages whose best time
+or peak memory grew by more than --threshold.
+"""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from benchmarks.synthetic_script import generate_screenplay_text, write_screenplay_pdf
+from script_utils.call_sheet_generator import generate_call_sheets
+from script_utils.instrumentation import child_pids, current_rss_bytes
+from script_utils.parser import parse_screenplay
+from script_utils.pdf_extractor import extract_text_from_pdf
+from script_utils.scheduler import generate_schedule
+
+DEFAULT_SIZES = (100, 1000, 10000)
+STAGES = ("extract_text", "parse", "schedule", "call_sheets", "build_index", "query")
+DEFAULT_THRESHOLD = 0.2
+MEMORY_METRICS = ("peak_bytes", "peak_rss_growth_bytes")
+
+# Memory below this is page-granularity noise, not a regression
+MIN_COMPARED_BYTES = 1_000_000
+
+# How often the memory pass samples resident memory
+RSS_SAMPLE_SECONDS = 0.005
+
+# RAG questions that avoid the structured fast path, so the query stage
+# measures retrieval + prompt building + (stub) generation
+QUERY_QUESTIONS = [
+    "What happens with the photograph in the diner?",
+    "Describe the scene where someone whispers across the table.",
+    "Which moments involve rain and a car?",
+]
+
+
+class _RSSSampler:
+    """Peak resident memory of this process and its children while running."""
+
+    def __init__(self, interval=RSS_SAMPLE_SECONDS):
+        self.interval = interval
+        self.start_bytes = current_rss_bytes()
+        self.peak_bytes = self.start_bytes
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        total = current_rss_bytes()
+        for pid in child_pids():
+            total += current_rss_bytes(pid) or 0
+        self.peak_bytes = max(self.peak_bytes, total)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if self.start_bytes is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.start_bytes is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    def growth_bytes(self):
+        return None if self.start_bytes is None else self.peak_bytes - self.start_bytes
+
+
+def _measure_memory(func):
+    """Run func once more under tracemalloc and an RSS sampler."""
+    tracemalloc.start()
+    try:
+        with _RSSSampler() as rss:
+            func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"peak_bytes": peak, "peak_rss_growth_bytes": rss.growth_bytes()}
+
+
+def _measure(func, repeat):
+    """
+    Time func over repeat runs, then measure memory in a separate run, as
+    tracing allocations slows the code it traces. Returns func's last
+    result and the stats.
+    """
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, {
+        "best_seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        **_measure_memory(func),
+        "runs": repeat,
+    }
+
+
+def _skipped(reason):
+    return {"skipped": reason}
+
+
+def benchmark_size(num_scenes, stages, repeat, workdir):
+    results = {}
+    text = generate_screenplay_text(num_scenes)
+    pdf_path = os.path.join(workdir, f"synthetic_{num_scenes}.pdf")
+    write_screenplay_pdf(text, pdf_path)
+
+    if "extract_text" in stages:
+        _, results["extract_text"] = _measure(lambda: extract_text_from_pdf(pdf_path), repeat)
+
+    scenes, stats = _measure(lambda: parse_screenplay(text), repeat)
+    if "parse" in stages:
+        results["parse"] = {**stats, "scenes": len(scenes)}
+
+    schedule, stats = _measure(lambda: generate_schedule(scenes), repeat)
+    if "schedule" in stages:
+        results["schedule"] = {**stats, "days": len({item["day"] for item in schedule})}
+
+    if "call_sheets" in stages:
+        _, results["call_sheets"] = _measure(lambda: generate_call_sheets(schedule), repeat)
+
+    if "build_index" in stages or "query" in stages:
+        results.update(_benchmark_rag(scenes, schedule, stages, repeat))
+    return results
+
+
+def _benchmark_rag(scenes, schedule, stages, repeat):
+    try:
+        from script_utils.models import get_embedding_model
+        from script_utils.rag_engine import RAGSearchEngine
+        get_embedding_model()
+    except Exception as e:
+        reason = f"embedding model unavailable: {e}"
+        return {stage: _skipped(reason) for stage in ("build_index", "query") if stage in stages}
+
+    results = {}
+    engine, stats = _measure(
+        lambda: RAGSearchEngine(scenes, schedule, answer_cache=False, fast_path=False), repeat
+    )
+    if "build_index" in stages:
+        results["build_index"] = {**stats, "entries": len(engine.text_lookup)}
+
+    if "query" in stages:
+        from script_utils.models import registry
+        from script_utils.stub_llm import start_stub_server
+
+        server, url = start_stub_server()
+        previous_host = os.environ.get("OLLAMA_HOST")
+        os.environ["OLLAMA_HOST"] = url
+        # Reload the client so it points at the stub
+        registry.reset("llm_client")
+        try:
+            _, results["query"] = _measure(
+                lambda: [engine.query(q) for q in QUERY_QUESTIONS], repeat
+            )
+            results["query"]["questions"] = len(QUERY_QUESTIONS)
+        finally:
+            server.shutdown()
+            if previous_host is None:
+                os.environ.pop("OLLAMA_HOST", None)
+            else:
+                os.environ["OLLAMA_HOST"] = previous_host
+            registry.reset("llm_client")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, stages=STAGES, repeat=3):
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {}
+        for num_scenes in sizes:
+            print(f"Benchmarking {num_scenes} scenes...", file=sys.stderr)
+            results[str(num_scenes)] = benchmark_size(num_scenes, stages, repeat, workdir)
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare_runs(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    Return a list of regressions: stages whose best time or peak memory in
+    current exceeds baseline by more than threshold (0.2 = 20%).
+    """
+    regressions = []
+    for size, stages in current["results"].items():
+        for stage, stats in stages.items():
+            before = baseline["results"].get(size, {}).get(stage)
+            if not before or "skipped" in before or "skipped" in stats:
+                continue
+            for metric in ("best_seconds",) + MEMORY_METRICS:
+                # Older baselines and non-Linux runs lack some metrics
+                if before.get(metric) is None or stats.get(metric) is None:
+                    continue
+                if metric in MEMORY_METRICS and stats[metric] < MIN_COMPARED_BYTES:
+                    continue
+                if before[metric] and stats[metric] > before[metric] * (1 + threshold):
+                    regressions.append({
+                        "size": size,
+                        "stage": stage,
+                        "metric": metric,
+                        "baseline": before[metric],
+                        "current": stats[metric],
+                        "change": stats[metric] / before[metric] - 1,
+                    })
+    return regressions
+
+
+def _print_results(report):
+    for size, stages in report["results"].items():
+        print(f"\n{size} scenes")
+        for stage, stats in stages.items():
+            if "skipped" in stats:
+                print(f"  {stage:<12} skipped ({stats['skipped']})")
+            else:
+                rss = stats.get("peak_rss_growth_bytes")
+                rss = f"{rss / 1e6:8.2f} MB RSS" if rss is not None else ""
+                print(f"  {stage:<12} {stats['best_seconds'] * 1000:10.2f} ms"
+                      f"  {stats['peak_bytes'] / 1e6:8.2f} MB peak  {rss}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the screenplay pipeline.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES),
+                        help="Synthetic script sizes in scenes")
+    parser.add_argument("--stages", nargs="+", default=list(STAGES), choices=STAGES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="Compare two result files instead of running")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative slowdown/memory growth before flagging")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            current = json.load(f)
+        regressions = compare_runs(baseline, current, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['size']} scenes / {r['stage']} / {r['metric']}: "
+                  f"{r['baseline']:.4g} -> {r['current']:.4g} ({r['change']:+.0%})")
+        if not regressions:
+            print("No regressions.")
+        sys.exit(1 if regressions else 0)
+
+    report = run_benchmarks(args.sizes, args.stages, args.repeat)
+    _print_results(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,104 @@
+# benchmarks/synthetic_script.py
+
+import random
+
+LOCATIONS = [
+    "KITCHEN", "LIVING ROOM", "OFFICE", "HOSPITAL CORRIDOR", "PARKING LOT",
+    "ROOFTOP", "TRAIN STATION", "LABORATORY", "CLASSROOM", "DESERT ROAD",
+    "POLICE STATION", "BEDROOM", "DINER", "COURTROOM", "HOTEL LOBBY",
+]
+TIMES_OF_DAY = ["DAY", "NIGHT", "MORNING", "EVENING", "DAWN", "DUSK"]
+FIRST_NAMES = [
+    "ANNA", "BEN", "CLARA", "DAVID", "ELENA", "FRANK", "GRACE", "HENRY",
+    "IRIS", "JACK", "KAREN", "LEO", "MAYA", "NOAH", "OLIVIA", "PETER",
+]
+WORDS = (
+    "the a an door window table light shadow phone letter gun car rain "
+    "slowly quickly looks turns walks runs stops waits smiles whispers "
+    "shouts opens closes picks up drops file photograph coffee glass "
+    "across toward behind under over silence noise crowd street"
+).split()
+
+LINES_PER_PAGE = 54
+
+
+def _sentence(rng, min_words=5, max_words=12):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + "."
+
+
+def generate_screenplay_text(num_scenes, seed=0):
+    """
+    Deterministic screenplay text with num_scenes numbered scenes, each with
+    a heading, a few action lines and some dialogue.
+    """
+    rng = random.Random(seed)
+    cast = [f"{name} {i}" if i else name
+            for i in range(max(1, num_scenes // 200)) for name in FIRST_NAMES]
+    locations = [f"{loc} {i}" if i else loc
+                 for i in range(max(1, num_scenes // 150)) for loc in LOCATIONS]
+
+    lines = ["FADE IN:", ""]
+    for number in range(1, num_scenes + 1):
+        prefix = rng.choice(["INT.", "EXT."])
+        lines.append(f"{number}. {prefix} {rng.choice(locations)} - {rng.choice(TIMES_OF_DAY)} {number}")
+        lines.append("")
+        for _ in range(rng.randint(1, 4)):
+            lines.append(_sentence(rng))
+        lines.append("")
+        for speaker in rng.sample(cast, rng.randint(1, 4)):
+            lines.append(speaker)
+            for _ in range(rng.randint(1, 3)):
+                lines.append(_sentence(rng, 3, 9))
+            lines.append("")
+        lines.append("CUT TO:")
+        lines.append("")
+    lines.append("THE END")
+    return "\n".join(lines) + "\n"
+
+
+def _pdf_escape(line):
+    line = line.encode("latin-1", "replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_screenplay_pdf(text, path, lines_per_page=LINES_PER_PAGE):
+    """Write text as a plain Courier PDF, one text line per PDF line."""
+    lines = text.splitlines()
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+
+    objects = [None, None]  # 1: catalog, 2: page tree; filled in below
+    font_id = 3
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>")
+
+    page_ids = []
+    for page_lines in pages:
+        body = ["BT /F1 11 Tf 13 TL 72 740 Td"]
+        for line in page_lines:
+            body.append(f"({_pdf_escape(line)}) Tj T*")
+        body.append("ET")
+        stream = "\n".join(body).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(len(objects))
+
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode("ascii")
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref_offset = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                % (len(objects) + 1, xref_offset))
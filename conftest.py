@@ -0,0 +1,2 @@
+# conftest.py
+# Lets tests import run_pipeline and script_utils from the repository root.
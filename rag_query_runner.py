@@ -1,22 +1,25 @@
 # rag_query_runner.py
 
 import json
+from script_utils.index_store import DEFAULT_INDEX_DIR
 from script_utils.rag_engine import RAGSearchEngine
+from script_utils.scene_model import load_scenes
 
-# Load parsed scenes and shooting schedule
-with open("output/parsed_script.json") as f:
-    scenes = json.load(f)
+# Load parsed scenes (parsed_script.bin, or the formats older runs wrote) and shooting schedule
+scenes = load_scenes("output")
 
 with open("output/shooting_schedule.json") as f:
     schedule = json.load(f)
 
 # Start RAG engine with both datasets
-rag = RAGSearchEngine(scenes, schedule)
+rag = RAGSearchEngine(scenes, schedule, index_dir=DEFAULT_INDEX_DIR)
 
 # Interactive Q&A loop
 while True:
     query = input("\nAsk a question about the script/schedule (or 'q' to quit): ")
     if query.lower() == 'q':
         break
-    answer = rag.query(query)
-    print("\n Answer:\n", answer)
+    print("\n Answer:\n", end=" ", flush=True)
+    for token in rag.query_stream(query):
+        print(token, end="", flush=True)
+    print()
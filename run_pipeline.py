@@ -2,13 +2,32 @@
 
 import json
 import os
+import sys
 import tempfile
-from io import BytesIO
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+from script_utils.atomic_io import write_json_atomically
 from script_utils.call_sheet_generator import generate_call_sheets
-from script_utils.pdf_extractor import extract_text_from_pdf
+from script_utils.index_store import INDEX_DIR_NAME, IndexStore
+from script_utils.instrumentation import METRICS_FILE, NULL_SPAN, Recorder
+from script_utils.ner_tagger import tag_scenes
+from script_utils.pdf_extractor import join_pages
 from script_utils.parser import parse_screenplay
-from script_utils.scheduler import generate_schedule
+from script_utils.revision import (LEGACY_PAGES_FILE, PAGES_FILE, REVISION_FILE, changed_pages,
+                                   diff_scenes, diff_summary, extract_revised_pages, load_pages,
+                                   save_pages)
+from script_utils.scene_model import SCENES_BINARY_FILE, SCENES_JSON_FILE, SceneTable, load_scenes
+from script_utils.scene_store import SCENE_INDEX_FILE, SCENE_STORE_FILE, SceneStore
+from script_utils.scheduler import generate_schedule, reschedule
+from script_utils.stage_cache import (DEFAULT_CACHE_DIR, StageCache, fingerprint, hash_bytes,
+                                      stage_key)
+
+BATCH_MANIFEST_FILE = "manifest.json"
+
+# Stages reported to a progress callback, in order ("tags" only when tagging)
+PIPELINE_STAGES = ("text", "scenes", "tags", "schedule", "call_sheets")
+
 
 def get_screenplay_pdf_path(data_dir="data"):
     """Return the most recently modified PDF inside the data directory."""
@@ -27,28 +46,109 @@ def get_screenplay_pdf_path(data_dir="data"):
     return pdf_candidates[0]
 
 
-def process_screenplay_from_pdf(pdf_path=None, pdf_bytes=None, output_dir="output"):
+def process_screenplay_from_pdf(pdf_path=None, pdf_bytes=None, output_dir="output",
+                                extract_workers=None, schedule_options=None,
+                                cache_dir=DEFAULT_CACHE_DIR, use_cache=True,
+                                tag_entities=False, tag_options=None, recorder=None,
+                                progress=None, previous_output=None, locked_days=None):
     """
     Process a screenplay PDF and generate all outputs.
     
+    Each stage's output is cached on disk under a key built from the hash of
+    the PDF bytes, the stage version and its settings, so re-processing an
+    unchanged script only reads the cache, and changing the scheduler
+    settings re-runs only scheduling and call sheets.
+    
     Args:
         pdf_path: Path to PDF file (if processing from file)
         pdf_bytes: Bytes of PDF file (if processing from upload)
         output_dir: Directory to save outputs
+        extract_workers: Processes used for page-sharded text extraction
+            (defaults to the number of CPUs)
+        schedule_options: Keyword arguments for generate_schedule
+        cache_dir: Directory of the stage cache
+        use_cache: Set to False to bypass the stage cache
+        tag_entities: Also tag props and extra cast per scene (needs spaCy)
+        tag_options: Keyword arguments for ner_tagger.tag_scenes, e.g.
+            batch_size or n_process
+        recorder: instrumentation.Recorder collecting per-stage timing,
+            counters and peak RSS; a new one is used when omitted. Its
+            metrics are written to metrics.json in output_dir. Pass
+            instrumentation.NULL_RECORDER to turn metrics off.
+        progress: Called as progress(stage, completed, total) when each
+            stage of PIPELINE_STAGES starts, and as
+            progress("done", total, total) at the end
+        previous_output: Output directory of an earlier draft of the same
+            script (may be output_dir itself). Only pages whose content
+            changed are extracted, only new or rewritten scenes are tagged,
+            the earlier draft's embedding cache is carried over so only
+            changed scenes are re-encoded, and what changed is written to
+            revision.json
+        locked_days: With previous_output, shooting days of the earlier
+            schedule to keep as they are; the other scenes are scheduled
+            around them (see scheduler.reschedule)
     
     Returns:
-        dict: Contains 'scenes', 'schedule', and 'call_sheets'
+        dict: Contains 'scenes', 'schedule', and 'call_sheets', plus 'tags'
+        when tag_entities is set, 'revision' with previous_output and
+        'metrics' when the recorder is enabled
     """
-    # Handle PDF input (either from path or bytes)
-    if pdf_bytes:
-        # Save uploaded PDF to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_file.write(pdf_bytes)
-            pdf_path = tmp_file.name
-    
-    if not pdf_path:
+    if not pdf_path and not pdf_bytes:
         raise ValueError("Either pdf_path or pdf_bytes must be provided")
+    if locked_days and not previous_output:
+        raise ValueError("locked_days requires previous_output")
+    
+    if pdf_bytes is None:
+        with open(pdf_path, "rb") as f:
+            pdf_bytes = f.read()
+    schedule_options = schedule_options or {}
+    cache = StageCache(cache_dir) if use_cache else None
+    if recorder is None:
+        recorder = Recorder()
+    with recorder.span("pipeline", pdf_bytes=len(pdf_bytes)):
+        # Read before the output directory is cleared; it may be the same one
+        previous = _load_previous_output(previous_output) if previous_output else None
+        result = _run_pipeline(pdf_path, pdf_bytes, output_dir, extract_workers,
+                               schedule_options, cache, tag_entities, tag_options, recorder,
+                               _progress_reporter(progress, tag_entities), previous,
+                               locked_days)
     
+    if recorder.enabled:
+        result["metrics"] = recorder.to_dict()
+        recorder.write(os.path.join(output_dir, METRICS_FILE))
+    return result
+
+
+def _progress_reporter(progress, tag_entities):
+    stages = [stage for stage in PIPELINE_STAGES if tag_entities or stage != "tags"]
+
+    def report(stage):
+        if progress is not None:
+            completed = stages.index(stage) if stage in stages else len(stages)
+            progress(stage, completed, len(stages))
+    return report
+
+
+def _load_previous_output(output_dir):
+    """Pages, scenes, tags and schedule of an earlier run, for revision mode."""
+    previous = {"output_dir": output_dir, "pages": load_pages(output_dir), "scenes": [],
+                "tags": None, "schedule": None}
+    try:
+        previous["scenes"] = load_scenes(output_dir)
+    except (OSError, ValueError):
+        pass
+    for key, file_name in (("tags", "scene_tags.json"), ("schedule", "shooting_schedule.json")):
+        try:
+            with open(os.path.join(output_dir, file_name), encoding="utf-8") as f:
+                previous[key] = json.load(f)
+        except (OSError, ValueError):
+            pass
+    return previous
+
+
+def _run_pipeline(pdf_path, pdf_bytes, output_dir, extract_workers, schedule_options,
+                  cache, tag_entities, tag_options, recorder, report, previous=None,
+                  locked_days=None):
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
     os.makedirs(f"{output_dir}/call_sheets", exist_ok=True)
@@ -56,40 +156,171 @@ def process_screenplay_from_pdf(pdf_path=None, pdf_bytes=None, output_dir="outpu
     # Clear old outputs
     _clear_output_directory(output_dir)
     
-    # 1. Extract text from screenplay PDF
-    script_text = extract_text_from_pdf(pdf_path)
+    # 1. Extract text from screenplay PDF, page by page; in revision mode
+    # unchanged pages are taken from the previous draft
+    report("text")
+    previous_pages = previous["pages"] if previous else []
+    text_key = stage_key("text", hash_bytes(pdf_bytes))
+    with recorder.span("pipeline/text") as span:
+        pages = _run_stage(
+            cache, "text", text_key,
+            lambda: _extract_pages(pdf_path, pdf_bytes, extract_workers, previous_pages, span),
+            span
+        )
+        script_text = join_pages(page["text"] for page in pages)
+        span.set(lines=script_text.count("\n"), characters=len(script_text))
+    with recorder.span("pipeline/write", file=PAGES_FILE):
+        save_pages(output_dir, pages)
     
     # 2. Parse scenes from the script text
-    scenes = parse_screenplay(script_text)
+    report("scenes")
+    scenes_key = stage_key("scenes", text_key)
+    with recorder.span("pipeline/scenes") as span:
+        scenes = _run_stage(cache, "scenes", scenes_key,
+                            lambda: parse_screenplay(script_text), span)
+        span.set(scenes=len(scenes))
+    
+    # 3. Save parsed scenes: the binary table is what load_scenes reads
+    # whole, the store serves single scenes to the query service without
+    # loading the rest, and parsed_script.json is kept for existing
+    # consumers of the plain JSON
+    with recorder.span("pipeline/write", file=SCENES_BINARY_FILE):
+        SceneTable.from_scenes(scenes).save(os.path.join(output_dir, SCENES_BINARY_FILE))
+    with recorder.span("pipeline/write", file=SCENE_STORE_FILE):
+        SceneStore.write(scenes, output_dir).close()
+    with recorder.span("pipeline/write", file=SCENES_JSON_FILE):
+        write_json_atomically(os.path.join(output_dir, SCENES_JSON_FILE), scenes, indent=2)
+    
+    # 3a. Compare with the previous draft
+    diff = None
+    if previous is not None:
+        with recorder.span("pipeline/diff") as span:
+            diff = diff_scenes(previous["scenes"], scenes)
+            span.set(**diff_summary(diff))
     
-    # 3. Save parsed scenes
-    with open(f"{output_dir}/parsed_script.json", "w", encoding="utf-8") as f:
-        json.dump(scenes, f, indent=2)
+    # 3b. Tag props and extra cast
+    tags = None
+    if tag_entities:
+        tag_options = tag_options or {}
+        report("tags")
+        with recorder.span("pipeline/tags") as span:
+            tags = _run_stage(
+                cache, "tags", stage_key("tags", scenes_key),
+                lambda: tag_scenes(scenes, known_props=_known_props(previous, diff, scenes),
+                                   **tag_options),
+                span
+            )
+            span.set(scenes=len(tags))
+        with recorder.span("pipeline/write", file="scene_tags.json"):
+            write_json_atomically(f"{output_dir}/scene_tags.json", tags, indent=2)
     
     # 4. Generate shooting schedule
-    schedule = generate_schedule(scenes)
+    report("schedule")
+    locked_days = sorted(set(locked_days or [])) if previous and previous["schedule"] else []
+    schedule_config = schedule_options
+    if locked_days:
+        schedule_config = {**schedule_options, "locked_days": locked_days,
+                           "previous_schedule": fingerprint(previous["schedule"])}
+    schedule_key = stage_key("schedule", scenes_key, schedule_config)
+    with recorder.span("pipeline/schedule") as span:
+        schedule = _run_stage(
+            cache, "schedule", schedule_key,
+            lambda: (reschedule(previous["schedule"], previous["scenes"], scenes,
+                                diff["unchanged"] + diff["changed"], locked_days,
+                                **schedule_options)
+                     if locked_days else generate_schedule(scenes, **schedule_options)),
+            span
+        )
+        span.set(entries=len(schedule), days=len({item["day"] for item in schedule}))
     
     # 5. Save schedule
-    with open(f"{output_dir}/shooting_schedule.json", "w", encoding="utf-8") as f:
-        json.dump(schedule, f, indent=2)
+    with recorder.span("pipeline/write", file="shooting_schedule.json"):
+        write_json_atomically(f"{output_dir}/shooting_schedule.json", schedule, indent=2)
     
     # 6. Generate call sheets per day
-    call_sheets = generate_call_sheets(schedule)
+    report("call_sheets")
+    call_sheets_key = stage_key("call_sheets", schedule_key)
+    with recorder.span("pipeline/call_sheets") as span:
+        call_sheets = _run_stage(
+            cache, "call_sheets", call_sheets_key,
+            lambda: generate_call_sheets(schedule), span
+        )
+        # JSON object keys are strings; restore integer day numbers
+        call_sheets = {int(day): data for day, data in call_sheets.items()}
+        span.set(days=len(call_sheets))
     
     # 7. Save each day's call sheet to its own file
-    for day, data in call_sheets.items():
-        with open(f"{output_dir}/call_sheets/day_{day}.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+    with recorder.span("pipeline/write", file="call_sheets/", files=len(call_sheets)):
+        for day, data in call_sheets.items():
+            write_json_atomically(f"{output_dir}/call_sheets/day_{day}.json", data, indent=2)
     
-    # Clean up temporary file if created from bytes
-    if pdf_bytes and os.path.exists(pdf_path):
-        os.unlink(pdf_path)
+    # 8. Carry the previous draft's embeddings over and record the revision
+    revision = None
+    if previous is not None:
+        if os.path.abspath(previous["output_dir"]) != os.path.abspath(output_dir):
+            IndexStore(os.path.join(output_dir, INDEX_DIR_NAME)).seed_from(
+                os.path.join(previous["output_dir"], INDEX_DIR_NAME))
+        revision = {
+            "previous_output": previous["output_dir"],
+            "pages": {"total": len(pages),
+                      "changed": len(changed_pages(pages, previous_pages))},
+            "scenes": diff_summary(diff),
+            "locked_days": locked_days,
+        }
+        with recorder.span("pipeline/write", file=REVISION_FILE):
+            write_json_atomically(os.path.join(output_dir, REVISION_FILE), revision, indent=2)
     
-    return {
+    report("done")
+    result = {
         "scenes": scenes,
         "schedule": schedule,
         "call_sheets": call_sheets
     }
+    if tags is not None:
+        result["tags"] = tags
+    if revision is not None:
+        result["revision"] = revision
+    return result
+
+
+def _known_props(previous, diff, scenes):
+    """Props of scenes unchanged since the previous draft, None for the rest."""
+    if previous is None or not previous["tags"] or len(previous["tags"]) != len(previous["scenes"]):
+        return None
+    known_props = [None] * len(scenes)
+    for old_position, new_position in diff["unchanged"]:
+        known_props[new_position] = previous["tags"][old_position]["props"]
+    return known_props
+
+
+def _run_stage(cache, stage, key, compute, span=NULL_SPAN):
+    """Return a stage's cached output, computing and storing it on a miss."""
+    if cache is not None:
+        value = cache.get(stage, key)
+        if value is not None:
+            span.set(cached=True)
+            return value
+    span.set(cached=False)
+    value = compute()
+    if cache is not None:
+        cache.put(stage, key, value)
+    return value
+
+
+def _extract_pages(pdf_path, pdf_bytes, extract_workers, previous_pages=(), span=NULL_SPAN):
+    if pdf_path:
+        return extract_revised_pages(pdf_path, previous_pages, workers=extract_workers,
+                                     span=span)
+    
+    # Save uploaded PDF to temporary file
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
+        tmp_file.write(pdf_bytes)
+        tmp_path = tmp_file.name
+    try:
+        return extract_revised_pages(tmp_path, previous_pages, workers=extract_workers,
+                                     span=span)
+    finally:
+        os.unlink(tmp_path)
 
 
 def _clear_output_directory(output_dir="output"):
@@ -101,18 +332,159 @@ def _clear_output_directory(output_dir="output"):
             if file.endswith('.json'):
                 os.remove(os.path.join(call_sheets_dir, file))
     
-    # Clear main output files
-    for file in ["parsed_script.json", "shooting_schedule.json"]:
+    # Clear main output files, including the pages file older runs wrote
+    for file in [SCENES_JSON_FILE, SCENES_BINARY_FILE, SCENE_STORE_FILE,
+                 SCENE_INDEX_FILE, "shooting_schedule.json", "scene_tags.json", METRICS_FILE,
+                 PAGES_FILE, LEGACY_PAGES_FILE, REVISION_FILE]:
         file_path = os.path.join(output_dir, file)
         if os.path.exists(file_path):
             os.remove(file_path)
 
 
-# Command-line usage (backward compatibility)
+def find_screenplay_pdfs(input_dir):
+    """Every PDF under input_dir, recursively, in a stable order."""
+    pdf_paths = []
+    for root, dirs, files in os.walk(input_dir):
+        dirs.sort()
+        pdf_paths.extend(os.path.join(root, file_name) for file_name in sorted(files)
+                         if file_name.lower().endswith(".pdf"))
+    return pdf_paths
+
+
+def _batch_output_dir(pdf_path, input_dir, output_root):
+    # Mirror the input layout: data/s1/ep1.pdf -> <output_root>/s1/ep1
+    relative = os.path.splitext(os.path.relpath(pdf_path, input_dir))[0]
+    return os.path.join(output_root, relative)
+
+
+def _process_batch_item(pdf_path, output_dir, options):
+    """Run the pipeline for one PDF in a worker process; never raises."""
+    start = time.perf_counter()
+    entry = {"pdf": pdf_path, "output_dir": output_dir}
+    try:
+        result = process_screenplay_from_pdf(pdf_path=pdf_path, output_dir=output_dir, **options)
+    except Exception as e:
+        entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+    else:
+        entry.update(status="ok", scenes=len(result["scenes"]),
+                     days=len(result["call_sheets"]), schedule_entries=len(result["schedule"]))
+    entry["seconds"] = time.perf_counter() - start
+    return entry
+
+
+def process_batch(input_dir, output_root=os.path.join("output", "batch"), workers=None,
+                  progress=None, **options):
+    """
+    Process every PDF under input_dir, one per worker process, each into its
+    own folder under output_root.
+
+    A failing script is recorded and the batch carries on. progress is
+    called as progress(done, total, entry) after each script; entry has
+    'pdf', 'output_dir', 'status' ('ok' or 'failed'), 'seconds' and either
+    scene/day counts or 'error'. options are passed to
+    process_screenplay_from_pdf (extraction runs single-process per script
+    unless extract_workers is given, since the scripts already run in
+    parallel). Writes and returns a manifest with one entry per script in
+    input order.
+    """
+    pdf_paths = find_screenplay_pdfs(input_dir)
+    options = {"extract_workers": 1, **options}
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(pdf_paths)))
+
+    start = time.perf_counter()
+    entries = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_process_batch_item, pdf_path,
+                        _batch_output_dir(pdf_path, input_dir, output_root), options): pdf_path
+            for pdf_path in pdf_paths
+        }
+        for future in as_completed(futures):
+            pdf_path = futures[future]
+            try:
+                entry = future.result()
+            except Exception as e:
+                # The worker process itself died
+                entry = {"pdf": pdf_path, "status": "failed",
+                         "error": f"{type(e).__name__}: {e}", "seconds": None,
+                         "output_dir": _batch_output_dir(pdf_path, input_dir, output_root)}
+            entries[pdf_path] = entry
+            if progress is not None:
+                progress(len(entries), len(pdf_paths), entry)
+
+    scripts = [entries[pdf_path] for pdf_path in pdf_paths]
+    manifest = {
+        "input_dir": input_dir,
+        "workers": workers,
+        "total_seconds": time.perf_counter() - start,
+        "succeeded": sum(entry["status"] == "ok" for entry in scripts),
+        "failed": sum(entry["status"] != "ok" for entry in scripts),
+        "scripts": scripts,
+    }
+    os.makedirs(output_root, exist_ok=True)
+    write_json_atomically(os.path.join(output_root, BATCH_MANIFEST_FILE), manifest, indent=2)
+    return manifest
+
+
+def _print_batch_progress(done, total, entry):
+    if entry["status"] == "ok":
+        print(f"[{done}/{total}] {entry['pdf']}: {entry['scenes']} scenes, "
+              f"{entry['days']} days ({entry['seconds']:.1f}s)")
+    else:
+        print(f"[{done}/{total}] FAILED {entry['pdf']}: {entry['error']}")
+
+
+# Command-line usage
 if __name__ == "__main__":
-    pdf_path = get_screenplay_pdf_path()
-    result = process_screenplay_from_pdf(pdf_path=pdf_path)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parse, schedule and build call sheets for screenplay PDFs.")
+    parser.add_argument("pdf", nargs="?",
+                        help="Screenplay PDF (defaults to the newest PDF in data/)")
+    parser.add_argument("--batch", metavar="DIR",
+                        help="Process every PDF under DIR, one output folder per script")
+    parser.add_argument("--output-dir",
+                        help="Output directory (default output/, or output/batch/ with --batch)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Scripts processed in parallel with --batch (default: CPU count)")
+    parser.add_argument("--tag-entities", action="store_true",
+                        help="Also tag props and extra cast per scene (needs spaCy)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the stage cache")
+    parser.add_argument("--revision-of", metavar="DIR",
+                        help="Output of the previous draft; only changed pages and scenes "
+                             "are redone (may be the output directory itself)")
+    parser.add_argument("--locked-days", type=int, nargs="+", metavar="DAY",
+                        help="With --revision-of, shooting days to keep as scheduled")
+    args = parser.parse_args()
+    if args.locked_days and not args.revision_of:
+        parser.error("--locked-days requires --revision-of")
+
+    options = {"tag_entities": args.tag_entities, "use_cache": not args.no_cache}
+
+    if args.batch:
+        output_root = args.output_dir or os.path.join("output", "batch")
+        manifest = process_batch(args.batch, output_root, workers=args.workers,
+                                 progress=_print_batch_progress, **options)
+        print(f"{manifest['succeeded']} of {len(manifest['scripts'])} scripts processed "
+              f"in {manifest['total_seconds']:.1f}s; manifest saved to "
+              f"{os.path.join(output_root, BATCH_MANIFEST_FILE)}")
+        sys.exit(1 if manifest["failed"] else 0)
+
+    output_dir = args.output_dir or "output"
+    pdf_path = args.pdf or get_screenplay_pdf_path()
+    result = process_screenplay_from_pdf(pdf_path=pdf_path, output_dir=output_dir,
+                                         previous_output=args.revision_of,
+                                         locked_days=args.locked_days, **options)
     
-    print("Parsed scenes saved to output/parsed_script.json")
-    print("Shooting schedule saved to output/shooting_schedule.json")
-    print("Call sheets saved to output/call_sheets/")
\ No newline at end of file
+    if "revision" in result:
+        revision = result["revision"]
+        print(f"Revision: {revision['pages']['changed']} of {revision['pages']['total']} pages "
+              f"changed; scenes {revision['scenes']['changed']} changed, "
+              f"{revision['scenes']['added']} added, {revision['scenes']['removed']} removed")
+
+    print(f"Parsed scenes saved to {output_dir}/{SCENES_BINARY_FILE} "
+          f"(and {SCENE_STORE_FILE}, {SCENES_JSON_FILE})")
+    print(f"Shooting schedule saved to {output_dir}/shooting_schedule.json")
+    print(f"Call sheets saved to {output_dir}/call_sheets/")
\ No newline at end of file
@@ -0,0 +1,112 @@
+# script_utils/answer_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.9
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL_SECONDS = 3600
+
+
+def context_key(indices):
+    """Order-insensitive key for the context IDs a query retrieved."""
+    return frozenset(int(idx) for idx in indices if idx >= 0)
+
+
+class SemanticAnswerCache:
+    """
+    LRU/TTL cache of LLM answers keyed by question embedding.
+
+    A stored answer is served when a new question retrieved the same context
+    IDs and its embedding has cosine similarity >= threshold with the stored
+    question, so paraphrases hit. The cache is bound to a fingerprint of the
+    engine's data and empties itself when that fingerprint changes.
+    """
+
+    def __init__(self, threshold=DEFAULT_SIMILARITY_THRESHOLD,
+                 max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS,
+                 clock=time.monotonic):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # entry id -> (vector, context key, answer, stored at)
+        self._by_context = {}          # context key -> set of entry ids
+        self._next_id = 0
+        self._fingerprint = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def bind(self, fingerprint):
+        """Tie the cache to a data fingerprint; a different one clears it."""
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._clear()
+                self._fingerprint = fingerprint
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self._entries.clear()
+        self._by_context.clear()
+
+    def _remove(self, entry_id):
+        _, key, _, _ = self._entries.pop(entry_id)
+        ids = self._by_context[key]
+        ids.discard(entry_id)
+        if not ids:
+            del self._by_context[key]
+
+    def _expire(self):
+        if self.ttl_seconds is None:
+            return
+        cutoff = self._clock() - self.ttl_seconds
+        # Entries are kept in recency order, but TTL counts from when they were stored
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry[3] < cutoff]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype="float32").ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding, context_ids):
+        """Return a cached answer for a similar question, or None."""
+        key = context_key(context_ids)
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._expire()
+            best_id, best_score = None, self.threshold
+            for entry_id in self._by_context.get(key, ()):
+                score = float(np.dot(vector, self._entries[entry_id][0]))
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][2]
+
+    def store(self, embedding, context_ids, answer):
+        if self.max_entries <= 0:
+            return
+        key = context_key(context_ids)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (self._normalize(embedding), key, answer, self._clock())
+            self._by_context.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
@@ -0,0 +1,30 @@
+# script_utils/atomic_io.py
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_open(path, mode="w", encoding="utf-8"):
+    """
+    Open a temp file next to path for writing and rename it over path when
+    the block succeeds, so readers see the old file or the new one, never a
+    partial write. On error the temp file is removed and path is untouched.
+    """
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, encoding=None if "b" in mode else encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def write_json_atomically(path, value, indent=None):
+    with atomic_open(path) as f:
+        json.dump(value, f, indent=indent)
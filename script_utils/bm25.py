@@ -0,0 +1,58 @@
+# script_utils/bm25.py
+
+import math
+import re
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+# Reciprocal rank fusion constant; 60 is the value from the original paper
+RRF_K = 60
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    """In-memory Okapi BM25 keyword index over a list of texts."""
+
+    def __init__(self, texts, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(doc id, term frequency)]
+        self.doc_lengths = []
+
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            self.doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                self.postings[term].append((doc_id, tf))
+
+        self.num_docs = len(self.doc_lengths)
+        self.avg_length = (sum(self.doc_lengths) / self.num_docs) if self.num_docs else 0.0
+        self.idf = {
+            term: math.log(1 + (self.num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+
+    def search(self, query, top_k=10):
+        """Return up to top_k (doc id, score) pairs, best first."""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc_id, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / self.avg_length)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Merge ranked lists of doc ids into one list ordered by RRF score."""
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=lambda doc_id: (-scores[doc_id], doc_id))
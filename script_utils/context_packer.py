@@ -0,0 +1,124 @@
+# script_utils/context_packer.py
+
+DEFAULT_TOKEN_BUDGET = 1500
+
+# A passage is only cut to fit the remaining budget if at least this many
+# tokens of it would survive; otherwise packing stops before it.
+MIN_PARTIAL_TOKENS = 64
+
+TRUNCATION_MARKER = "[...]"
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English with BPE tokenizers)."""
+    return (len(text) + 3) // 4
+
+
+def _trim_to_budget(text, budget, focus=None, header_lines=0):
+    """
+    Keep whole lines of text while they fit in budget tokens: the first
+    header_lines, then the focus lines (a (first, last) line range), then
+    their neighbours after and before. Without focus the text is cut from
+    the end. Cut parts are marked with TRUNCATION_MARKER.
+    """
+    lines = text.split("\n")
+    costs = [estimate_tokens(line + "\n") for line in lines]
+    used = 2 * estimate_tokens(TRUNCATION_MARKER)
+
+    def fits(i):
+        nonlocal used
+        if used + costs[i] > budget:
+            return False
+        used += costs[i]
+        return True
+
+    header = 0
+    while header < min(header_lines, len(lines)) and fits(header):
+        header += 1
+    first, last = focus if focus is not None else (header, header)
+    start = end = max(first, header)
+    while end <= last and end < len(lines) and fits(end):
+        end += 1
+    if end > last:
+        grew = True
+        while grew:
+            grew = False
+            if end < len(lines) and fits(end):
+                end += 1
+                grew = True
+            if start > header and fits(start - 1):
+                start -= 1
+                grew = True
+
+    kept = lines[:header]
+    if start > header:
+        kept.append(TRUNCATION_MARKER)
+    kept += lines[start:end]
+    if end < len(lines):
+        kept.append(TRUNCATION_MARKER)
+    return "\n".join(kept)
+
+
+def _scene_ref(passage):
+    scene = passage.get("scene")
+    return scene if scene is not None else passage["heading"]
+
+
+def pack_context(passages, token_budget=DEFAULT_TOKEN_BUDGET):
+    """
+    Fit ranked retrieval passages into a token budget.
+
+    passages is a best-first list of dicts with 'kind' ("scene" or
+    "schedule"), 'heading', 'text' and optionally:
+        'scene': the scene the passage belongs to (e.g. its number); the
+            heading is used when missing, but headings repeat in scripts
+        'note': a one-line summary used when the passage is merged into
+            another
+        'focus', 'header_lines': the (first, last) lines of text that
+            matched the query and how many leading lines describe it;
+            these are what is kept when the passage has to be cut
+    Duplicate passages are dropped, and a schedule row for a scene that is
+    already in the context is folded into that scene as its one-line note
+    instead of repeating it. The last passage that doesn't fit is trimmed
+    by lines.
+
+    Returns a dict with 'contexts' (texts in rank order), 'tokens' (estimated
+    tokens used), 'passages' (how many were included) and 'dropped'.
+    """
+    scene_refs = {_scene_ref(p) for p in passages if p["kind"] == "scene"}
+    notes = {}
+    ranked, seen = [], set()
+    for passage in passages:
+        key = (passage["kind"], passage["heading"], passage["text"])
+        if key in seen:
+            continue
+        seen.add(key)
+        if passage["kind"] == "schedule" and _scene_ref(passage) in scene_refs:
+            notes.setdefault(_scene_ref(passage), []).append(passage.get("note") or passage["text"])
+            continue
+        ranked.append(passage)
+
+    contexts, used = [], 0
+    for passage in ranked:
+        text = passage["text"]
+        if passage["kind"] == "scene" and _scene_ref(passage) in notes:
+            text += "\n" + "\n".join(f"SCHEDULED: {note}" for note in notes[_scene_ref(passage)])
+        cost = estimate_tokens(text)
+        remaining = token_budget - used
+        if cost <= remaining:
+            contexts.append(text)
+            used += cost
+            continue
+        if remaining >= MIN_PARTIAL_TOKENS:
+            trimmed = _trim_to_budget(text, remaining, passage.get("focus"),
+                                      passage.get("header_lines", 0))
+            contexts.append(trimmed)
+            used += estimate_tokens(trimmed)
+        break
+
+    return {
+        "contexts": contexts,
+        "tokens": used,
+        "passages": len(contexts),
+        "dropped": len(passages) - len(contexts),
+    }
@@ -0,0 +1,211 @@
+# script_utils/index_store.py
+
+import hashlib
+import json
+import math
+import os
+import shutil
+
+import faiss
+import numpy as np
+
+from script_utils.atomic_io import atomic_open, write_json_atomically
+from script_utils.instrumentation import NULL_SPAN
+
+# A pipeline output directory keeps its search index in this subdirectory
+INDEX_DIR_NAME = "rag_index"
+DEFAULT_INDEX_DIR = os.path.join("output", INDEX_DIR_NAME)
+
+EMBEDDINGS_FILE = "embeddings.npy"
+KEYS_FILE = "embedding_keys.json"
+INDEX_FILE = "index.faiss"
+
+# Vector storage per indexed text, for d-dimensional embeddings:
+#   flat  exact float32, 4*d bytes
+#   fp16  scalar-quantized half floats, 2*d bytes
+#   sq8   scalar-quantized 8-bit codes, d bytes
+#   pq    product-quantized codes, d / PQ_DIMS_PER_SUBVECTOR bytes
+INDEX_TYPES = ("flat", "fp16", "sq8", "pq")
+DEFAULT_INDEX_TYPE = "flat"
+PQ_DIMS_PER_SUBVECTOR = 4
+
+# k-means wants ~39 training points per centroid; PQ codebooks shrink below
+# 256 centroids for small scripts instead of training on too few points
+PQ_MIN_POINTS_PER_CENTROID = 39
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def index_file_name(index_type=DEFAULT_INDEX_TYPE):
+    return INDEX_FILE if index_type == "flat" else f"index.{index_type}.faiss"
+
+
+def build_index(embeddings, index_type=DEFAULT_INDEX_TYPE):
+    """
+    Build an L2 FAISS index of the given storage type over embeddings.
+
+    pq falls back to sq8 below 2 * PQ_MIN_POINTS_PER_CENTROID vectors, and
+    sq8 to flat for no vectors, since those types cannot be trained there.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {INDEX_TYPES}")
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    dim = embeddings.shape[1]
+
+    if index_type == "pq" and len(embeddings) < 2 * PQ_MIN_POINTS_PER_CENTROID:
+        index_type = "sq8"
+    if index_type == "sq8" and not len(embeddings):
+        index_type = "flat"
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "fp16":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16)
+    elif index_type == "sq8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+    else:
+        # Largest sub-vector count that divides dim, at ~PQ_DIMS_PER_SUBVECTOR dims each
+        subvectors = next(m for m in range(max(1, dim // PQ_DIMS_PER_SUBVECTOR), 0, -1)
+                          if dim % m == 0)
+        centroids = max(2, len(embeddings) // PQ_MIN_POINTS_PER_CENTROID)
+        nbits = max(1, min(8, int(math.log2(centroids))))
+        index = faiss.IndexPQ(dim, subvectors, nbits)
+
+    if not index.is_trained:
+        index.train(embeddings)
+    index.add(embeddings)
+    return index
+
+
+def recall_at_k(reference, candidate, queries, k):
+    """
+    Fraction of reference's top-k neighbours that candidate also returns in
+    its top k, averaged over queries (a 2-D float32 array).
+    """
+    queries = np.ascontiguousarray(queries, dtype="float32")
+    k = min(k, reference.ntotal)
+    _, expected = reference.search(queries, k)
+    _, found = candidate.search(queries, k)
+    hits = sum(len(set(e[e >= 0]) & set(f[f >= 0])) for e, f in zip(expected, found))
+    return hits / (len(queries) * k) if len(queries) else 1.0
+
+
+class IndexStore:
+    """
+    Persists a FAISS index and the embeddings behind it, keyed by the hash
+    of each indexed text.
+
+    When the texts are unchanged the saved index is read back as-is; when
+    some changed, only the new or edited texts are encoded and the index is
+    rebuilt from cached vectors.
+
+    index_type picks the vector storage (see INDEX_TYPES); the float32
+    embedding cache is kept on disk either way, so switching types never
+    re-encodes. With mmap=True the index is opened memory-mapped and
+    read-only, so processes serving the same index share one copy in the
+    page cache.
+    """
+
+    def __init__(self, index_dir=DEFAULT_INDEX_DIR, index_type=DEFAULT_INDEX_TYPE, mmap=False):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {index_type!r}; expected one of {INDEX_TYPES}")
+        self.index_dir = index_dir
+        self.index_type = index_type
+        self.mmap = mmap
+
+    def _path(self, file_name):
+        return os.path.join(self.index_dir, file_name)
+
+    def seed_from(self, source_dir):
+        """
+        Start an empty store's embedding cache from another index directory
+        (e.g. the previous draft's), so only new texts get encoded. Returns
+        True if anything was copied.
+        """
+        if (os.path.exists(self._path(KEYS_FILE))
+                or not os.path.exists(os.path.join(source_dir, KEYS_FILE))):
+            return False
+        os.makedirs(self.index_dir, exist_ok=True)
+        for file_name in (EMBEDDINGS_FILE, KEYS_FILE):
+            with open(os.path.join(source_dir, file_name), "rb") as source, \
+                    atomic_open(self._path(file_name), "wb") as f:
+                shutil.copyfileobj(source, f)
+        return True
+
+    def _load_cache(self):
+        # Memory-mapped: rows are only paged in when an index is rebuilt
+        try:
+            with open(self._path(KEYS_FILE), encoding="utf-8") as f:
+                keys = json.load(f)
+            embeddings = np.load(self._path(EMBEDDINGS_FILE), mmap_mode="r")
+        except (OSError, ValueError):
+            return [], None
+        if len(keys) != len(embeddings):
+            return [], None
+        return keys, embeddings
+
+    def _read_index(self):
+        flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if self.mmap else 0
+        return faiss.read_index(self._path(index_file_name(self.index_type)), flags)
+
+    def load_or_build(self, texts, encode, span=NULL_SPAN):
+        """
+        Return the index for texts, encoding only cache misses.
+
+        encode takes a list of strings and returns a 2-D float32 array.
+        span gets the counts of encoded and reused texts.
+        """
+        keys = [text_hash(t) for t in texts]
+        cached_keys, cached = self._load_cache()
+
+        if cached_keys == keys:
+            span.set(encoded=0, reused=len(keys))
+            if not os.path.exists(self._path(index_file_name(self.index_type))):
+                # Same texts, new storage type: build it from the cached vectors
+                self._save_index(build_index(cached, self.index_type))
+            return self._read_index()
+
+        cached_rows = {key: row for row, key in enumerate(cached_keys)}
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in cached_rows and key not in missing:
+                missing[key] = text
+
+        encoded = {}
+        if missing:
+            vectors = np.asarray(encode(list(missing.values())), dtype="float32")
+            encoded = dict(zip(missing.keys(), vectors))
+
+        embeddings = np.stack([
+            encoded[key] if key in encoded else cached[cached_rows[key]]
+            for key in keys
+        ]).astype("float32")
+        index = build_index(embeddings, self.index_type)
+
+        self._save(keys, embeddings, index)
+        span.set(encoded=len(missing), reused=len(texts) - len(missing))
+        # The float32 vectors stay on disk only; the index holds its own codes
+        return self._read_index() if self.mmap else index
+
+    def _save(self, keys, embeddings, index):
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        # Indexes of other storage types were built from the old texts
+        for index_type in INDEX_TYPES:
+            if index_type != self.index_type:
+                try:
+                    os.remove(self._path(index_file_name(index_type)))
+                except FileNotFoundError:
+                    pass
+
+        # Keys last: until they match, a half-written cache is just rebuilt
+        self._save_index(index)
+        with atomic_open(self._path(EMBEDDINGS_FILE), "wb") as f:
+            np.save(f, embeddings)
+        write_json_atomically(self._path(KEYS_FILE), keys)
+
+    def _save_index(self, index):
+        with atomic_open(self._path(index_file_name(self.index_type)), "wb") as f:
+            f.write(faiss.serialize_index(index).tobytes())
@@ -0,0 +1,221 @@
+# script_utils/instrumentation.py
+
+import glob
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from script_utils.atomic_io import write_json_atomically
+
+METRICS_FILE = "metrics.json"
+
+# Spans kept per recorder; older ones are dropped so a long-lived engine
+# doesn't grow without bound
+DEFAULT_MAX_SPANS = 1000
+
+# Latency percentiles reported by Recorder.summary
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_bytes():
+    """
+    The process's peak resident set size over its whole lifetime so far,
+    or None if unavailable. Not attributable to any one span.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss_bytes(pid="self"):
+    """A process's resident set size right now (Linux /proc), or None if unavailable."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def child_pids():
+    """Pids of this process's live children (Linux /proc), e.g. pool workers."""
+    pids = []
+    for path in glob.glob("/proc/self/task/*/children"):
+        try:
+            with open(path) as f:
+                pids.extend(f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+class Span:
+    """
+    One timed section of work. Use as a context manager; counters can be
+    passed up front or added while the span is open.
+
+    rss_before_bytes and rss_after_bytes are the process's resident memory
+    when the span opened and closed (None where /proc is unavailable); their
+    difference is what the span left allocated, not its peak.
+    """
+
+    __slots__ = ("name", "counters", "seconds", "rss_before_bytes", "rss_after_bytes",
+                 "_recorder", "_start", "_paused")
+
+    def __init__(self, recorder, name, counters):
+        self.name = name
+        self.counters = counters
+        self.seconds = None
+        self.rss_before_bytes = None
+        self.rss_after_bytes = None
+        self._recorder = recorder
+        self._start = None
+        self._paused = 0.0
+
+    def add(self, **counters):
+        """Increment counters, e.g. span.add(pages=1)."""
+        for key, value in counters.items():
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def set(self, **values):
+        self.counters.update(values)
+
+    @contextmanager
+    def paused(self):
+        """Leave the time spent inside out of the span, e.g. a generator's yield."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._paused += time.perf_counter() - start
+
+    def __enter__(self):
+        self.rss_before_bytes = current_rss_bytes()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._start - self._paused
+        self.rss_after_bytes = current_rss_bytes()
+        if exc_type is not None:
+            self.counters["error"] = exc_type.__name__
+        self._recorder._record(self)
+        return False
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "seconds": self.seconds,
+            "rss_before_bytes": self.rss_before_bytes,
+            "rss_after_bytes": self.rss_after_bytes,
+            "counters": dict(self.counters),
+        }
+
+
+class _NullSpan:
+    """Stand-in returned by a disabled recorder; every method is a no-op."""
+
+    __slots__ = ()
+
+    def add(self, **counters):
+        pass
+
+    def set(self, **values):
+        pass
+
+    def paused(self):
+        return nullcontext()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Recorder:
+    """
+    Collects spans from the pipeline and the RAG engine.
+
+    Span names are paths such as "pipeline/scenes" or "query/encode". A
+    disabled recorder hands out a shared no-op span, so instrumented code
+    costs one method call per span when metrics are off.
+    """
+
+    def __init__(self, enabled=True, max_spans=DEFAULT_MAX_SPANS):
+        self.enabled = enabled
+        self.spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def span(self, name, **counters):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, counters)
+
+    def _record(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+    def summary(self):
+        """
+        Per span name: how often it ran, its total, mean and max time and
+        its p50/p90/p99 latency over the spans still held.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        durations = {}
+        for span in spans:
+            durations.setdefault(span.name, []).append(span.seconds)
+        totals = {}
+        for name, seconds in durations.items():
+            seconds.sort()
+            stats = {
+                "count": len(seconds),
+                "total_seconds": sum(seconds),
+                "max_seconds": seconds[-1],
+                "mean_seconds": sum(seconds) / len(seconds),
+            }
+            for pct in PERCENTILES:
+                stats[f"p{pct}_seconds"] = percentile(seconds, pct)
+            totals[name] = stats
+        return totals
+
+    def to_dict(self):
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        return {
+            "peak_rss_bytes": peak_rss_bytes(),
+            "spans": spans,
+            "summary": self.summary(),
+        }
+
+    def write(self, path):
+        """Write to_dict() as JSON, replacing path atomically."""
+        write_json_atomically(path, self.to_dict(), indent=2)
+
+
+NULL_RECORDER = Recorder(enabled=False)
@@ -0,0 +1,255 @@
+# script_utils/job_runner.py
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from script_utils.atomic_io import write_json_atomically
+
+DEFAULT_JOBS_DIR = os.path.join("output", "jobs")
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_MAX_PENDING = 16
+
+# Output directories of finished jobs the runner no longer tracks (forgotten,
+# e.g. evicted from a ScriptCache, or left by an earlier server process)
+# that are kept on disk; older ones are deleted
+DEFAULT_MAX_KEPT_JOBS = 16
+
+JOB_STATUS_FILE = "job.json"
+
+# Stage reported while a job's `then` callback runs
+FINISHING_STAGE = "finishing"
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def read_job_status(output_dir):
+    """The job.json of a job directory, or None if it has none."""
+    try:
+        with open(os.path.join(output_dir, JOB_STATUS_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class JobQueueFull(Exception):
+    """Raised by JobRunner.submit when max_pending jobs are already waiting or running."""
+
+
+class Job:
+    """One pipeline run with its own output directory."""
+
+    def __init__(self, job_id, output_dir, name=None):
+        self.id = job_id
+        self.output_dir = output_dir
+        self.name = name
+        self.status = QUEUED
+        self.stage = None     # pipeline stage currently running
+        self.progress = 0.0   # fraction of pipeline stages completed
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+
+    def done(self):
+        return self.status in (DONE, FAILED)
+
+    def result(self, timeout=None):
+        """Block until the job finishes and return the pipeline's result dict."""
+        return self.future.result(timeout)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "output_dir": self.output_dir,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRunner:
+    """
+    Runs process_screenplay_from_pdf jobs on a bounded pool of worker
+    threads, each job writing to its own directory under jobs_dir, so
+    concurrent uploads never share or clear each other's outputs.
+
+    At most max_workers jobs run at once; up to max_pending jobs (running
+    plus queued) are accepted before submit raises JobQueueFull. Poll a job
+    with status() or block on Job.result(). Each job's status is also
+    written to job.json in its directory for other processes to read.
+
+    Directories of jobs the runner no longer tracks are pruned to the
+    newest max_kept_jobs when the runner starts and after every job.
+    """
+
+    def __init__(self, jobs_dir=DEFAULT_JOBS_DIR, max_workers=DEFAULT_MAX_WORKERS,
+                 max_pending=DEFAULT_MAX_PENDING, pipeline_options=None,
+                 max_kept_jobs=DEFAULT_MAX_KEPT_JOBS):
+        self.jobs_dir = jobs_dir
+        self.pipeline_options = pipeline_options or {}
+        self.max_kept_jobs = max_kept_jobs
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix="pipeline-job")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.prune()
+
+    def submit(self, pdf_path=None, pdf_bytes=None, name=None, block=False, timeout=None,
+               then=None, **options):
+        """
+        Queue a pipeline run and return its Job.
+
+        options are passed to process_screenplay_from_pdf on top of the
+        runner's pipeline_options. With block=True, wait up to timeout
+        seconds for a free slot instead of raising JobQueueFull at once.
+        then, if given, is called as then(job, result) on the worker after
+        the pipeline finishes (e.g. to build a search index); its return
+        value becomes the job's result.
+        """
+        if not pdf_path and not pdf_bytes:
+            raise ValueError("Either pdf_path or pdf_bytes must be provided")
+        if not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            raise JobQueueFull(f"{len(self.active_jobs())} jobs already pending")
+
+        job_id = uuid.uuid4().hex[:12]
+        job = Job(job_id, os.path.join(self.jobs_dir, job_id), name)
+        # Tracked before its directory exists, so a concurrent prune() never sees it untracked
+        with self._lock:
+            self._jobs[job_id] = job
+        try:
+            os.makedirs(job.output_dir)
+            self._write_status(job)
+            job.future = self._pool.submit(self._run, job, pdf_path, pdf_bytes,
+                                           {**self.pipeline_options, **options}, then)
+        except BaseException:
+            with self._lock:
+                del self._jobs[job_id]
+            self._slots.release()
+            raise
+        return job
+
+    def _run(self, job, pdf_path, pdf_bytes, options, then):
+        # Imported here so the runner can be imported without the pipeline's deps
+        from run_pipeline import process_screenplay_from_pdf
+
+        job.status = RUNNING
+        job.started_at = time.time()
+        self._write_status(job)
+        try:
+            result = process_screenplay_from_pdf(
+                pdf_path=pdf_path, pdf_bytes=pdf_bytes, output_dir=job.output_dir,
+                progress=lambda stage, completed, total: self._set_progress(
+                    job, stage, completed / total),
+                **options
+            )
+            if then is not None:
+                self._set_progress(job, FINISHING_STAGE, 1.0)
+                result = then(job, result)
+        except Exception as e:
+            job.status = FAILED
+            job.error = f"{type(e).__name__}: {e}"
+            raise
+        else:
+            job.status = DONE
+            return result
+        finally:
+            job.finished_at = time.time()
+            try:
+                self._write_status(job)
+            finally:
+                self._slots.release()
+            self.prune()
+
+    def _set_progress(self, job, stage, fraction):
+        job.stage = stage
+        job.progress = fraction
+        self._write_status(job)
+
+    def _write_status(self, job):
+        write_json_atomically(os.path.join(job.output_dir, JOB_STATUS_FILE), job.to_dict(),
+                              indent=2)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs[job_id]
+
+    def status(self, job_id):
+        return self.get(job_id).to_dict()
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def active_jobs(self):
+        return [job for job in self.jobs() if not job.done()]
+
+    def forget(self, job_id):
+        """
+        Drop a finished job from the runner. Its output directory is kept
+        until prune() finds more than max_kept_jobs untracked ones.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.done():
+                del self._jobs[job_id]
+
+    def finished_jobs(self):
+        """
+        Status dicts of the successful jobs whose output is on disk, tracked
+        or not (e.g. from an earlier server process), newest first.
+        """
+        statuses = []
+        for job_id in os.listdir(self.jobs_dir):
+            status = read_job_status(os.path.join(self.jobs_dir, job_id))
+            if status is not None and status["status"] == DONE:
+                statuses.append(status)
+        return sorted(statuses, key=lambda status: status["finished_at"] or 0, reverse=True)
+
+    def prune(self):
+        """
+        Delete untracked job directories beyond the newest max_kept_jobs.
+
+        Directories without a job.json are left alone: they may belong to a
+        job another runner is creating in the same jobs_dir.
+        """
+        untracked = []
+        # Held while listing, so submit() cannot add a job between the two
+        with self._lock:
+            for job_id in os.listdir(self.jobs_dir):
+                path = os.path.join(self.jobs_dir, job_id)
+                if job_id in self._jobs or not os.path.isdir(path):
+                    continue
+                try:
+                    # job.json is rewritten on every status change
+                    modified = os.path.getmtime(os.path.join(path, JOB_STATUS_FILE))
+                except OSError:
+                    continue
+                untracked.append((modified, path))
+        untracked.sort(reverse=True)
+        for _, path in untracked[self.max_kept_jobs:]:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
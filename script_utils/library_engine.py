@@ -0,0 +1,286 @@
+# script_utils/library_engine.py
+
+import json
+import math
+import os
+from collections import defaultdict
+
+import faiss
+import numpy as np
+
+from script_utils.models import get_embedding_model
+from script_utils.rag_engine import CANDIDATES_PER_RESULT, RAGSearchEngine, generate_answer
+
+INDEX_TYPES = ("hnsw", "ivf", "flat")
+
+# Metadata fields that can be used in search filters
+FILTER_FIELDS = ("production", "kind", "day", "location", "time_of_day", "characters", "scene_number")
+
+# Filters matching at most this many vectors are searched exactly over just
+# those vectors; graph/IVF traversal only pays off for broader filters.
+EXACT_SEARCH_MAX_IDS = 2048
+
+# The IVF index is retrained once it holds this many times the vectors its
+# cells were trained on, so nlist keeps up as productions are added
+IVF_RETRAIN_GROWTH = 4
+
+INDEX_FILE = "library.faiss"
+METADATA_FILE = "library.json"
+
+
+class ScriptLibrary:
+    """
+    One approximate nearest-neighbour index over many productions.
+
+    Scenes are indexed in full as overlapping chunks, like RAGSearchEngine
+    does, plus one vector per schedule entry. Every vector carries metadata
+    (production, kind, day, location, time_of_day, characters,
+    scene_number). Filters are turned into a FAISS ID selector and applied
+    inside the search, so a filtered query never has to discard results
+    for failing the filter.
+
+    Args:
+        index_type: "hnsw" (default), "ivf" or "flat"
+        hnsw_m: Neighbours per HNSW node
+        ef_search: HNSW search breadth
+        nlist: IVF cell count; defaults to about 4 * sqrt(vectors)
+        nprobe: IVF cells visited per query
+    """
+
+    def __init__(self, index_type="hnsw", hnsw_m=32, ef_search=64, nlist=None, nprobe=16):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {INDEX_TYPES}, got {index_type!r}")
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.index = None
+        self.metadata = []                # vector id -> metadata dict
+        self.productions = {}             # name -> {"scenes": [...], "schedule": [...]}
+        self._postings = defaultdict(set)  # (field, value) -> vector ids
+        self._pending = []                # vectors waiting for IVF training
+        self._trained_on = 0              # vectors the IVF cells were trained on
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def add_production(self, production, scenes, schedule):
+        """Index a parsed script and its schedule under a production name."""
+        if production in self.productions:
+            raise ValueError(f"Production {production!r} is already in the library")
+        self.productions[production] = {"scenes": scenes, "schedule": schedule}
+
+        # Scenes sharing a heading are shot on different days
+        days_by_scene = defaultdict(set)
+        for entry in schedule:
+            days_by_scene[entry.get("scene_number")].add(entry["day"])
+
+        texts = []
+        for ref, scene in enumerate(scenes):
+            meta = {
+                "production": production,
+                "kind": "scene",
+                "ref": ref,
+                "scene_number": scene["scene_number"],
+                "day": sorted(days_by_scene.get(scene["scene_number"], ())),
+                "location": scene["location"],
+                "time_of_day": scene["time_of_day"],
+                "characters": list(scene.get("characters", [])),
+            }
+            for chunk in RAGSearchEngine.scene_chunks(scene):
+                texts.append(chunk)
+                self._add_metadata(meta)
+        for ref, entry in enumerate(schedule):
+            texts.append(RAGSearchEngine.schedule_to_text(entry))
+            self._add_metadata({
+                "production": production,
+                "kind": "schedule",
+                "ref": ref,
+                "day": [entry["day"]],
+                "location": entry["location"],
+                "time_of_day": entry["time_of_day"],
+                "characters": list(entry["characters"]),
+            })
+
+        if texts:
+            vectors = np.asarray(get_embedding_model().encode(texts), dtype="float32")
+            self._add_vectors(vectors)
+
+    def _add_metadata(self, meta):
+        vector_id = len(self.metadata)
+        self.metadata.append(meta)
+        for field in FILTER_FIELDS:
+            value = meta.get(field)
+            values = value if isinstance(value, list) else [value]
+            for v in values:
+                if v is not None:
+                    self._postings[(field, v)].add(vector_id)
+
+    def _add_vectors(self, vectors):
+        if self.index_type == "ivf":
+            # IVF needs training data; hold vectors until build()
+            self._pending.append(vectors)
+            return
+        if self.index is None:
+            self.index = self._new_index(vectors.shape[1])
+        self.index.add(vectors)
+
+    def _new_index(self, dim, num_vectors=0):
+        if self.index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m)
+            index.hnsw.efSearch = self.ef_search
+            return index
+        if self.index_type == "ivf":
+            nlist = self.nlist or max(1, int(4 * math.sqrt(num_vectors)))
+            # FAISS wants ~39 training points per cell
+            nlist = max(1, min(nlist, num_vectors // 39))
+            index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+            index.nprobe = min(self.nprobe, nlist)
+            return index
+        return faiss.IndexFlatL2(dim)
+
+    def build(self):
+        """
+        Add vectors waiting for the IVF index, training it on everything
+        added so far when it is new or has outgrown its training set
+        (IVF_RETRAIN_GROWTH). No-op for other types.
+        """
+        if not self._pending:
+            return
+        vectors = np.vstack(self._pending)
+        self._pending = []
+        if self.index is not None:
+            if self.index.ntotal + len(vectors) < IVF_RETRAIN_GROWTH * self._trained_on:
+                self.index.add(vectors)
+                return
+            vectors = np.vstack([self.index.reconstruct_n(0, self.index.ntotal), vectors])
+        self.index = self._new_index(vectors.shape[1], len(vectors))
+        self.index.train(vectors)
+        self.index.add(vectors)
+        self.index.make_direct_map()
+        self._trained_on = len(vectors)
+
+    def _matching_ids(self, filters):
+        """Vector ids satisfying all filters (a list value means any of)."""
+        ids = None
+        for field, wanted in filters.items():
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Unknown filter field {field!r}; use one of {FILTER_FIELDS}")
+            values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            field_ids = set()
+            for v in values:
+                field_ids |= self._postings.get((field, v), set())
+            ids = field_ids if ids is None else ids & field_ids
+            if not ids:
+                return set()
+        return ids
+
+    def search(self, question, top_k=5, filters=None):
+        """
+        Return up to top_k (distance, metadata) pairs for a question,
+        restricted to vectors matching filters, e.g.
+        {"production": "Oppenheimer", "day": 3}. A scene matched by several
+        of its chunks is returned once, at its best distance.
+        """
+        self.build()
+        if self.index is None:
+            return []
+        q_embedding = np.asarray(get_embedding_model().encode([question]), dtype="float32")
+        num_candidates = top_k * CANDIDATES_PER_RESULT
+
+        if not filters:
+            D, I = self.index.search(q_embedding, num_candidates)
+        else:
+            ids = self._matching_ids(filters)
+            if not ids:
+                return []
+            if len(ids) <= EXACT_SEARCH_MAX_IDS:
+                D, I = self._exact_search(q_embedding, sorted(ids), num_candidates)
+            else:
+                D, I = self.index.search(q_embedding, num_candidates,
+                                         params=self._search_params(ids))
+
+        hits = []
+        seen = set()
+        for d, i in zip(D[0], I[0]):
+            if i < 0:
+                continue
+            meta = self.metadata[i]
+            item = (meta["production"], meta["kind"], meta["ref"])
+            if item not in seen:
+                seen.add(item)
+                hits.append((float(d), meta))
+        return hits[:top_k]
+
+    def _exact_search(self, q_embedding, ids, top_k):
+        id_array = np.asarray(ids, dtype="int64")
+        vectors = self.index.reconstruct_batch(id_array)
+        distances = ((vectors - q_embedding[0]) ** 2).sum(axis=1)
+        order = np.argsort(distances)[:top_k]
+        return distances[order][None, :], id_array[order][None, :]
+
+    def _search_params(self, ids):
+        selector = faiss.IDSelectorBatch(np.asarray(sorted(ids), dtype="int64"))
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=self.ef_search)
+        if self.index_type == "ivf":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self.index.nprobe)
+        return faiss.SearchParameters(sel=selector)
+
+    def _full_text(self, meta):
+        production = self.productions[meta["production"]]
+        if meta["kind"] == "scene":
+            text = RAGSearchEngine.scene_to_full_text(production["scenes"][meta["ref"]])
+        else:
+            text = RAGSearchEngine.schedule_to_full_text(production["schedule"][meta["ref"]])
+        return f"[{meta['production']}]\n{text}"
+
+    def query(self, question, top_k=5, filters=None):
+        """Answer a question with the LLM using filtered library search results."""
+        hits = self.search(question, top_k, filters)
+        contexts = [self._full_text(meta) for _, meta in hits]
+        summary = "LIBRARY OVERVIEW:\n" + "\n".join(
+            f"- {name}: {len(data['scenes'])} scenes, "
+            f"{len(set(e['day'] for e in data['schedule']))} shooting days"
+            for name, data in self.productions.items()
+            if not filters or name in _as_list(filters.get("production", name))
+        ) + "\n"
+        return generate_answer(RAGSearchEngine.format_prompt(summary, contexts, question))
+
+    def save(self, library_dir):
+        """Write the index, metadata and source data to library_dir."""
+        self.build()
+        os.makedirs(library_dir, exist_ok=True)
+        if self.index is not None:
+            faiss.write_index(self.index, os.path.join(library_dir, INDEX_FILE))
+        with open(os.path.join(library_dir, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump({
+                "index_type": self.index_type,
+                "trained_on": self._trained_on,
+                "metadata": self.metadata,
+                "productions": self.productions,
+            }, f)
+
+    @classmethod
+    def load(cls, library_dir, **kwargs):
+        with open(os.path.join(library_dir, METADATA_FILE), encoding="utf-8") as f:
+            data = json.load(f)
+        library = cls(index_type=data["index_type"], **kwargs)
+        library.productions = data["productions"]
+        for meta in data["metadata"]:
+            library._add_metadata(meta)
+        index_path = os.path.join(library_dir, INDEX_FILE)
+        if os.path.exists(index_path):
+            library.index = faiss.read_index(index_path)
+            if library.index_type == "hnsw":
+                library.index.hnsw.efSearch = library.ef_search
+            elif library.index_type == "ivf":
+                library.index.nprobe = min(library.nprobe, library.index.nlist)
+                library.index.make_direct_map()
+                library._trained_on = data.get("trained_on", library.index.ntotal)
+        return library
+
+
+def _as_list(value):
+    return value if isinstance(value, (list, tuple, set)) else [value]
@@ -0,0 +1,135 @@
+# script_utils/models.py
+
+import json
+import subprocess
+import sys
+import threading
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+SPACY_MODEL = "en_core_web_sm"
+
+# Modules a pipeline-only process must never pull in
+HEAVY_MODULES = ("torch", "sentence_transformers", "spacy", "transformers")
+
+
+def _load_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+
+def _load_llm_client():
+    from ollama import Client
+    return Client()
+
+
+def _load_nlp():
+    import spacy
+    return spacy.load(SPACY_MODEL)
+
+
+class ModelRegistry:
+    """Loads each registered model on first use, once, from any thread."""
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name, loader):
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks[name] = threading.Lock()
+            self._models.pop(name, None)
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        # One lock per model so a slow load doesn't block the others
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is None:
+                model = self._loaders[name]()
+                self._models[name] = model
+        return model
+
+    def reset(self, name):
+        """Drop a loaded model so the next get() loads it again."""
+        with self._locks[name]:
+            self._models.pop(name, None)
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def warmup(self, names=None):
+        """Load models up front, e.g. when a server starts."""
+        for name in names or list(self._loaders):
+            self.get(name)
+
+
+registry = ModelRegistry()
+registry.register("embedding", _load_embedding_model)
+registry.register("llm_client", _load_llm_client)
+registry.register("nlp", _load_nlp)
+
+
+def get_embedding_model():
+    return registry.get("embedding")
+
+
+def get_llm_client():
+    return registry.get("llm_client")
+
+
+def get_nlp():
+    return registry.get("nlp")
+
+
+def warmup(names=None):
+    registry.warmup(names)
+
+
+def check_import_budget(module_name, budget_seconds=1.0, forbidden=HEAVY_MODULES):
+    """
+    Import module_name in a fresh interpreter and report how long it took and
+    which forbidden modules it loaded.
+
+    Returns a dict with 'seconds', 'loaded' and 'ok'.
+    """
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [m for m in {list(forbidden)!r} if m in sys.modules]\n"
+        "print(json.dumps({'seconds': elapsed, 'loaded': loaded}))\n"
+    )
+    completed = subprocess.run([sys.executable, "-c", code],
+                               capture_output=True, text=True, check=True)
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    report["module"] = module_name
+    report["ok"] = report["seconds"] <= budget_seconds and not report["loaded"]
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check import time of pipeline modules.")
+    parser.add_argument("modules", nargs="*", default=[
+        "run_pipeline", "script_utils.rag_engine", "script_utils.ner_tagger"
+    ])
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="Maximum import time in seconds")
+    args = parser.parse_args()
+
+    failed = False
+    for module_name in args.modules:
+        report = check_import_budget(module_name, args.budget)
+        status = "OK" if report["ok"] else "OVER BUDGET"
+        loaded = ", ".join(report["loaded"]) or "none"
+        print(f"{status}: {module_name} imported in {report['seconds']:.3f}s "
+              f"(heavy modules loaded: {loaded})")
+        failed = failed or not report["ok"]
+    sys.exit(1 if failed else 0)
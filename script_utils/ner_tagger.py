@@ -1,23 +1,149 @@
 # script_utils/ner_tagger.py
-import spacy
-import re
 
-nlp = spacy.load("en_core_web_sm", "hi_core_web_sm")
+from script_utils.models import get_nlp
+
+# Entity labels treated as props
+PROP_LABELS = ("PRODUCT", "WORK_OF_ART", "ORG")
+
+# Pipeline components entity recognition needs; the rest are disabled
+ENTITY_PIPES = ("tok2vec", "ner")
+
+
+def __getattr__(name):
+    # `ner_tagger.nlp` used to be loaded at import time; load it on first use
+    if name == "nlp":
+        return get_nlp()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def extract_entities(text):
-    doc = nlp(text)
-    props = [ent.text for ent in doc.ents if ent.label_ in ("PRODUCT", "WORK_OF_ART", "ORG")]
+    doc = get_nlp()(text)
+    props = [ent.text for ent in doc.ents if ent.label_ in PROP_LABELS]
     return list(set(props))
 
-def extract_known_characters_from_actions(action_lines, known_characters):
+def extract_entities_batch(texts, batch_size=64, n_process=1):
+    """
+    Yield the props found in each text, in order, running spaCy over the
+    texts in batches with only the components NER needs enabled.
+    n_process > 1 fans batches out to worker processes.
+    """
+    nlp = get_nlp()
+    disabled = [name for name in nlp.pipe_names if name not in ENTITY_PIPES]
+    with nlp.select_pipes(disable=disabled):
+        for doc in nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            yield list({ent.text for ent in doc.ents if ent.label_ in PROP_LABELS})
+
+
+def _is_word_char(c):
+    # Same notion of a word character as the regex \b
+    return c.isalnum() or c == "_"
+
+
+class CharacterMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of character names.
+
+    One pass over a text finds every name that occurs as a whole word, with
+    the same boundary rules as searching for r'\\b' + re.escape(name) + r'\\b'
+    one name at a time. Build it once per script and reuse it for every scene.
+    """
+
+    def __init__(self, names):
+        self.names = list(dict.fromkeys(names))
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+
+        for index, name in enumerate(self.names):
+            state = 0
+            for c in name:
+                if c not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[state][c] = len(self._goto) - 1
+                state = self._goto[state][c]
+            if name:
+                self._output[state].append(index)
+
+        # Breadth-first pass to set failure links and merge outputs
+        queue = list(self._goto[0].values())
+        while queue:
+            next_queue = []
+            for state in queue:
+                for c, child in self._goto[state].items():
+                    fallback = self._fail[state]
+                    while fallback and c not in self._goto[fallback]:
+                        fallback = self._fail[fallback]
+                    self._fail[child] = self._goto[fallback].get(c, 0)
+                    if self._fail[child] == child:
+                        self._fail[child] = 0
+                    self._output[child] = self._output[child] + self._output[self._fail[child]]
+                    next_queue.append(child)
+            queue = next_queue
+
+    def find(self, text):
+        """Return the set of names occurring in text as whole words."""
+        found = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for end, c in enumerate(text):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for index in output[state]:
+                name = self.names[index]
+                start = end - len(name) + 1
+                before = text[start - 1] if start > 0 else ""
+                after = text[end + 1] if end + 1 < len(text) else ""
+                if (_is_word_char(name[0]) != (before != "" and _is_word_char(before))
+                        and _is_word_char(name[-1]) != (after != "" and _is_word_char(after))):
+                    found.add(name)
+        return found
+
+
+def extract_known_characters_from_actions(action_lines, known_characters, matcher=None):
     """ list of known character names that appear in the action lines.
+
+    Pass a CharacterMatcher built from known_characters to reuse one
+    automaton across many calls.
     """
     text = " ".join(action_lines).upper()
-    found = []
-    for character in known_characters:
-        # Whole word match to avoid partial false positives
-        pattern = r'\b' + re.escape(character) + r'\b'
-        if re.search(pattern, text):
-            found.append(character)
-    return list(set(found))
+    if matcher is None:
+        matcher = CharacterMatcher(known_characters)
+    return list(matcher.find(text))
+
+
+def tag_scenes(scenes, batch_size=64, n_process=1, known_props=None):
+    """
+    Tag props and extra cast for a whole script.
+
+    Returns one dict per scene with 'scene_number', 'props' (spaCy entities
+    in the action lines) and 'mentioned_characters' (known characters named
+    in the action lines who have no dialogue in that scene).
+
+    known_props, if given, lists per scene the props already found for it
+    (e.g. in an unchanged scene of a previous draft) or None; spaCy only
+    runs on the scenes with None.
+    """
+    known_characters = sorted({c for scene in scenes for c in scene.get("characters", [])})
+    matcher = CharacterMatcher(known_characters)
+    texts = [" ".join(scene.get("actions", [])) for scene in scenes]
+
+    if known_props is None:
+        known_props = [None] * len(scenes)
+    untagged = [position for position, props in enumerate(known_props) if props is None]
+    found = {}
+    if untagged:
+        found = dict(zip(untagged, extract_entities_batch([texts[i] for i in untagged],
+                                                          batch_size, n_process)))
 
+    tags = []
+    for position, (scene, text, props) in enumerate(zip(scenes, texts, known_props)):
+        speaking = set(scene.get("characters", []))
+        mentioned = matcher.find(text.upper()) - speaking
+        tags.append({
+            "scene_number": scene["scene_number"],
+            "props": sorted(found[position] if props is None else props),
+            "mentioned_characters": sorted(mentioned),
+        })
+    return tags
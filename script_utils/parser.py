@@ -28,6 +28,23 @@ BLACKLIST = {
     "BACK TO SCENE", "SUPER", "TITLE", "HARD CUT TO"
 }
 
+# Parentheticals on character cues, e.g. "KARAN (CONT'D)", "MOM (V.O.)"
+CUE_EXTENSION_RE = re.compile(r"\s*\(.*?\)\s*")
+
+# Sound sources the parser picks up as cues; nobody is cast for them
+NON_CHARACTER_CUES = {"RADIO", "VOICE", "VOICES", "LOUDSPEAKER", "INTERCOM", "TV", "TELEVISION"}
+
+def base_character_name(name):
+    """Strip cue extensions: "KARAN (CONT'D)" -> "KARAN"."""
+    return CUE_EXTENSION_RE.sub(" ", name).strip()
+
+def is_character_name(name):
+    """
+    False for capitalised lines the parser took for cues but that end like
+    prose ("MIT.", "FBI...", "WIDE-") and for sound sources ("RADIO").
+    """
+    return bool(name) and name[-1].isalnum() and name not in NON_CHARACTER_CUES
+
 def extract_location_and_time(heading):
     h = normalize_line(heading)
     m = SCENE_HEADING_RE.match(h)
@@ -37,49 +54,77 @@ def extract_location_and_time(heading):
         return loc, tod
     return "UNKNOWN", "UNKNOWN"
 
-def parse_screenplay(script_text):
-    scenes = []
+# Single classifier for a normalized line: scene headings win over character
+# cues (as when the two regexes are tested in turn), so one match call decides.
+LINE_RE = re.compile(
+    r'(?i:' + SCENE_HEADING_RE.pattern + r')'
+    r'|(?P<character>' + CHARACTER_RE.pattern + r')'
+)
+
+def iter_lines(pages):
+    """Split an iterable of page texts, e.g. from iter_pdf_pages, into lines."""
+    for page_text in pages:
+        if isinstance(page_text, tuple):
+            page_text = page_text[1]
+        yield from page_text.splitlines()
+
+def iter_scenes(lines):
+    """
+    Stream scenes from an iterable of raw lines.
+
+    Each line is normalized once and classified with a single regex match;
+    a scene is yielded as soon as the next heading (or the end of input) is
+    reached, so only the current scene is held in memory.
+    """
     scene = None
+    seen_characters = set()
     scene_count = 0
 
-    # Pre-normalize lines
-    lines = [normalize_line(l) for l in script_text.splitlines() if normalize_line(l)]
+    for raw_line in lines:
+        line = normalize_line(raw_line)
+        if not line:
+            continue
+
+        m = LINE_RE.match(line)
 
-    for line in lines:
         # Detect scene headings
-        if SCENE_HEADING_RE.match(line):
+        if m and m.group(2):
             if scene:
-                scenes.append(scene)
+                yield scene
             scene_count += 1
-            location, time_of_day = extract_location_and_time(line)
             scene = {
                 "scene_number": scene_count,
                 "heading": line,
-                "location": location,
-                "time_of_day": time_of_day,
+                "location": m.group(3).strip().upper(),
+                "time_of_day": (m.group(4) or "UNKNOWN").upper(),
                 "characters": [],
                 "actions": []
             }
+            seen_characters = set()
+            continue
+
+        if not scene:
             continue
 
         # Detect characters
-        if scene and CHARACTER_RE.match(line):
+        if m:
             tok_count = len(line.split())
             if 1 <= tok_count <= 3:
                 up = line.rstrip(':').upper()
                 if up not in BLACKLIST and not up.endswith("TO"):
-                    if up not in scene["characters"]:
+                    if up not in seen_characters:
+                        seen_characters.add(up)
                         scene["characters"].append(up)
                     continue
 
         # Otherwise: treat as action
-        if scene:
-            scene["actions"].append(line)
+        scene["actions"].append(line)
 
     if scene:
-        scenes.append(scene)
+        yield scene
 
-    return scenes
+def parse_screenplay(script_text):
+    return list(iter_scenes(script_text.splitlines()))
 
 # Debug mode
 if __name__ == "__main__":
@@ -1,15 +1,97 @@
 # script_utils/pdf_extractor.py
 
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from PyPDF2 import PdfReader
 
-def extract_text_from_pdf(pdf_path):
+from script_utils.instrumentation import NULL_SPAN
+
+# Pages per shard handed to a worker process. Small enough to balance work
+# across cores, large enough that each worker amortises opening the PDF.
+PAGES_PER_SHARD = 16
+
+# Below this many pages the process pool costs more than it saves.
+MIN_PAGES_FOR_POOL = 32
+
+
+def _pool_context():
+    # The pool is often created from a thread (a JobRunner worker, the UI
+    # server); forking a process while other threads hold locks can leave
+    # the child deadlocked, so workers start from a clean forkserver
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _extract_pages(pdf_path, page_numbers):
+    """Extract text for the given pages in a worker process."""
     reader = PdfReader(pdf_path)
-    full_text = ""
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            full_text += page_text + "\n"
-    return full_text
+    return [(page_number, reader.pages[page_number].extract_text() or "")
+            for page_number in page_numbers]
+
+
+def iter_pdf_pages(pdf_path, workers=None, shard_size=PAGES_PER_SHARD, page_numbers=None):
+    """
+    Yield (page_number, text) for every page of the PDF, in page order, or
+    only for page_numbers when given.
+
+    Page ranges are spread across a process pool; shards are yielded as soon
+    as they and all shards before them are done, so callers can start work
+    on the first pages while later ones are still being extracted.
+    Page numbers are zero-based. Pages without text yield an empty string.
+    """
+    reader = None
+    if page_numbers is None:
+        reader = PdfReader(pdf_path)
+        page_numbers = range(len(reader.pages))
+    page_numbers = list(page_numbers)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shards = [page_numbers[start:start + shard_size]
+              for start in range(0, len(page_numbers), shard_size)]
+    workers = min(workers, len(shards))
+
+    if workers <= 1 or len(page_numbers) < MIN_PAGES_FOR_POOL:
+        # One reader for the whole file; opening one per shard re-parses it
+        reader = reader or PdfReader(pdf_path)
+        for page_number in page_numbers:
+            yield page_number, reader.pages[page_number].extract_text() or ""
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+        # Executor.map returns results in submission order
+        for shard in pool.map(_extract_pages, [pdf_path] * len(shards), shards):
+            yield from shard
+
+
+def page_fingerprints(pdf_path):
+    """
+    sha256 of each page's content stream, in page order. Reading the raw
+    streams is about ten times cheaper than extracting their text, so this
+    finds the pages of a revised draft that need extracting again.
+    """
+    fingerprints = []
+    for page in PdfReader(pdf_path).pages:
+        contents = page.get_contents()
+        data = contents.get_data() if contents is not None else b""
+        fingerprints.append(hashlib.sha256(data).hexdigest())
+    return fingerprints
+
+
+def join_pages(page_texts):
+    """Script text from per-page texts, skipping empty pages."""
+    return "".join(text + "\n" for text in page_texts if text)
+
+
+def extract_text_from_pdf(pdf_path, workers=None, span=NULL_SPAN):
+    """Return the text of every non-empty page; counts pages on span."""
+    page_texts = []
+    for _, page_text in iter_pdf_pages(pdf_path, workers=workers):
+        span.add(pages=1)
+        page_texts.append(page_text)
+    return join_pages(page_texts)
 
 # Usage Example
 if __name__ == "__main__":
@@ -0,0 +1,386 @@
+# script_utils/query_service.py
+"""
+Asynchronous HTTP query service around a RAGSearchEngine.
+
+    python -m script_utils.query_service --port 8765
+    curl -d '{"question": "Who is on day 2?"}' http://127.0.0.1:8765/query
+    curl http://127.0.0.1:8765/stats
+
+Concurrent questions are collected into micro-batches so the embedding
+model and FAISS see one call per batch instead of one per question; LLM
+calls share a pooled async client with a concurrency cap, per-call
+timeouts and retries. GET /stats reports latency percentiles per phase.
+Set OLLAMA_HOST to point at the LLM server (or at script_utils.stub_llm).
+"""
+
+import asyncio
+import json
+import time
+
+from script_utils.instrumentation import Recorder
+from script_utils.rag_engine import DEFAULT_LLM_CONCURRENCY, LLM_MODEL, llm_error
+
+DEFAULT_PORT = 8765
+DEFAULT_TOP_K = 5
+
+# A batch is sent once it has this many questions or its first question
+# has waited this long, whichever comes first
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_WAIT_SECONDS = 0.005
+
+DEFAULT_LLM_TIMEOUT = 120.0
+DEFAULT_LLM_RETRIES = 2
+RETRY_BACKOFF_SECONDS = 0.5
+
+MAX_REQUEST_BYTES = 64 * 1024
+
+# Latency percentiles in /stats are over the most recent spans kept
+DEFAULT_MAX_SERVICE_SPANS = 10000
+
+
+class HTTPError(Exception):
+    """A request the service rejects before routing it; the connection is closed."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SearchBatcher:
+    """
+    Groups concurrent retrieval requests into batches for the engine's
+    retrieve (one encode call and one FAISS search per batch), which runs
+    on a worker thread so the event loop stays responsive.
+    """
+
+    def __init__(self, engine, top_k=DEFAULT_TOP_K, max_batch=DEFAULT_MAX_BATCH,
+                 max_wait=DEFAULT_MAX_WAIT_SECONDS, recorder=None):
+        self.engine = engine
+        self.top_k = top_k
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.recorder = recorder or Recorder()
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def search(self, question):
+        """Return (question embedding, entry ids) for one question."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((question, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            questions = [question for question, _ in batch]
+            try:
+                with self.recorder.span("service/search_batch", questions=len(questions)):
+                    q_embeddings, hits = await asyncio.to_thread(
+                        self.engine.retrieve, questions, self.top_k)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), embedding, entry_ids in zip(batch, q_embeddings, hits):
+                if not future.done():
+                    future.set_result((embedding, entry_ids))
+
+
+class LLMPool:
+    """
+    Shared async ollama client: one pooled HTTP connection set, at most
+    max_concurrency requests in flight, a timeout per attempt and retries
+    with exponential backoff on connection errors, timeouts and 5xx.
+    """
+
+    def __init__(self, host=None, model=LLM_MODEL, max_concurrency=DEFAULT_LLM_CONCURRENCY,
+                 timeout=DEFAULT_LLM_TIMEOUT, retries=DEFAULT_LLM_RETRIES, recorder=None):
+        self.host = host
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.recorder = recorder or Recorder()
+        self._client = None
+        self._semaphore = None
+
+    def _ensure_client(self):
+        # Created lazily so they bind to the running event loop
+        if self._client is None:
+            import httpx
+            from ollama import AsyncClient
+            self._client = AsyncClient(
+                host=self.host, timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_concurrency,
+                                    max_keepalive_connections=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def generate(self, prompt):
+        import httpx
+        from ollama import ResponseError
+
+        client = self._ensure_client()
+        async with self._semaphore:
+            for attempt in range(self.retries + 1):
+                with self.recorder.span("service/llm", attempt=attempt) as span:
+                    try:
+                        response = await asyncio.wait_for(
+                            client.chat(model=self.model,
+                                        messages=[{"role": "user", "content": prompt}]),
+                            self.timeout,
+                        )
+                        return response['message']['content']
+                    except ResponseError as e:
+                        if e.status_code < 500 or attempt == self.retries:
+                            raise llm_error(e)
+                        span.set(error=type(e).__name__)
+                    except (ConnectionError, httpx.TransportError, asyncio.TimeoutError) as e:
+                        if attempt == self.retries:
+                            raise
+                        span.set(error=type(e).__name__)
+                await asyncio.sleep(RETRY_BACKOFF_SECONDS * 2 ** attempt)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+class QueryService:
+    """
+    Answers questions for one engine; run() serves them over HTTP.
+
+    Retrieval goes through a SearchBatcher and generation through an
+    LLMPool, both recording into the service's recorder so /stats covers
+    whole requests as well as each phase.
+    """
+
+    def __init__(self, engine, top_k=DEFAULT_TOP_K, max_batch=DEFAULT_MAX_BATCH,
+                 max_wait=DEFAULT_MAX_WAIT_SECONDS, llm_host=None,
+                 llm_concurrency=DEFAULT_LLM_CONCURRENCY, llm_timeout=DEFAULT_LLM_TIMEOUT,
+                 llm_retries=DEFAULT_LLM_RETRIES, recorder=None):
+        self.engine = engine
+        self.recorder = recorder or Recorder(max_spans=DEFAULT_MAX_SERVICE_SPANS)
+        self.batcher = SearchBatcher(engine, top_k=top_k, max_batch=max_batch,
+                                     max_wait=max_wait, recorder=self.recorder)
+        self.llm = LLMPool(host=llm_host, max_concurrency=llm_concurrency,
+                           timeout=llm_timeout, retries=llm_retries, recorder=self.recorder)
+
+    async def answer(self, question):
+        """Answer one question; returns {'answer', 'source'}."""
+        with self.recorder.span("service/request") as span:
+            structured = self.engine.structured_answer(question)
+            if structured is not None:
+                span.set(source="structured")
+                return {"answer": structured, "source": "structured"}
+
+            embedding, entry_ids = await self.batcher.search(question)
+            cached = self.engine.cached_answer(embedding, entry_ids)
+            if cached is not None:
+                span.set(source="cache")
+                return {"answer": cached, "source": "cache"}
+
+            span.set(source="llm")
+            # Packing context reads scenes (from disk with a SceneStore)
+            prompt = await asyncio.to_thread(self.engine.prepare_prompt, question, entry_ids)
+            answer = await self.llm.generate(prompt)
+            self.engine.cache_answer(embedding, entry_ids, answer)
+            return {"answer": answer, "source": "llm"}
+
+    def stats(self):
+        cache = self.engine.answer_cache
+        return {
+            "latency": self.recorder.summary(),
+            "answer_cache": {"hits": cache.hits, "misses": cache.misses} if cache else None,
+        }
+
+    async def start(self):
+        self.batcher.start()
+
+    async def stop(self):
+        await self.batcher.stop()
+        await self.llm.aclose()
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    # The rest of the stream can't be framed; answer and hang up
+                    _write_response(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                status, payload = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                _write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/stats":
+            return 200, self.stats()
+        if method == "POST" and path == "/query":
+            try:
+                question = json.loads(body or b"{}").get("question", "").strip()
+            except (ValueError, AttributeError):
+                return 400, {"error": "body must be JSON with a 'question'"}
+            if not question:
+                return 400, {"error": "missing 'question'"}
+            start = time.perf_counter()
+            try:
+                result = await self.answer(question)
+            except Exception as e:
+                return 502, {"error": str(e)}
+            result["seconds"] = time.perf_counter() - start
+            return 200, result
+        return 404, {"error": "not found"}
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT):
+        """Start listening and return the asyncio server."""
+        await self.start()
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def run(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await self.serve(host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await self.stop()
+
+
+async def _read_request(reader):
+    """
+    Read one HTTP/1.1 request; None when the client closed the connection.
+
+    Raises HTTPError for malformed request lines or headers (400) and for
+    bodies over MAX_REQUEST_BYTES (413).
+    """
+    try:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise HTTPError(400, "malformed request line")
+        method, path, _ = parts
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, colon, value = line.decode("latin-1").partition(":")
+            if not colon or not name.strip():
+                raise HTTPError(400, "malformed header")
+            headers[name.strip().lower()] = value.strip()
+    except ValueError:
+        # StreamReader.readline on a line longer than the stream limit
+        raise HTTPError(400, "request line or header too long")
+
+    try:
+        length = int(headers.get("content-length", 0))
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length")
+    if length < 0:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > MAX_REQUEST_BYTES:
+        raise HTTPError(413, f"body larger than {MAX_REQUEST_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b""
+    return method, path.split("?", 1)[0], headers, body
+
+
+def _write_response(writer, status, payload, keep_alive):
+    reasons = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+               502: "Bad Gateway"}
+    body = json.dumps(payload).encode("utf-8")
+    writer.write(
+        f"HTTP/1.1 {status} {reasons.get(status, 'Error')}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+        + body
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    from script_utils.index_store import DEFAULT_INDEX_TYPE, INDEX_DIR_NAME, INDEX_TYPES
+    from script_utils.rag_engine import RAGSearchEngine
+    from script_utils.scene_model import load_scenes
+    from script_utils.scene_store import SceneStore
+
+    parser = argparse.ArgumentParser(description="Serve screenplay questions over HTTP.")
+    parser.add_argument("--output-dir", default="output", help="Pipeline output to serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_SECONDS * 1000)
+    parser.add_argument("--llm-concurrency", type=int, default=DEFAULT_LLM_CONCURRENCY)
+    parser.add_argument("--llm-timeout", type=float, default=DEFAULT_LLM_TIMEOUT)
+    parser.add_argument("--llm-retries", type=int, default=DEFAULT_LLM_RETRIES)
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=DEFAULT_INDEX_TYPE)
+    parser.add_argument("--mmap-index", action="store_true",
+                        help="Share the saved index read-only with other service processes")
+    args = parser.parse_args()
+
+    if SceneStore.exists(args.output_dir):
+        scenes = SceneStore(args.output_dir)
+    else:
+        scenes = load_scenes(args.output_dir)
+    with open(os.path.join(args.output_dir, "shooting_schedule.json"), encoding="utf-8") as f:
+        schedule = json.load(f)
+
+    # The run's own index, as ui_app uses, so serving one run never rebuilds another's
+    engine = RAGSearchEngine(scenes, schedule,
+                             index_dir=os.path.join(args.output_dir, INDEX_DIR_NAME),
+                             index_type=args.index_type, mmap_index=args.mmap_index)
+    service = QueryService(
+        engine, top_k=args.top_k, max_batch=args.max_batch,
+        max_wait=args.max_wait_ms / 1000, llm_concurrency=args.llm_concurrency,
+        llm_timeout=args.llm_timeout, llm_retries=args.llm_retries,
+    )
+    print(f"Query service listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.run(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -1,36 +1,143 @@
-import faiss
-from sentence_transformers import SentenceTransformer
-from ollama import Client
+import copy
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from script_utils.answer_cache import SemanticAnswerCache
+from script_utils.bm25 import BM25Index, reciprocal_rank_fusion
+from script_utils.context_packer import DEFAULT_TOKEN_BUDGET, estimate_tokens, pack_context
+from script_utils.index_store import DEFAULT_INDEX_TYPE, IndexStore, build_index
+from script_utils.instrumentation import NULL_RECORDER
+from script_utils.models import get_embedding_model, get_llm_client
+from script_utils.stage_cache import fingerprint
+from script_utils.structured_index import StructuredIndex
+
+LLM_MODEL = 'llama3.2'
+
+# Default cap on simultaneous LLM requests in query_many
+DEFAULT_LLM_CONCURRENCY = 4
+
+# Scenes are indexed as overlapping windows of action/dialogue lines
+CHUNK_LINES = 12
+CHUNK_OVERLAP = 4
+
+# Each retriever contributes this many candidates per requested result
+# before the rankings are fused
+CANDIDATES_PER_RESULT = 4
+
+
+def chunk_ranges(num_lines, chunk_lines=CHUNK_LINES, overlap=CHUNK_OVERLAP):
+    """(start, end) line ranges of the overlapping chunks of a scene."""
+    step = max(1, chunk_lines - overlap)
+    ranges = []
+    for start in range(0, num_lines, step):
+        ranges.append((start, min(start + chunk_lines, num_lines)))
+        if start + chunk_lines >= num_lines:
+            break
+    return ranges
+
+
+def __getattr__(name):
+    # The embedding model and LLM client used to be built at import time;
+    # keep `rag_engine.model` / `rag_engine.client` working, but lazily.
+    if name == "model":
+        return get_embedding_model()
+    if name == "client":
+        return get_llm_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def llm_error(e):
+    """Turn a missing-model error into an actionable one."""
+    if "not found" in str(e).lower() or "404" in str(e):
+        return Exception(
+            f"Model '{LLM_MODEL}' not found. Please run: ollama pull {LLM_MODEL}\n"
+            f"Original error: {str(e)}"
+        )
+    return e
+
+
+def generate_answer(prompt):
+    """Send one prompt to the LLM and return the completion."""
+    try:
+        response = get_llm_client().chat(model=LLM_MODEL, messages=[{"role": "user", "content": prompt}])
+        return response['message']['content']
+    except Exception as e:
+        raise llm_error(e)
 
-client = Client()
-model = SentenceTransformer('all-MiniLM-L6-v2')
 
 class RAGSearchEngine:
-    def __init__(self, scenes, schedule):
+    def __init__(self, scenes, schedule, index_dir=None, answer_cache=None,
+                 call_sheets=None, fast_path=True, context_token_budget=DEFAULT_TOKEN_BUDGET,
+                 recorder=None, index_type=DEFAULT_INDEX_TYPE, mmap_index=False):
+        """
+        Args:
+            scenes: Parsed scenes; a list of dicts, SceneTable or SceneStore
+                (with a store, context lookups read single scenes from disk)
+            schedule: Shooting schedule entries
+            index_dir: If set, the FAISS index and per-text embeddings are
+                persisted here and reused, so only new or changed entries
+                are re-encoded on the next build
+            answer_cache: SemanticAnswerCache to serve repeated or
+                paraphrased questions from; a default one is created when
+                omitted, pass False to disable it
+            call_sheets: Output of generate_call_sheets; derived from the
+                schedule when omitted
+            fast_path: Answer recognisable lookup questions ("when is X
+                scheduled", "who is on day 4") from structured indexes
+                instead of the LLM
+            context_token_budget: Maximum estimated tokens of retrieved
+                context put into a prompt
+            recorder: instrumentation.Recorder that receives spans for the
+                index build and each query phase (encode, search, prompt,
+                generate); instrumentation is off when omitted
+            index_type: Vector storage, one of index_store.INDEX_TYPES;
+                "sq8" needs a quarter of the memory of the exact "flat"
+                index (see benchmarks.index_recall for the recall cost)
+            mmap_index: Open the persisted index memory-mapped and
+                read-only so several processes share it; needs index_dir
+        """
+        if mmap_index and not index_dir:
+            raise ValueError("mmap_index requires index_dir")
         self.scenes = scenes
         self.schedule = schedule
+        self.index_dir = index_dir
+        self.index_type = index_type
+        self.mmap_index = mmap_index
+        if answer_cache is None:
+            answer_cache = SemanticAnswerCache()
+        self.answer_cache = answer_cache if answer_cache is not False else None
+        self.data_fingerprint = None
+        self.call_sheets = call_sheets
+        self.fast_path = fast_path
+        self.structured = None
+        self.context_token_budget = context_token_budget
+        self.recorder = recorder if recorder is not None else NULL_RECORDER
+        self.script_summary = ""
         self.index = None
         self.text_lookup = []
+        self.entry_refs = []  # ("scene" | "schedule", position) per indexed text
+        self.entry_lines = []  # (start, end) action lines of each scene chunk, else None
+        self.bm25 = None
         self.scene_lookup = []  # Store full scene objects for context
         self.schedule_lookup = []  # Store full schedule entries
-        self.embeddings = []
         self._build_index()
 
-    def _scene_to_text(self, scene):
-        """Create a rich text representation of a scene for indexing."""
-        base_info = f"Scene {scene['scene_number']}: {scene['heading']} | Location: {scene['location']} | Time: {scene['time_of_day']} | Characters: {', '.join(scene.get('characters', []))}"
-        
-        # Include action/dialogue content if available (first 500 chars for indexing)
+    @staticmethod
+    def scene_chunks(scene, chunk_lines=CHUNK_LINES, overlap=CHUNK_OVERLAP):
+        """
+        Split a scene into overlapping chunks that each carry the scene
+        header. The scene number is left out, so inserting or omitting a
+        scene in a revised draft doesn't change the chunks after it.
+        """
+        header = f"{scene['heading']} | Location: {scene['location']} | Time: {scene['time_of_day']} | Characters: {', '.join(scene.get('characters', []))}"
         actions = scene.get('actions', [])
-        if actions:
-            action_text = ' '.join(actions[:20])  # First 20 action lines
-            if len(action_text) > 500:
-                action_text = action_text[:500] + "..."
-            base_info += f" | Content: {action_text}"
-        
-        return base_info
+        if not actions:
+            return [header]
+        return [f"{header} | Content: {' '.join(actions[start:end])}"
+                for start, end in chunk_ranges(len(actions), chunk_lines, overlap)]
 
-    def _scene_to_full_text(self, scene):
+    @staticmethod
+    def scene_to_full_text(scene):
         """Create a complete text representation of a scene with all content."""
         text = f"=== Scene {scene['scene_number']} ===\n"
         text += f"HEADING: {scene['heading']}\n"
@@ -46,10 +153,13 @@ class RAGSearchEngine:
         
         return text
 
-    def _schedule_to_text(self, entry):
+    @staticmethod
+    def schedule_to_text(entry):
+        """One-line text of a schedule entry, as indexed."""
         return f"Day {entry['day']} | {entry['scene_heading']} | Location: {entry['location']} | Characters: {', '.join(entry['characters'])} | Time: {entry['start_time']} | Duration: {entry.get('estimated_duration', 'N/A')}"
 
-    def _schedule_to_full_text(self, entry):
+    @staticmethod
+    def schedule_to_full_text(entry):
         """Create a complete text representation of a schedule entry."""
         text = f"=== Day {entry['day']} - {entry['start_time']} ===\n"
         text += f"SCENE: {entry['scene_heading']}\n"
@@ -60,46 +170,315 @@ class RAGSearchEngine:
         return text
 
     def _build_index(self):
-        # Build index with scene summaries
-        self.text_lookup = [self._scene_to_text(s) for s in self.scenes] + \
-                           [self._schedule_to_text(s) for s in self.schedule]
+        with self.recorder.span("index/build", scenes=len(self.scenes),
+                                schedule_entries=len(self.schedule)) as span:
+            self._build_index_contents()
+            span.set(entries=len(self.text_lookup))
+        print(f" FAISS index built with {len(self.text_lookup)} entries")
+
+    def _build_index_contents(self):
+        # Index every scene in full as overlapping chunks that point back
+        # to their scene, followed by one entry per schedule row
+        # Chunks are embedded without their scene number (see scene_chunks);
+        # the keyword index and lookups use the numbered text
+        self.text_lookup = []
+        self.entry_refs = []
+        self.entry_lines = []
+        embedding_texts = []
+        for position, scene in enumerate(self.scenes):
+            chunks = self.scene_chunks(scene)
+            lines = chunk_ranges(len(scene.get('actions', []))) or [None]
+            for chunk, line_range in zip(chunks, lines):
+                self.text_lookup.append(f"Scene {scene['scene_number']}: {chunk}")
+                embedding_texts.append(chunk)
+                self.entry_refs.append(("scene", position))
+                self.entry_lines.append(line_range)
+        for position, entry in enumerate(self.schedule):
+            self.text_lookup.append(self.schedule_to_text(entry))
+            embedding_texts.append(self.text_lookup[-1])
+            self.entry_refs.append(("schedule", position))
+            self.entry_lines.append(None)
         
         # Store full scene and schedule objects for context retrieval
         self.scene_lookup = self.scenes
         self.schedule_lookup = self.schedule
         
-        self.embeddings = model.encode(self.text_lookup)
+        with self.recorder.span("index/encode", texts=len(self.text_lookup)) as span:
+            if self.index_dir:
+                store = IndexStore(self.index_dir, self.index_type, mmap=self.mmap_index)
+                self.index = store.load_or_build(embedding_texts, get_embedding_model().encode,
+                                                 span)
+            else:
+                # The index keeps its own copy of the vectors; the encoded
+                # array is dropped once it is built
+                self.index = build_index(get_embedding_model().encode(embedding_texts),
+                                         self.index_type)
 
-        dim = self.embeddings[0].shape[0]
-        self.index = faiss.IndexFlatL2(dim)
-        self.index.add(self.embeddings)
+        # Keyword index over the same texts, fused with the dense results
+        self.bm25 = BM25Index(self.text_lookup)
 
-        print(f" FAISS index built with {len(self.text_lookup)} entries")
+        self.structured = StructuredIndex(self.scenes, self.schedule, self.call_sheets)
+        self.script_summary = self._get_script_summary()
+
+        # Cached answers are only valid for the data they were generated from
+        self.data_fingerprint = fingerprint(self.scenes, self.schedule)
+        if self.answer_cache is not None:
+            self.answer_cache.bind(self.data_fingerprint)
+
+    def memory_bytes(self):
+        """
+        Approximate memory held by the vector index and indexed texts. A
+        memory-mapped index lives in the shared page cache and is not counted.
+        """
+        index_bytes = 0
+        if self.index is not None and not self.mmap_index:
+            index_bytes = self.index.ntotal * self.index.sa_code_size()
+        return index_bytes + sum(len(text) for text in self.text_lookup)
+
+    def with_recorder(self, recorder):
+        """
+        A view of this engine that shares its indexes, data and answer cache
+        but records its spans into recorder, e.g. one per UI session so
+        sessions sharing an engine don't see each other's questions.
+        """
+        view = copy.copy(self)
+        view.recorder = recorder
+        return view
+
+    def update_data(self, scenes, schedule, call_sheets=None):
+        """
+        Swap in new scenes/schedule, rebuilding the index and invalidating
+        cached answers. With index_dir set, only the entries of new or
+        revised scenes are re-encoded.
+        """
+        self.scenes = scenes
+        self.schedule = schedule
+        self.call_sheets = call_sheets
+        self._build_index()
 
     def query(self, question, top_k=5):
-        q_embedding = model.encode([question])
-        D, I = self.index.search(q_embedding, top_k)
+        with self.recorder.span("query") as span:
+            structured = self.structured_answer(question)
+            if structured is not None:
+                span.set(source="structured")
+                return structured
 
-        # Retrieve full context for the top-k results
-        retrieved_contexts = []
-        num_scenes = len(self.scenes)
-        
-        for idx in I[0]:
-            if idx < num_scenes:
+            q_embeddings, hits = self.retrieve([question], top_k)
+
+            cached = self.cached_answer(q_embeddings[0], hits[0])
+            if cached is not None:
+                span.set(source="cache")
+                return cached
+
+            span.set(source="llm")
+            prompt = self.prepare_prompt(question, hits[0])
+            with self.recorder.span("query/generate", prompt_tokens=estimate_tokens(prompt)) as gen_span:
+                answer = self._generate(prompt)
+                gen_span.set(answer_tokens=estimate_tokens(answer))
+            self.cache_answer(q_embeddings[0], hits[0], answer)
+            return answer
+
+    def query_stream(self, question, top_k=5):
+        """
+        Like query, but yield the answer piece by piece as the LLM produces
+        it, so the first tokens arrive right after retrieval. Spans leave
+        out the time the caller spends between tokens.
+        """
+        with self.recorder.span("query") as span:
+            structured = self.structured_answer(question)
+            if structured is not None:
+                span.set(source="structured")
+                with span.paused():
+                    yield structured
+                return
+
+            q_embeddings, hits = self.retrieve([question], top_k)
+
+            cached = self.cached_answer(q_embeddings[0], hits[0])
+            if cached is not None:
+                span.set(source="cache")
+                with span.paused():
+                    yield cached
+                return
+
+            span.set(source="llm")
+            prompt = self.prepare_prompt(question, hits[0])
+            tokens = []
+            with self.recorder.span("query/generate", prompt_tokens=estimate_tokens(prompt),
+                                    streamed=True) as gen_span:
+                start = time.perf_counter()
+                try:
+                    stream = get_llm_client().chat(
+                        model=LLM_MODEL,
+                        messages=[{"role": "user", "content": prompt}],
+                        stream=True
+                    )
+                    for chunk in stream:
+                        token = chunk['message']['content']
+                        if token:
+                            if not tokens:
+                                gen_span.set(first_token_seconds=time.perf_counter() - start)
+                            tokens.append(token)
+                            with span.paused(), gen_span.paused():
+                                yield token
+                except Exception as e:
+                    raise llm_error(e)
+                answer = "".join(tokens)
+                gen_span.set(answer_tokens=estimate_tokens(answer))
+            self.cache_answer(q_embeddings[0], hits[0], answer)
+
+    def query_many(self, questions, top_k=5, max_concurrency=DEFAULT_LLM_CONCURRENCY):
+        """
+        Answer several questions at once, returning answers in input order.
+
+        All questions are encoded in one batch and searched with a single
+        FAISS call; the LLM calls then run concurrently, at most
+        max_concurrency at a time (set OLLAMA_NUM_PARALLEL on the server to
+        let it actually generate in parallel).
+        """
+        questions = list(questions)
+        with self.recorder.span("query_many", questions=len(questions)) as span:
+            answers = self._query_many(questions, top_k, max_concurrency, span)
+        return answers
+
+    def _query_many(self, questions, top_k, max_concurrency, span):
+        answers = [self.structured_answer(question) for question in questions]
+        rag_positions = [i for i, answer in enumerate(answers) if answer is None]
+        span.set(structured=len(questions) - len(rag_positions))
+        if not rag_positions:
+            return answers
+
+        q_embeddings, hits = self.retrieve([questions[i] for i in rag_positions], top_k)
+
+        pending = []
+        for row, i in enumerate(rag_positions):
+            answers[i] = self.cached_answer(q_embeddings[row], hits[row])
+            if answers[i] is None:
+                pending.append((row, i))
+        span.set(cached=len(rag_positions) - len(pending))
+        prompts = [self.prepare_prompt(questions[i], hits[row]) for row, i in pending]
+
+        if prompts:
+            with self.recorder.span("query/generate", prompts=len(prompts),
+                                    prompt_tokens=sum(map(estimate_tokens, prompts))) as gen_span:
+                with ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts))) as pool:
+                    for (row, i), answer in zip(pending, pool.map(self._generate, prompts)):
+                        answers[i] = answer
+                        gen_span.add(answer_tokens=estimate_tokens(answer))
+                        self.cache_answer(q_embeddings[row], hits[row], answer)
+        return answers
+
+    # The steps of query(), public for callers that run them on their own
+    # schedule (e.g. query_service batches retrieve() across requests):
+    # structured_answer -> retrieve -> cached_answer -> prepare_prompt ->
+    # LLM -> cache_answer
+
+    def structured_answer(self, question):
+        """The fast-path answer to a lookup question, or None to go through RAG."""
+        if not self.fast_path or self.structured is None:
+            return None
+        return self.structured.answer(question)
+
+    def retrieve(self, questions, top_k=5):
+        """
+        Hybrid retrieval: dense FAISS and BM25 candidates merged with
+        reciprocal rank fusion. Returns the question embeddings and, per
+        question, up to top_k entry ids with at most one per scene/schedule row.
+        """
+        with self.recorder.span("query/encode", questions=len(questions)):
+            q_embeddings = get_embedding_model().encode(questions)
+        num_candidates = min(len(self.text_lookup), top_k * CANDIDATES_PER_RESULT)
+        with self.recorder.span("query/search", questions=len(questions), candidates=num_candidates):
+            D, I = self.index.search(q_embeddings, num_candidates)
+            hits = self._fuse(questions, I, num_candidates, top_k)
+        return q_embeddings, hits
+
+    def _fuse(self, questions, dense_ids, num_candidates, top_k):
+        """Merge each question's dense ids with its BM25 ranking."""
+        hits = []
+        for question, dense_row in zip(questions, dense_ids):
+            dense = [int(idx) for idx in dense_row if idx >= 0]
+            keyword = [doc_id for doc_id, _ in self.bm25.search(question, num_candidates)]
+
+            entry_ids, seen = [], set()
+            for entry_id in reciprocal_rank_fusion([dense, keyword]):
+                ref = self.entry_refs[entry_id]
+                if ref in seen:
+                    continue
+                seen.add(ref)
+                entry_ids.append(entry_id)
+                if len(entry_ids) == top_k:
+                    break
+            hits.append(entry_ids)
+        return hits
+
+    def cached_answer(self, q_embedding, indices):
+        """A stored answer for a similar question over the same entries, or None."""
+        if self.answer_cache is None:
+            return None
+        return self.answer_cache.lookup(q_embedding, indices)
+
+    def cache_answer(self, q_embedding, indices, answer):
+        """Store a generated answer for cached_answer to find."""
+        if self.answer_cache is not None:
+            self.answer_cache.store(q_embedding, indices, answer)
+
+    def _retrieve_contexts(self, entry_ids):
+        """
+        Retrieve and pack full context for the top-k results of one query.
+
+        Returns the packed context strings and their token usage as a dict
+        with 'tokens', 'passages' and 'dropped'.
+        """
+        passages = []
+        for entry_id in entry_ids:
+            kind, position = self.entry_refs[entry_id]
+            if kind == "scene":
                 # It's a scene - get full scene content
-                scene = self.scene_lookup[idx]
-                retrieved_contexts.append(self._scene_to_full_text(scene))
+                scene = self.scene_lookup[position]
+                text = self.scene_to_full_text(scene)
+                passage = {"kind": "scene", "scene": scene['scene_number'],
+                           "heading": scene['heading'], "text": text}
+                if self.entry_lines[entry_id] is not None:
+                    # Actions are the last lines of the text; if the scene
+                    # has to be cut, keep the chunk that matched
+                    start, end = self.entry_lines[entry_id]
+                    header_lines = text.count("\n") + 1 - len(scene.get('actions', []))
+                    passage["focus"] = (header_lines + start, header_lines + end - 1)
+                    passage["header_lines"] = header_lines
+                passages.append(passage)
             else:
                 # It's a schedule entry
-                schedule_idx = idx - num_scenes
-                if schedule_idx < len(self.schedule_lookup):
-                    entry = self.schedule_lookup[schedule_idx]
-                    retrieved_contexts.append(self._schedule_to_full_text(entry))
-        
+                entry = self.schedule_lookup[position]
+                passages.append({"kind": "schedule", "scene": entry.get('scene_number'),
+                                 "heading": entry['scene_heading'],
+                                 "text": self.schedule_to_full_text(entry),
+                                 "note": self.schedule_to_text(entry)})
+
+        packed = pack_context(passages, self.context_token_budget)
+        return packed["contexts"], {key: packed[key] for key in ("tokens", "passages", "dropped")}
+
+    def prepare_prompt(self, question, entry_ids):
+        """
+        Pack the retrieved context for entry_ids and build the prompt. Reads
+        scenes, so async callers should run it in a worker thread.
+        """
+        with self.recorder.span("query/prompt", entries=len(entry_ids)) as span:
+            contexts, context_stats = self._retrieve_contexts(entry_ids)
+            prompt = self._build_prompt(question, contexts)
+            span.set(context_tokens=context_stats["tokens"],
+                     context_passages=context_stats["passages"],
+                     dropped_passages=context_stats["dropped"],
+                     prompt_tokens=estimate_tokens(prompt))
+        return prompt
+
+    def _build_prompt(self, question, retrieved_contexts):
+        return self.format_prompt(self.script_summary, retrieved_contexts, question)
+
+    @staticmethod
+    def format_prompt(script_summary, retrieved_contexts, question):
         # Build comprehensive prompt with script understanding instructions
-        script_summary = self._get_script_summary()
-        
-        prompt = f"""You are an expert screenplay analyst. You have access to a parsed screenplay and its shooting schedule. 
+        return f"""You are an expert screenplay analyst. You have access to a parsed screenplay and its shooting schedule. 
 Your task is to answer questions about the script, characters, scenes, locations, and shooting schedule with deep understanding of the story and context.
 
 {script_summary}
@@ -121,17 +500,9 @@ Your task is to answer questions about the script, characters, scenes, locations
 
 === YOUR ANSWER ===
 """
-        
-        try:
-            response = client.chat(model='llama3.2', messages=[{"role": "user", "content": prompt}])
-            return response['message']['content']
-        except Exception as e:
-            if "not found" in str(e).lower() or "404" in str(e):
-                raise Exception(
-                    f"Model 'llama3.2' not found. Please run: ollama pull llama3.2\n"
-                    f"Original error: {str(e)}"
-                )
-            raise
+
+    def _generate(self, prompt):
+        return generate_answer(prompt)
     
     def _get_script_summary(self):
         """Generate a summary of the script for context."""
@@ -0,0 +1,102 @@
+# script_utils/revision.py
+
+import difflib
+import gzip
+import json
+import os
+
+from script_utils.atomic_io import atomic_open
+from script_utils.instrumentation import NULL_SPAN
+from script_utils.pdf_extractor import iter_pdf_pages, page_fingerprints
+from script_utils.stage_cache import fingerprint
+
+# Per-page content fingerprints and text of a pipeline run, so a later
+# draft only extracts the pages that changed. The only copy of the raw
+# page text in an output directory, so it is kept compressed.
+PAGES_FILE = "pages.json.gz"
+LEGACY_PAGES_FILE = "pages.json"
+
+# What a revision run reused and what it redid
+REVISION_FILE = "revision.json"
+
+
+def save_pages(output_dir, pages):
+    with atomic_open(os.path.join(output_dir, PAGES_FILE), "wb") as f:
+        f.write(gzip.compress(json.dumps(pages).encode("utf-8")))
+
+
+def load_pages(output_dir):
+    """The per-page records saved by a pipeline run, or [] if it has none."""
+    try:
+        with gzip.open(os.path.join(output_dir, PAGES_FILE), "rt", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+    # Runs before the pages were compressed
+    try:
+        with open(os.path.join(output_dir, LEGACY_PAGES_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+
+def extract_revised_pages(pdf_path, previous_pages=(), workers=None, span=NULL_SPAN):
+    """
+    Return one {'fingerprint', 'text'} record per page of the PDF.
+
+    Only pages whose content stream is not among previous_pages are
+    extracted; the text of unchanged pages is reused even when revision
+    pages were inserted or removed before them. Counts extracted pages on
+    span.
+    """
+    fingerprints = page_fingerprints(pdf_path)
+    known = {page["fingerprint"]: page["text"] for page in previous_pages}
+    changed = [number for number, page_fingerprint in enumerate(fingerprints)
+               if page_fingerprint not in known]
+
+    texts = {}
+    for number, text in iter_pdf_pages(pdf_path, workers=workers, page_numbers=changed):
+        span.add(pages=1)
+        texts[number] = text
+    span.set(reused_pages=len(fingerprints) - len(changed))
+    return [{"fingerprint": page_fingerprint,
+             "text": texts[number] if number in texts else known[page_fingerprint]}
+            for number, page_fingerprint in enumerate(fingerprints)]
+
+
+def changed_pages(pages, previous_pages):
+    """Positions of pages whose content is not in previous_pages."""
+    known = {page["fingerprint"] for page in previous_pages}
+    return [number for number, page in enumerate(pages) if page["fingerprint"] not in known]
+
+
+def scene_key(scene):
+    """Hash of a scene's content, independent of its position in the script."""
+    return fingerprint(scene["heading"], scene.get("characters", []), scene.get("actions", []))
+
+
+def diff_scenes(old_scenes, new_scenes):
+    """
+    Match the scenes of two drafts in story order.
+
+    Returns 'unchanged' and 'changed' lists of (old position, new position)
+    pairs, and 'removed' (old) and 'added' (new) lists of positions. A
+    changed scene is a new scene standing where an old one was rewritten.
+    """
+    matcher = difflib.SequenceMatcher(None, [scene_key(scene) for scene in old_scenes],
+                                      [scene_key(scene) for scene in new_scenes],
+                                      autojunk=False)
+    diff = {"unchanged": [], "changed": [], "removed": [], "added": []}
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            diff["unchanged"].extend(zip(range(i1, i2), range(j1, j2)))
+            continue
+        paired = min(i2 - i1, j2 - j1) if tag == "replace" else 0
+        diff["changed"].extend(zip(range(i1, i1 + paired), range(j1, j1 + paired)))
+        diff["removed"].extend(range(i1 + paired, i2))
+        diff["added"].extend(range(j1 + paired, j2))
+    return diff
+
+
+def diff_summary(diff):
+    return {kind: len(positions) for kind, positions in diff.items()}
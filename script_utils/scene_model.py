@@ -0,0 +1,236 @@
+# script_utils/scene_model.py
+
+import json
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+from itertools import accumulate
+
+from script_utils.atomic_io import atomic_open
+from script_utils.scene_store import SceneStore
+
+SCENES_JSON_FILE = "parsed_script.json"
+SCENES_BINARY_FILE = "parsed_script.bin"
+
+MAGIC = b"SCNT"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHIII")  # magic, version, scenes, strings, character refs
+
+SCENE_FIELDS = ("scene_number", "heading", "location", "time_of_day", "characters", "actions")
+
+
+class Scene(Mapping):
+    """
+    Read-only view of one row of a SceneTable.
+
+    Behaves like the parser's scene dict (scene["heading"],
+    scene.get("characters", [])), so existing code can use it unchanged.
+    """
+
+    __slots__ = ("_table", "_row", "_actions")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+        self._actions = None
+
+    @property
+    def scene_number(self):
+        return self._table.scene_numbers[self._row]
+
+    @property
+    def heading(self):
+        return self._table.strings[self._table.headings[self._row]]
+
+    @property
+    def location(self):
+        return self._table.strings[self._table.locations[self._row]]
+
+    @property
+    def time_of_day(self):
+        return self._table.strings[self._table.times_of_day[self._row]]
+
+    @property
+    def characters(self):
+        table = self._table
+        start, stop = table.character_offsets[self._row], table.character_offsets[self._row + 1]
+        return [table.strings[i] for i in table.character_ids[start:stop]]
+
+    @property
+    def actions(self):
+        # Split once per view; context building reads a scene's lines repeatedly
+        if self._actions is None:
+            text = self._table.strings[self._table.actions[self._row]]
+            self._actions = text.split("\n") if text else []
+        return self._actions
+
+    def __getitem__(self, key):
+        if key not in SCENE_FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(SCENE_FIELDS)
+
+    def __len__(self):
+        return len(SCENE_FIELDS)
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in SCENE_FIELDS}
+
+    def __repr__(self):
+        return f"Scene({self.scene_number}, {self.heading!r})"
+
+
+class SceneTable:
+    """
+    Columnar, compact storage for a parsed script.
+
+    Every string (headings, locations, times of day, character names and
+    each scene's action lines joined by newlines) is stored once in a shared
+    string table; per-scene columns are integer arrays of string ids, and
+    characters are a flat id array sliced by per-scene offsets. Indexing
+    returns Scene views, so a table can stand in for the list of scene dicts.
+    """
+
+    def __init__(self):
+        self.strings = []
+        self._string_ids = None  # built on first append; loading doesn't need it
+        self.scene_numbers = array("I")
+        self.headings = array("I")
+        self.locations = array("I")
+        self.times_of_day = array("I")
+        self.actions = array("I")
+        self.character_offsets = array("I", [0])
+        self.character_ids = array("I")
+
+    def _intern(self, value):
+        if self._string_ids is None:
+            self._string_ids = {string: i for i, string in enumerate(self.strings)}
+        string_id = self._string_ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self._string_ids[value] = string_id
+            self.strings.append(value)
+        return string_id
+
+    def append(self, scene):
+        """Add a scene dict (or Scene) as the last row."""
+        self.scene_numbers.append(scene["scene_number"])
+        self.headings.append(self._intern(scene["heading"]))
+        self.locations.append(self._intern(scene["location"]))
+        self.times_of_day.append(self._intern(scene["time_of_day"]))
+        self.actions.append(self._intern("\n".join(scene.get("actions", []))))
+        self.character_ids.extend(self._intern(c) for c in scene.get("characters", []))
+        self.character_offsets.append(len(self.character_ids))
+
+    @classmethod
+    def from_scenes(cls, scenes):
+        table = cls()
+        for scene in scenes:
+            table.append(scene)
+        return table
+
+    def to_scenes(self):
+        """The scenes as plain dicts, as produced by the parser."""
+        return [scene.to_dict() for scene in self]
+
+    def __len__(self):
+        return len(self.scene_numbers)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Scene(self, row) for row in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("scene index out of range")
+        return Scene(self, index)
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield Scene(self, row)
+
+    # Binary format: a fixed header, the string lengths, the integer columns
+    # and finally every string concatenated as one UTF-8 blob. Loading is a
+    # handful of array.frombytes calls plus one decode.
+
+    def _columns(self):
+        return (self.scene_numbers, self.headings, self.locations, self.times_of_day,
+                self.actions, self.character_offsets)
+
+    def to_bytes(self):
+        lengths = array("I", map(len, self.strings))
+        parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, len(self), len(self.strings),
+                              len(self.character_ids))]
+        for column in (lengths, *self._columns(), self.character_ids):
+            parts.append(_little_endian(column).tobytes())
+        parts.append("".join(self.strings).encode("utf-8"))
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, num_scenes, num_strings, num_character_refs = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a scene table file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported scene table version {version}")
+
+        view = memoryview(data)
+        offset = _HEADER.size
+
+        def read_column(count):
+            nonlocal offset
+            column = array("I")
+            end = offset + count * column.itemsize
+            column.frombytes(view[offset:end])
+            offset = end
+            return _little_endian(column)
+
+        table = cls()
+        lengths = read_column(num_strings)
+        (table.scene_numbers, table.headings, table.locations, table.times_of_day,
+         table.actions) = (read_column(num_scenes) for _ in range(5))
+        table.character_offsets = read_column(num_scenes + 1)
+        table.character_ids = read_column(num_character_refs)
+
+        blob = bytes(view[offset:]).decode("utf-8")
+        ends = list(accumulate(lengths))
+        table.strings = [blob[start:end] for start, end in zip([0] + ends, ends)]
+        return table
+
+    def save(self, path):
+        """Write the binary form to path, replacing it atomically."""
+        with atomic_open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def _little_endian(column):
+    # Files are little-endian; swap on big-endian hosts (a copy on write)
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+def load_scenes(output_dir="output"):
+    """
+    Load a pipeline run's scenes into a SceneTable: from its binary file,
+    else from its scene store or parsed_script.json (runs that wrote no
+    binary file).
+    """
+    binary_path = os.path.join(output_dir, SCENES_BINARY_FILE)
+    if os.path.exists(binary_path):
+        return SceneTable.load(binary_path)
+    if SceneStore.exists(output_dir):
+        with SceneStore(output_dir) as store:
+            return SceneTable.from_scenes(store)
+    with open(os.path.join(output_dir, SCENES_JSON_FILE), encoding="utf-8") as f:
+        return SceneTable.from_scenes(json.load(f))
@@ -0,0 +1,121 @@
+# script_utils/scene_store.py
+
+import json
+import mmap
+import os
+import threading
+
+from script_utils.atomic_io import atomic_open, write_json_atomically
+
+SCENE_STORE_FILE = "scenes.jsonl"
+SCENE_INDEX_FILE = "scenes.index.json"
+
+# Per-scene fields kept in the index, i.e. everything except the action lines
+METADATA_FIELDS = ("scene_number", "heading", "location", "time_of_day", "characters")
+
+
+class SceneStore:
+    """
+    Random-access, read-only scene storage for a pipeline run.
+
+    Scenes are stored one JSON object per line in scenes.jsonl; a small
+    index file holds each line's byte offset plus every scene's metadata
+    (number, heading, location, time of day, characters). Opening a store
+    reads only the index; a scene's action lines are read from the
+    memory-mapped JSONL file when that scene is requested.
+
+    Indexing and iteration yield scene dicts, so a store can be passed
+    wherever a list of scenes is expected (e.g. RAGSearchEngine).
+    """
+
+    def __init__(self, output_dir="output"):
+        self.output_dir = output_dir
+        with open(os.path.join(output_dir, SCENE_INDEX_FILE), encoding="utf-8") as f:
+            index = json.load(f)
+        self.offsets = index["offsets"]  # len(scenes) + 1 entries
+        self.metadata = index["metadata"]
+        self._positions = {meta["scene_number"]: i for i, meta in enumerate(self.metadata)}
+        self._heading_positions = {}
+        for i, meta in enumerate(self.metadata):
+            self._heading_positions.setdefault(meta["heading"], i)
+        self._file = None
+        self._map = None
+        self._open_lock = threading.Lock()
+
+    @staticmethod
+    def exists(output_dir="output"):
+        return (os.path.exists(os.path.join(output_dir, SCENE_STORE_FILE))
+                and os.path.exists(os.path.join(output_dir, SCENE_INDEX_FILE)))
+
+    @classmethod
+    def write(cls, scenes, output_dir="output"):
+        """Write scenes as a store in output_dir and return it opened."""
+        offsets = [0]
+        metadata = []
+        with atomic_open(os.path.join(output_dir, SCENE_STORE_FILE), "wb") as f:
+            for scene in scenes:
+                line = json.dumps(dict(scene), ensure_ascii=False).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+                metadata.append({field: scene[field] for field in METADATA_FIELDS})
+        # Data first, then the index that points into it
+        write_json_atomically(os.path.join(output_dir, SCENE_INDEX_FILE),
+                              {"offsets": offsets, "metadata": metadata})
+        return cls(output_dir)
+
+    def _data(self):
+        if self._map is not None:
+            return self._map
+        with self._open_lock:
+            if self._map is None:
+                self._open()
+        return self._map
+
+    def _open(self):
+        self._file = open(os.path.join(self.output_dir, SCENE_STORE_FILE), "rb")
+        if self.offsets[-1] == 0:
+            self._map = b""  # mmap can't map an empty file
+        else:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _read(self, position):
+        return json.loads(self._data()[self.offsets[position]:self.offsets[position + 1]])
+
+    def __len__(self):
+        return len(self.metadata)
+
+    def __getitem__(self, index):
+        """Scene dict at a position; a slice reads only the scenes it covers."""
+        if isinstance(index, slice):
+            return [self._read(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("scene index out of range")
+        return self._read(index)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self._read(position)
+
+    def get(self, scene_number):
+        """Scene dict by scene number, or None if there is no such scene."""
+        position = self._positions.get(scene_number)
+        return None if position is None else self._read(position)
+
+    def position_of_heading(self, heading):
+        """Position of the first scene with this heading, or None."""
+        return self._heading_positions.get(heading)
+
+    def close(self):
+        if self._map is not None and not isinstance(self._map, bytes):
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,293 @@
+# script_utils/schedule_optimizer.py
+
+import math
+import random
+from collections import Counter, defaultdict
+
+from script_utils.scheduler import extract_scene_root, format_minutes, parse_minutes, scene_durations
+
+# Local-search moves tried at most; a run depends only on its inputs and
+# seed, so cached schedules are reproducible
+DEFAULT_MAX_ITERATIONS = 100_000
+DEFAULT_MEAL_AFTER_HOURS = 6
+DEFAULT_MEAL_HOURS = 1
+
+# Relative cost of calling one cast member for a day, of one company move
+# between locations within a day, and of one extra shooting day
+CAST_DAY_WEIGHT = 1.0
+LOCATION_CHANGE_WEIGHT = 2.0
+DAY_WEIGHT = 4.0
+
+# Simulated-annealing temperature, decayed linearly over max_iterations
+START_TEMPERATURE = 1.0
+END_TEMPERATURE = 0.01
+
+
+class _Day:
+    __slots__ = ("number", "scenes", "hours", "cast", "locations")
+
+    def __init__(self, number):
+        self.number = number
+        self.scenes = set()
+        self.hours = 0
+        self.cast = Counter()
+        self.locations = Counter()
+
+    def cost(self):
+        if not self.scenes:
+            return 0.0
+        return (CAST_DAY_WEIGHT * len(self.cast)
+                + LOCATION_CHANGE_WEIGHT * (len(self.locations) - 1)
+                + DAY_WEIGHT)
+
+
+class _Optimizer:
+    def __init__(self, scenes, max_hours_per_day, meal_after_hours, meal_hours,
+                 actor_availability, seed, duration_model):
+        self.scenes = scenes
+        self.max_hours_per_day = max_hours_per_day
+        self.meal_after_hours = meal_after_hours
+        self.meal_hours = meal_hours
+        self.rng = random.Random(seed)
+
+        self.durations = scene_durations(scenes, duration_model)
+        self.roots = [int(extract_scene_root(s["heading"])) for s in scenes]
+        self.cast = [tuple(dict.fromkeys(s["characters"])) for s in scenes]
+        self.allowed = [self._allowed_days(cast, actor_availability) for cast in self.cast]
+
+        self.days = {}
+        self.assignment = [None] * len(scenes)
+        self.location_days = defaultdict(Counter)   # location -> day -> scene count
+        self.character_days = defaultdict(Counter)  # character -> day -> scene count
+
+    @staticmethod
+    def _allowed_days(cast, actor_availability):
+        allowed = None
+        for character in cast:
+            days = actor_availability.get(character)
+            if days is not None:
+                allowed = set(days) if allowed is None else allowed & set(days)
+        return allowed
+
+    def day_length(self, work_hours):
+        meal = self.meal_hours if work_hours > self.meal_after_hours else 0
+        return work_hours + meal
+
+    def fits(self, day, i, freed_hours=0):
+        allowed = self.allowed[i]
+        if allowed is not None and day.number not in allowed:
+            return False
+        hours = day.hours - freed_hours + self.durations[i]
+        # A scene longer than a whole day still gets a day of its own
+        return self.day_length(hours) <= self.max_hours_per_day or hours == self.durations[i]
+
+    def _day(self, number):
+        if number not in self.days:
+            self.days[number] = _Day(number)
+        return self.days[number]
+
+    def _place(self, i, day):
+        location = self.scenes[i]["location"]
+        day.scenes.add(i)
+        day.hours += self.durations[i]
+        day.locations[location] += 1
+        self.location_days[location][day.number] += 1
+        for character in self.cast[i]:
+            day.cast[character] += 1
+            self.character_days[character][day.number] += 1
+        self.assignment[i] = day.number
+
+    def _unplace(self, i, day):
+        location = self.scenes[i]["location"]
+        day.scenes.discard(i)
+        day.hours -= self.durations[i]
+        _decrement(day.locations, location)
+        _decrement(self.location_days[location], day.number)
+        for character in self.cast[i]:
+            _decrement(day.cast, character)
+            _decrement(self.character_days[character], day.number)
+
+    def move(self, i, target):
+        """Move scene i to day target, returning the change in total cost."""
+        source = self.days[self.assignment[i]]
+        before = source.cost() + target.cost()
+        self._unplace(i, source)
+        self._place(i, target)
+        return source.cost() + target.cost() - before
+
+    def seed(self):
+        """Greedy seed: walk scenes grouped by location, next-fit into days."""
+        order = sorted(range(len(self.scenes)),
+                       key=lambda i: (self.scenes[i]["location"], self.roots[i], i))
+        current = None
+        next_number = 1
+        for i in order:
+            if current is not None and self.fits(current, i):
+                self._place(i, current)
+                continue
+            allowed = self.allowed[i]
+            if allowed is None:
+                current = self._day(next_number)
+                next_number += 1
+                self._place(i, current)
+                continue
+            # Constrained scene: first allowed day with room, else a new allowed day
+            for number in sorted(allowed):
+                day = self.days.get(number)
+                if day is None or self.fits(day, i):
+                    day = self._day(number)
+                    self._place(i, day)
+                    next_number = max(next_number, number + 1)
+                    break
+            else:
+                raise ValueError(
+                    f"Cannot schedule '{self.scenes[i]['heading']}': no day within its cast's "
+                    f"availability has room for it"
+                )
+
+    def _candidate_day(self, i):
+        roll = self.rng.random()
+        if roll < 0.45:
+            related = self.location_days[self.scenes[i]["location"]]
+        elif roll < 0.9 and self.cast[i]:
+            related = self.character_days[self.rng.choice(self.cast[i])]
+        else:
+            related = self.days
+        if not related:
+            return None
+        return self.days[self.rng.choice(tuple(related))]
+
+    def total_cost(self):
+        return sum(day.cost() for day in self.days.values())
+
+    def improve(self, max_iterations):
+        """Local search: relocate and swap moves, annealed acceptance, keep the best."""
+        n = len(self.scenes)
+        if n < 2:
+            return
+        cost = best_cost = self.total_cost()
+        best_assignment = list(self.assignment)
+        patience = max(20000, 50 * n)
+        # Stalls while still hot are expected; only give up once cooling
+        cooling_from = max_iterations // 2
+        last_best = 0
+
+        for iteration in range(max_iterations):
+            if iteration % 256 == 0:
+                if iteration - max(last_best, cooling_from) >= patience:
+                    break
+                progress = iteration / max_iterations
+                temperature = START_TEMPERATURE + (END_TEMPERATURE - START_TEMPERATURE) * progress
+
+            i = self.rng.randrange(n)
+            source = self.days[self.assignment[i]]
+            target = self._candidate_day(i)
+            if target is None or target is source:
+                continue
+
+            if self.fits(target, i):
+                delta = self.move(i, target)
+                undo = [(i, source)]
+            else:
+                if not target.scenes:
+                    continue
+                j = self.rng.choice(tuple(target.scenes))
+                if not (self.fits(target, i, freed_hours=self.durations[j])
+                        and self.fits(source, j, freed_hours=self.durations[i])):
+                    continue
+                delta = self.move(i, target) + self.move(j, source)
+                undo = [(j, target), (i, source)]
+
+            if delta <= 0 or self.rng.random() < math.exp(-delta / temperature):
+                cost += delta
+                if cost < best_cost - 1e-9:
+                    best_cost = cost
+                    best_assignment = list(self.assignment)
+                    last_best = iteration
+            else:
+                for k, day in undo:
+                    self.move(k, day)
+
+        self._restore(best_assignment)
+
+    def _restore(self, assignment):
+        self.days = {}
+        self.location_days.clear()
+        self.character_days.clear()
+        for i, number in enumerate(assignment):
+            self._place(i, self._day(number))
+
+    def to_schedule(self, start_time, renumber):
+        days = [day for day in self.days.values() if day.scenes]
+        if renumber:
+            # Without availability constraints day numbers are free: keep story order
+            days.sort(key=lambda day: min(self.roots[i] for i in day.scenes))
+        else:
+            days.sort(key=lambda day: day.number)
+
+        schedule = []
+        for position, day in enumerate(days, start=1):
+            number = position if renumber else day.number
+
+            # Shoot each location in one block, locations in story order
+            first_root = {}
+            for i in day.scenes:
+                location = self.scenes[i]["location"]
+                first_root[location] = min(first_root.get(location, self.roots[i]), self.roots[i])
+            order = sorted(day.scenes, key=lambda i: (first_root[self.scenes[i]["location"]],
+                                                      self.scenes[i]["location"], self.roots[i], i))
+
+            minutes = parse_minutes(start_time)
+            worked = 0
+            had_meal = False
+            for i in order:
+                duration = self.durations[i]
+                if not had_meal and worked > 0 and worked + duration > self.meal_after_hours:
+                    minutes += self.meal_hours * 60
+                    had_meal = True
+                scene = self.scenes[i]
+                schedule.append({
+                    "day": number,
+                    "start_time": format_minutes(minutes),
+                    "scene_number": scene["scene_number"],
+                    "scene_heading": scene["heading"],
+                    "location": scene["location"],
+                    "time_of_day": scene["time_of_day"],
+                    "characters": scene["characters"],
+                    "estimated_duration": f"{duration} hour(s)"
+                })
+                minutes += duration * 60
+                worked += duration
+        return schedule
+
+
+def _decrement(counter, key):
+    counter[key] -= 1
+    if counter[key] <= 0:
+        del counter[key]
+
+
+def optimize_schedule(scenes, start_time="08:00", max_hours_per_day=10,
+                      meal_after_hours=DEFAULT_MEAL_AFTER_HOURS, meal_hours=DEFAULT_MEAL_HOURS,
+                      actor_availability=None, max_iterations=DEFAULT_MAX_ITERATIONS, seed=0,
+                      duration_model="cast_size"):
+    """
+    Schedule scenes to minimise cast-days and location changes.
+
+    A greedy seed groups scenes by location; local search then relocates and
+    swaps scenes between days for up to max_iterations moves, stopping
+    early once it stops improving. The search draws from random.Random(seed)
+    and never reads the clock, so the same inputs give the same schedule.
+    Constraints: a day's work plus its meal break fits in max_hours_per_day,
+    a meal of meal_hours is taken before work would exceed meal_after_hours,
+    and a scene only lands on days every cast member in it is available
+    (actor_availability maps character -> allowed day numbers).
+
+    Returns entries in the same schema as generate_schedule.
+    """
+    actor_availability = actor_availability or {}
+    optimizer = _Optimizer(scenes, max_hours_per_day, meal_after_hours, meal_hours,
+                           actor_availability, seed, duration_model)
+    optimizer.seed()
+    optimizer.improve(max_iterations)
+    return optimizer.to_schedule(start_time, renumber=not actor_availability)
@@ -0,0 +1,171 @@
+# script_utils/schedule_sweep.py
+
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from script_utils.scheduler import (
+    DURATION_MODELS,
+    assign_slots,
+    group_and_sort_scenes,
+    parse_minutes,
+    scene_durations,
+)
+
+# Hours per day after which time counts as overtime
+DEFAULT_OVERTIME_AFTER_HOURS = 8
+
+DEFAULT_GRID = {
+    "max_hours_per_day": [10],
+    "start_time": ["08:00"],
+    "meal_time": ["13:00"],
+    "duration_model": ["cast_size"],
+}
+
+# Scene table of the current worker process, set once by _init_worker
+_TABLE = None
+
+
+def build_scene_table(scenes):
+    """
+    Precompute everything a greedy schedule variant needs: the scenes in
+    shooting order, their cast and their duration under every model.
+    """
+    ordered = [scene for _, scene_list in group_and_sort_scenes(scenes) for scene in scene_list]
+    return {
+        "scenes": scenes,
+        "cast": [frozenset(scene["characters"]) for scene in ordered],
+        "durations": {model: scene_durations(ordered, model) for model in DURATION_MODELS},
+    }
+
+
+def evaluate_variant(table, params, overtime_after_hours=DEFAULT_OVERTIME_AFTER_HOURS):
+    """Schedule one parameter set against a scene table and return its metrics."""
+    params = {**{key: values[0] for key, values in DEFAULT_GRID.items()}, **params}
+    durations = table["durations"][params["duration_model"]]
+
+    if params.get("mode", "greedy") == "optimize":
+        from script_utils.schedule_optimizer import optimize_schedule
+        schedule = optimize_schedule(table["scenes"], start_time=params["start_time"],
+                                     max_hours_per_day=params["max_hours_per_day"],
+                                     duration_model=params["duration_model"])
+        slots = [(item["day"], parse_minutes(item["start_time"])) for item in schedule]
+        cast = [frozenset(item["characters"]) for item in schedule]
+        durations = [int(item["estimated_duration"].split()[0]) for item in schedule]
+    else:
+        slots = assign_slots(durations, params["start_time"], params["max_hours_per_day"],
+                             params["meal_time"])
+        cast = table["cast"]
+
+    cast_by_day = {}
+    day_bounds = {}
+    for (day, start), duration, scene_cast in zip(slots, durations, cast):
+        cast_by_day.setdefault(day, set()).update(scene_cast)
+        first, _ = day_bounds.get(day, (start, start))
+        day_bounds[day] = (first, start + duration * 60)
+
+    overtime_hours = sum(max(0.0, (end - first) / 60 - overtime_after_hours)
+                         for first, end in day_bounds.values())
+    return {
+        **params,
+        "total_days": len(cast_by_day),
+        "cast_days": sum(len(c) for c in cast_by_day.values()),
+        "overtime_hours": overtime_hours,
+    }
+
+
+def _init_worker(table):
+    global _TABLE
+    _TABLE = table
+
+
+def _evaluate_in_worker(params, overtime_after_hours):
+    return evaluate_variant(_TABLE, params, overtime_after_hours)
+
+
+def expand_grid(grid):
+    """All combinations of a {parameter: [values]} grid, as a list of dicts."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def sweep_schedules(scenes, grid, workers=None, overtime_after_hours=DEFAULT_OVERTIME_AFTER_HOURS):
+    """
+    Evaluate every combination in grid and return one metrics row per
+    variant, in grid order.
+
+    grid maps generate_schedule parameters (max_hours_per_day, start_time,
+    meal_time, duration_model, mode) to lists of values. The scene table is
+    built once and handed to each worker process when it starts.
+    """
+    variants = expand_grid(grid)
+    table = build_scene_table(scenes)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(variants))
+
+    if workers <= 1:
+        return [evaluate_variant(table, params, overtime_after_hours) for params in variants]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(table,)) as pool:
+        chunksize = max(1, len(variants) // (workers * 4))
+        return list(pool.map(_evaluate_in_worker, variants,
+                             [overtime_after_hours] * len(variants), chunksize=chunksize))
+
+
+def format_table(rows):
+    """Render sweep rows as a fixed-width comparison table."""
+    if not rows:
+        return ""
+    columns = list(rows[0])
+    cells = [[_format_cell(row[c]) for c in columns] for row in rows]
+    widths = [max(len(c), *(len(r[i]) for r in cells)) for i, c in enumerate(columns)]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths)),
+             "  ".join("-" * w for w in widths)]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(r, widths)) for r in cells]
+    return "\n".join(lines)
+
+
+def _format_cell(value):
+    if isinstance(value, float):
+        return f"{value:.1f}"
+    return str(value)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Compare shooting schedules across scheduling parameters.")
+    parser.add_argument("scenes", nargs="?", default="output/parsed_script.json",
+                        help="Parsed script JSON")
+    parser.add_argument("--max-hours", type=int, nargs="+", default=DEFAULT_GRID["max_hours_per_day"])
+    parser.add_argument("--start-time", nargs="+", default=DEFAULT_GRID["start_time"])
+    parser.add_argument("--meal-time", nargs="+", default=DEFAULT_GRID["meal_time"],
+                        help="HH:MM, or 'none' for no meal break")
+    parser.add_argument("--duration-model", nargs="+", default=DEFAULT_GRID["duration_model"],
+                        choices=sorted(DURATION_MODELS))
+    parser.add_argument("--mode", nargs="+", default=["greedy"], choices=["greedy", "optimize"])
+    parser.add_argument("--overtime-after", type=float, default=DEFAULT_OVERTIME_AFTER_HOURS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--json", dest="json_path", help="Also write the rows to this JSON file")
+    args = parser.parse_args()
+
+    with open(args.scenes, encoding="utf-8") as f:
+        scenes = json.load(f)
+
+    grid = {
+        "max_hours_per_day": args.max_hours,
+        "start_time": args.start_time,
+        "meal_time": [None if m.lower() == "none" else m for m in args.meal_time],
+        "duration_model": args.duration_model,
+        "mode": args.mode,
+    }
+    rows = sweep_schedules(scenes, grid, workers=args.workers,
+                           overtime_after_hours=args.overtime_after)
+    print(format_table(rows))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
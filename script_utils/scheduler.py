@@ -1,6 +1,6 @@
 import re
-from datetime import datetime, timedelta
-from collections import defaultdict
+from collections import defaultdict, deque
+from itertools import count
 
 def extract_scene_root(heading):
     # Extract the root number from scene heading, e.g., "2A", "2B" → "2"
@@ -18,38 +18,170 @@ def group_and_sort_scenes(scenes):
     sorted_groups = sorted(grouped.items(), key=lambda k: (int(k[0][0]), k[0][1], k[0][2]))
     return sorted_groups
 
-def generate_schedule(scenes):
-    grouped_scenes = group_and_sort_scenes(scenes)
-    schedule = []
-    current_day = 1
-    current_time = datetime.strptime("08:00", "%H:%M")
+def estimate_duration_hours(scene):
+    return 2 if len(scene["characters"]) > 2 else 1
+
+# Ways of estimating how many hours a scene takes to shoot
+DURATION_MODELS = {
+    # 2 hours for scenes with more than two characters, else 1
+    "cast_size": estimate_duration_hours,
+    "flat": lambda scene: 1,
+    # An extra hour for every two characters
+    "per_character": lambda scene: 1 + len(scene["characters"]) // 2,
+    # About an hour per 40 lines of action/dialogue
+    "script_length": lambda scene: max(1, -(-len(scene.get("actions", [])) // 40)),
+}
+
+def scene_durations(scenes, duration_model="cast_size"):
+    try:
+        estimate = DURATION_MODELS[duration_model]
+    except KeyError:
+        raise ValueError(
+            f"Unknown duration model {duration_model!r}; use one of {sorted(DURATION_MODELS)}"
+        )
+    return [estimate(scene) for scene in scenes]
+
+def parse_minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+def format_minutes(minutes):
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+def assign_slots(durations, start_time="08:00", max_hours_per_day=10, meal_time="13:00"):
+    """
+    Yield (day, start minute) for scenes of the given durations, in order.
+
+    Days start at start_time; a one-hour meal is taken whenever a scene
+    would start exactly at meal_time (None for no meal), and it counts
+    toward the day's hours. A scene that would push the day past
+    max_hours_per_day starts the next day.
+    """
+    start_minutes = parse_minutes(start_time)
+    meal_minutes = parse_minutes(meal_time) if meal_time else None
+    day = 1
+    current = start_minutes
     hours_today = 0
-    max_hours_per_day = 10
-
-    for (scene_root, location, time_of_day), scene_list in grouped_scenes:
-        for scene in scene_list:
-            duration_hours = 2 if len(scene["characters"]) > 2 else 1
-
-            if current_time.strftime("%H:%M") == "13:00":
-                current_time += timedelta(hours=1)
-                hours_today += 1
-
-            if hours_today + duration_hours > max_hours_per_day:
-                current_day += 1
-                current_time = datetime.strptime("08:00", "%H:%M")
-                hours_today = 0
-
-            schedule.append({
-                "day": current_day,
-                "start_time": current_time.strftime("%H:%M"),
-                "scene_heading": scene["heading"],
-                "location": scene["location"],
-                "time_of_day": scene["time_of_day"],
-                "characters": scene["characters"],
-                "estimated_duration": f"{duration_hours} hour(s)"
-            })
-
-            current_time += timedelta(hours=duration_hours)
-            hours_today += duration_hours
 
+    for duration_hours in durations:
+        if meal_minutes is not None and current % (24 * 60) == meal_minutes:
+            current += 60
+            hours_today += 1
+
+        if hours_today + duration_hours > max_hours_per_day:
+            day += 1
+            current = start_minutes
+            hours_today = 0
+
+        yield day, current
+
+        current += duration_hours * 60
+        hours_today += duration_hours
+
+def schedule_metrics(schedule):
+    """Cost measures of a schedule: shooting days, cast-days and location changes."""
+    cast_by_day = defaultdict(set)
+    locations_by_day = defaultdict(list)
+    for item in schedule:
+        cast_by_day[item["day"]].update(item["characters"])
+        locations = locations_by_day[item["day"]]
+        if not locations or locations[-1] != item["location"]:
+            locations.append(item["location"])
+
+    return {
+        "days": len(cast_by_day),
+        "cast_days": sum(len(cast) for cast in cast_by_day.values()),
+        "location_changes": sum(len(locations) - 1 for locations in locations_by_day.values()),
+    }
+
+def generate_schedule(scenes, start_time="08:00", max_hours_per_day=10, meal_time="13:00",
+                      mode="greedy", duration_model="cast_size", **optimizer_options):
+    """
+    Build a shooting schedule.
+
+    mode="greedy" (default) fills days in story order. mode="optimize" hands
+    off to schedule_optimizer.optimize_schedule, which minimises cast-days
+    and location changes under day-length, meal-break and actor-availability
+    constraints; optimizer_options are passed through to it (meal_time is
+    not used there, meals follow meal_after_hours instead).
+    duration_model names an entry of DURATION_MODELS.
+    """
+    if mode == "optimize":
+        from script_utils.schedule_optimizer import optimize_schedule
+        return optimize_schedule(scenes, start_time=start_time,
+                                 max_hours_per_day=max_hours_per_day,
+                                 duration_model=duration_model, **optimizer_options)
+    if mode != "greedy":
+        raise ValueError(f"Unknown scheduling mode {mode!r}; use 'greedy' or 'optimize'")
+
+    ordered_scenes = [scene for _, scene_list in group_and_sort_scenes(scenes) for scene in scene_list]
+    durations = scene_durations(ordered_scenes, duration_model)
+
+    schedule = []
+    for scene, duration_hours, (day, start_minutes) in zip(
+            ordered_scenes, durations,
+            assign_slots(durations, start_time, max_hours_per_day, meal_time)):
+        schedule.append({
+            "day": day,
+            "start_time": format_minutes(start_minutes),
+            "scene_number": scene["scene_number"],
+            "scene_heading": scene["heading"],
+            "location": scene["location"],
+            "time_of_day": scene["time_of_day"],
+            "characters": scene["characters"],
+            "estimated_duration": f"{duration_hours} hour(s)"
+        })
+
+    return schedule
+
+def reschedule(previous_schedule, previous_scenes, scenes, matches, locked_days,
+               **schedule_options):
+    """
+    Schedule a revised script without disturbing locked days.
+
+    matches pairs positions in previous_scenes with positions in scenes for
+    scenes that survived the revision (revision.diff_scenes' 'unchanged'
+    and 'changed' pairs). Entries of previous_schedule on locked_days keep
+    their day, start time and duration while their scene survives; cast,
+    location and time of day are refreshed from the revised scene. Every
+    other scene is scheduled with generate_schedule(**schedule_options)
+    onto the day numbers that are not locked, in order.
+    """
+    locked_days = set(locked_days)
+    new_positions = dict(matches)
+    old_positions = {scene["scene_number"]: i for i, scene in enumerate(previous_scenes)}
+    # Schedules written before entries carried scene numbers: the n-th entry
+    # for a heading is the n-th scene with that heading
+    by_heading = defaultdict(deque)
+    for position, scene in enumerate(previous_scenes):
+        by_heading[scene["heading"]].append(position)
+
+    schedule = []
+    kept = set()
+    for entry in previous_schedule:
+        if "scene_number" in entry:
+            old_position = old_positions.get(entry["scene_number"])
+        else:
+            queue = by_heading[entry["scene_heading"]]
+            old_position = queue.popleft() if queue else None
+        position = new_positions.get(old_position)
+        if entry["day"] not in locked_days or position is None:
+            continue
+        kept.add(position)
+        scene = scenes[position]
+        schedule.append({**entry, "scene_number": scene["scene_number"],
+                         "scene_heading": scene["heading"],
+                         "location": scene["location"],
+                         "time_of_day": scene["time_of_day"],
+                         "characters": scene["characters"]})
+
+    remaining = [scene for position, scene in enumerate(scenes) if position not in kept]
+    rescheduled = generate_schedule(remaining, **schedule_options)
+    free_days = (day for day in count(1) if day not in locked_days)
+    day_numbers = {day: next(free_days) for day in sorted({item["day"] for item in rescheduled})}
+    for entry in rescheduled:
+        entry["day"] = day_numbers[entry["day"]]
+
+    schedule.extend(rescheduled)
+    schedule.sort(key=lambda item: (item["day"], parse_minutes(item["start_time"])))
     return schedule
@@ -0,0 +1,94 @@
+# script_utils/script_cache.py
+
+import threading
+from collections import OrderedDict
+
+from script_utils.job_runner import FAILED
+from script_utils.stage_cache import hash_bytes
+
+DEFAULT_MAX_ENTRIES = 8
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class ScriptCache:
+    """
+    Processed scripts shared by every session of a server, keyed by the
+    sha256 of the PDF bytes.
+
+    The first upload of a script submits a background job to the runner;
+    later uploads of the same bytes, from any session, get that same job,
+    whether it is still running or done. prepare(job, result) runs on the
+    worker after the pipeline (e.g. to build a RAG engine) and its return
+    value is what the job yields.
+
+    Finished entries are evicted least recently used first once there are
+    more than max_entries, or once their sizeof(value) total exceeds
+    max_bytes; the runner forgets evicted jobs and prunes their output
+    directories (see JobRunner.max_kept_jobs). Jobs still running are never
+    evicted; failed jobs are retried on the next request.
+    """
+
+    def __init__(self, runner, prepare=None, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, sizeof=None):
+        self.runner = runner
+        self.prepare = prepare
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self._jobs = OrderedDict()  # script hash -> Job, least recently used first
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(pdf_bytes):
+        return hash_bytes(pdf_bytes)
+
+    def get(self, key):
+        """The job for a script hash, or None."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                self._jobs.move_to_end(key)
+            return job
+
+    def get_or_submit(self, pdf_bytes, name=None, **options):
+        """Return the job processing these bytes, starting one if needed."""
+        key = self.key_for(pdf_bytes)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != FAILED:
+                self._jobs.move_to_end(key)
+                return job
+            job = self.runner.submit(pdf_bytes=pdf_bytes, name=name, then=self.prepare,
+                                     **options)
+            self._jobs[key] = job
+        job.future.add_done_callback(lambda _: self._evict())
+        return job
+
+    def _entry_bytes(self, job):
+        if self.sizeof is None or job.future.exception() is not None:
+            return 0
+        return self.sizeof(job.future.result())
+
+    def _evict(self):
+        evicted = False
+        with self._lock:
+            finished = [(key, job) for key, job in self._jobs.items() if job.future.done()]
+            sizes = {key: self._entry_bytes(job) for key, job in finished}
+            total = sum(sizes.values())
+            for key, job in finished:
+                if len(self._jobs) <= self.max_entries and total <= self.max_bytes:
+                    break
+                del self._jobs[key]
+                self.runner.forget(job.id)
+                total -= sizes[key]
+                evicted = True
+        if evicted:
+            self.runner.prune()
+
+    def jobs(self):
+        """The cached jobs, least recently used first."""
+        with self._lock:
+            return list(self._jobs.values())
+
+    def __len__(self):
+        return len(self._jobs)
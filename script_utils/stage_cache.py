@@ -0,0 +1,109 @@
+# script_utils/stage_cache.py
+
+import hashlib
+import json
+import os
+from collections.abc import Mapping
+
+from script_utils.atomic_io import write_json_atomically
+
+# Bump a stage's version whenever its output for the same input changes,
+# so stale cache entries are never served.
+STAGE_VERSIONS = {
+    "text": 2,
+    "scenes": 1,
+    "tags": 1,
+    "schedule": 3,
+    "call_sheets": 3,
+}
+
+DEFAULT_CACHE_DIR = ".pipeline_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+def hash_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _json_default(value):
+    # Scene views and tables hash the same as the dicts and lists they replace
+    if isinstance(value, Mapping):
+        return dict(value)
+    if hasattr(value, "__iter__") and not isinstance(value, (str, bytes)):
+        return list(value)
+    return str(value)
+
+
+def fingerprint(*parts):
+    """Stable hash of JSON-serialisable parts (config dicts, versions, parent keys)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=_json_default).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def stage_key(stage, parent_key, config=None):
+    """Key for a stage: its parent's key, its own version and its config."""
+    return fingerprint(stage, STAGE_VERSIONS[stage], parent_key, config or {})
+
+
+class StageCache:
+    """
+    On-disk cache of pipeline stage outputs, one JSON file per entry.
+
+    Entries are content-addressed, so they never need invalidating; the
+    directory is kept under max_bytes by evicting least recently used files
+    (a hit refreshes the file's mtime).
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, f"{stage}-{key}.json")
+
+    def get(self, stage, key):
+        """Return the cached value, or None on a miss."""
+        path = self._path(stage, key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, stage, key, value):
+        # Readers never see a partial entry
+        write_json_atomically(self._path(stage, key), value)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, file_name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
@@ -0,0 +1,208 @@
+# script_utils/structured_index.py
+
+import re
+from collections import defaultdict
+
+from script_utils.call_sheet_generator import generate_call_sheets
+from script_utils.parser import base_character_name, is_character_name
+
+TIMES_OF_DAY = ("DAY", "NIGHT", "EVENING", "MORNING", "DAWN", "DUSK")
+
+DAY_NUMBER_RE = re.compile(r"\bday\s*#?\s*(\d+)\b", re.IGNORECASE)
+DAY_QUESTION_RE = re.compile(
+    r"\b(call\s*sheet|who|actors?|cast|needed|scheduled|shoot(?:ing)?|shot|film(?:ed|ing)?|scenes?)\b",
+    re.IGNORECASE
+)
+TIME_OF_DAY_QUESTION_RE = re.compile(
+    r"^\W*(?:which|what|list|how many|show|all)\b.*\bscenes?\b.*\b(?:at|during|by|in the)\s+"
+    r"(?:the\s+)?(day|night|evening|morning|dawn|dusk)\b"
+    r"|\b(day|night|evening|morning|dawn|dusk)\s+scenes\b",
+    re.IGNORECASE
+)
+WHEN_QUESTION_RE = re.compile(
+    r"\b(what days?|which days?|scheduled|schedule|shoot(?:ing)?|shot|call(?:ed)?|needed|film(?:ed|ing)?)\b",
+    re.IGNORECASE
+)
+SCENES_QUESTION_RE = re.compile(r"^\W*(which|what|list|how many|show)\b.*\bscenes?\b",
+                                re.IGNORECASE)
+LOCATION_QUESTION_RE = re.compile(r"^\W*(which|what|list|how many|show)\b.*\bscenes?\b.*"
+                                  r"\b(at|in|take place|set)\b", re.IGNORECASE)
+
+# A route only answers when nothing but these words (and its entity) is
+# left in the question; "What happens in the scene where X meets Y?" has
+# content the indexes can't answer and goes to RAG
+WORD_RE = re.compile(r"[a-z0-9]+")
+COMMON_WORDS = frozenset("""
+    a an the is are was were be being do does did will s me us all every any
+    in on at for of to by with and what whats which who when how many list show give tell
+    scene scenes
+""".split())
+DAY_WORDS = frozenset("""
+    call calls sheet sheets callsheet actor actors cast needed scheduled schedule shoot shooting
+    shot film filmed filming called set planned there
+""".split())
+TIME_OF_DAY_WORDS = frozenset("""
+    take takes place set happen happens during day night evening morning dawn dusk
+""".split())
+CHARACTER_WORDS = frozenset("""
+    appear appears appearing feature features featuring has have day days scheduled schedule
+    needed called shoot shooting shot film filmed filming
+""".split())
+LOCATION_WORDS = frozenset("take takes place set located there".split())
+
+
+def _only_words(text, allowed):
+    """True if every word of text is a common question word or in allowed."""
+    return all(word in COMMON_WORDS or word in allowed for word in WORD_RE.findall(text.lower()))
+
+
+def _without(text, match):
+    return text[:match.start()] + " " + text[match.end():]
+
+
+def scene_time_of_day(scene):
+    """Time of day from the parser, or from the heading when the parser missed it."""
+    if scene.get("time_of_day") and scene["time_of_day"] != "UNKNOWN":
+        return scene["time_of_day"]
+    heading = scene.get("heading", "").upper()
+    for tod in TIMES_OF_DAY:
+        if re.search(r"\b" + tod + r"\b", heading):
+            return tod
+    return "UNKNOWN"
+
+
+def _name_pattern(names):
+    alternatives = "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True))
+    return re.compile(r"(?<![A-Z0-9])(" + alternatives + r")(?![A-Z0-9])")
+
+
+class StructuredIndex:
+    """
+    Inverted indexes over scenes, schedule and call sheets that answer
+    recognisable lookup questions exactly, without embedding or the LLM.
+
+    answer() returns None for anything it doesn't recognise, so callers can
+    fall back to full RAG.
+    """
+
+    def __init__(self, scenes, schedule, call_sheets=None):
+        self.scene_headings = {}  # scene number -> heading
+        self.call_sheets = {int(day): sheet for day, sheet in
+                            (call_sheets or generate_call_sheets(schedule)).items()}
+
+        self.character_scenes = defaultdict(list)  # base name -> scene numbers
+        self.character_days = defaultdict(set)     # base name -> days
+        self.location_scenes = defaultdict(list)   # location -> scene numbers
+        self.time_of_day_scenes = defaultdict(list)  # DAY/NIGHT/... -> scene numbers
+        self.day_entries = defaultdict(list)       # day -> schedule entries
+        self.scene_days = defaultdict(set)         # scene number -> days
+
+        for scene in scenes:
+            number = scene["scene_number"]
+            self.scene_headings[number] = scene["heading"]
+            for character in scene.get("characters", []):
+                name = base_character_name(character)
+                if is_character_name(name) and number not in self.character_scenes[name][-1:]:
+                    self.character_scenes[name].append(number)
+            if scene.get("location") and scene["location"] != "UNKNOWN":
+                self.location_scenes[scene["location"]].append(number)
+            self.time_of_day_scenes[scene_time_of_day(scene)].append(number)
+
+        for entry in schedule:
+            self.day_entries[entry["day"]].append(entry)
+            # Legacy schedules without scene numbers only lose the days in location answers
+            if entry.get("scene_number") is not None:
+                self.scene_days[entry["scene_number"]].add(entry["day"])
+            for character in entry["characters"]:
+                name = base_character_name(character)
+                if is_character_name(name):
+                    self.character_days[name].add(entry["day"])
+
+        characters = set(self.character_scenes) | set(self.character_days)
+        self._character_re = _name_pattern(characters) if characters else None
+        self._location_re = _name_pattern(self.location_scenes) if self.location_scenes else None
+
+    def answer(self, question):
+        """Answer a structured lookup question, or return None to fall back to RAG."""
+        for route in (self._answer_day, self._answer_time_of_day,
+                      self._answer_character, self._answer_location):
+            answer = route(question)
+            if answer is not None:
+                return answer
+        return None
+
+    def _scene_label(self, number):
+        return f"Scene {number}: {self.scene_headings[number]}"
+
+    def _answer_day(self, question):
+        m = DAY_NUMBER_RE.search(question)
+        if (not m or not DAY_QUESTION_RE.search(question)
+                or not _only_words(_without(question, m), DAY_WORDS)):
+            return None
+        day = int(m.group(1))
+        if day not in self.day_entries:
+            days = sorted(self.day_entries)
+            return f"There is no day {day} in the schedule (days {days[0]}-{days[-1]})." if days \
+                else "The schedule is empty."
+        sheet = self.call_sheets.get(day, {"actors": [], "scenes": []})
+        lines = [f"Day {day} call sheet:",
+                 f"- Actors: {', '.join(sheet['actors']) or 'none'}",
+                 "- Scenes:"]
+        for entry in self.day_entries[day]:
+            lines.append(f"  - {entry['start_time']} {entry['scene_heading']} "
+                         f"({entry.get('estimated_duration', 'N/A')})")
+        return "\n".join(lines)
+
+    def _answer_time_of_day(self, question):
+        m = TIME_OF_DAY_QUESTION_RE.search(question)
+        if not m or not _only_words(question, TIME_OF_DAY_WORDS):
+            return None
+        tod = (m.group(1) or m.group(2)).upper()
+        numbers = self.time_of_day_scenes.get(tod, [])
+        if not numbers:
+            return f"No scenes take place at {tod.lower()}."
+        lines = [f"{len(numbers)} scene(s) take place at {tod.lower()}:"]
+        lines += [f"- {self._scene_label(n)}" for n in numbers]
+        return "\n".join(lines)
+
+    def _answer_character(self, question):
+        if self._character_re is None:
+            return None
+        upper = question.upper()
+        m = self._character_re.search(upper)
+        if not m or not _only_words(_without(upper, m), CHARACTER_WORDS):
+            return None
+        name = m.group(1)
+
+        if SCENES_QUESTION_RE.search(question):
+            numbers = self.character_scenes.get(name, [])
+            lines = [f"{name} appears in {len(numbers)} scene(s):"]
+            lines += [f"- {self._scene_label(n)}" for n in numbers]
+            return "\n".join(lines)
+
+        if WHEN_QUESTION_RE.search(question):
+            days = sorted(self.character_days.get(name, ()))
+            if not days:
+                return f"{name} is not on the shooting schedule."
+            lines = [f"{name} is scheduled on day(s) {', '.join(str(d) for d in days)}:"]
+            for day in days:
+                for entry in self.day_entries[day]:
+                    if name in (base_character_name(c) for c in entry["characters"]):
+                        lines.append(f"- Day {day} {entry['start_time']}: {entry['scene_heading']}")
+            return "\n".join(lines)
+        return None
+
+    def _answer_location(self, question):
+        if self._location_re is None or not LOCATION_QUESTION_RE.search(question):
+            return None
+        upper = question.upper()
+        m = self._location_re.search(upper)
+        if not m or not _only_words(_without(upper, m), LOCATION_WORDS):
+            return None
+        location = m.group(1)
+        lines = [f"Scenes at {location}:"]
+        for number in self.location_scenes[location]:
+            days = sorted(self.scene_days[number])
+            when = f" (day {', '.join(str(d) for d in days)})" if days else ""
+            lines.append(f"- {self._scene_label(number)}{when}")
+        return "\n".join(lines)
@@ -0,0 +1,150 @@
+# script_utils/stub_llm.py
+"""
+Minimal stand-in for the ollama chat API, for tests and benchmarks.
+
+Serves POST /api/chat with the same request and response shapes as ollama,
+streaming newline-delimited JSON chunks when "stream" is true (the default).
+Point the engine at it with OLLAMA_HOST=http://127.0.0.1:<port>.
+
+    python -m script_utils.stub_llm --port 11435 --token-delay 0.02
+"""
+
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUESTION_MARKER = "=== USER QUESTION ==="
+
+
+def _question_from_prompt(prompt):
+    if QUESTION_MARKER in prompt:
+        return prompt.split(QUESTION_MARKER, 1)[1].strip().splitlines()[0]
+    return prompt.strip().splitlines()[-1] if prompt.strip() else ""
+
+
+def stub_answer(messages):
+    """Deterministic answer for a chat request: echoes the question."""
+    prompt = messages[-1]["content"] if messages else ""
+    return f"Stub answer to: {_question_from_prompt(prompt)}"
+
+
+def _tokens(text):
+    words = text.split(" ")
+    return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+
+class StubChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    token_delay = 0.0
+    first_token_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _chunk(self, model, content, done):
+        chunk = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+        if done:
+            chunk["done_reason"] = "stop"
+        return chunk
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path != "/api/chat":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if self._take_failure():
+            self._send_json(503, {"error": "stub server overloaded"})
+            return
+        model = request.get("model", "stub")
+        answer = stub_answer(request.get("messages", []))
+        time.sleep(self.first_token_delay)
+
+        if not request.get("stream", True):
+            time.sleep(self.token_delay * len(_tokens(answer)))
+            self._send_json(200, self._chunk(model, answer, True))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for token in _tokens(answer):
+            self._write_chunk(self._chunk(model, token, False))
+            time.sleep(self.token_delay)
+        self._write_chunk(self._chunk(model, "", True))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _take_failure(self):
+        server = self.server
+        with server.failure_lock:
+            if server.failures_left > 0:
+                server.failures_left -= 1
+                return True
+        return False
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_stub_server(host="127.0.0.1", port=0, token_delay=0.0, first_token_delay=0.0,
+                      failures=0):
+    """
+    Start the stub server on a background thread.
+
+    Returns (server, url); call server.shutdown() to stop it. Port 0 picks a
+    free port. The first `failures` chat requests get a 503, to exercise
+    client retries.
+    """
+    handler = type("ConfiguredStubChatHandler", (StubChatHandler,), {
+        "token_delay": token_delay,
+        "first_token_delay": first_token_delay,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.failures_left = failures
+    server.failure_lock = threading.Lock()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a stub ollama chat server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-delay", type=float, default=0.0,
+                        help="Seconds between streamed tokens")
+    parser.add_argument("--first-token-delay", type=float, default=0.0,
+                        help="Seconds before the first token (simulated prefill)")
+    parser.add_argument("--failures", type=int, default=0,
+                        help="Answer the first N chat requests with 503")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.host, args.port, args.token_delay,
+                                    args.first_token_delay, args.failures)
+    print(f"Stub chat server listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
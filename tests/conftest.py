@@ -0,0 +1,13 @@
+# tests/conftest.py
+
+import pytest
+
+from benchmarks.hash_embedding import HashEmbedding
+from script_utils import models
+
+
+@pytest.fixture
+def hash_embedding():
+    models.registry.register("embedding", HashEmbedding)
+    yield
+    models.registry.register("embedding", models._load_embedding_model)
@@ -0,0 +1,59 @@
+# tests/test_answer_cache.py
+
+from script_utils.answer_cache import SemanticAnswerCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_similar_question_with_same_contexts_hits():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store([1.0, 0.0], [3, 1], "answer")
+    # Same contexts in another order, a nearby embedding at another scale
+    assert cache.lookup([2.0, 0.2], [1, 3, -1]) == "answer"
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_different_contexts_or_dissimilar_question_misses():
+    cache = SemanticAnswerCache(threshold=0.9)
+    cache.store([1.0, 0.0], [1, 3], "answer")
+    assert cache.lookup([1.0, 0.0], [1, 4]) is None
+    assert cache.lookup([0.0, 1.0], [1, 3]) is None
+    assert cache.misses == 2
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = SemanticAnswerCache(ttl_seconds=10, clock=clock)
+    cache.store([1.0, 0.0], [1], "answer")
+    clock.now = 5
+    assert cache.lookup([1.0, 0.0], [1]) == "answer"
+    clock.now = 11
+    assert cache.lookup([1.0, 0.0], [1]) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.store([1.0, 0.0], [1], "first")
+    cache.store([1.0, 0.0], [2], "second")
+    assert cache.lookup([1.0, 0.0], [1]) == "first"
+    cache.store([1.0, 0.0], [3], "third")
+    assert cache.lookup([1.0, 0.0], [2]) is None
+    assert cache.lookup([1.0, 0.0], [1]) == "first"
+    assert len(cache) == 2
+
+
+def test_binding_new_data_clears_the_cache():
+    cache = SemanticAnswerCache()
+    cache.bind("draft 1")
+    cache.store([1.0, 0.0], [1], "answer")
+    cache.bind("draft 1")
+    assert len(cache) == 1
+    cache.bind("draft 2")
+    assert cache.lookup([1.0, 0.0], [1]) is None
@@ -0,0 +1,34 @@
+# tests/test_batch.py
+
+import json
+import os
+
+from benchmarks.synthetic_script import generate_screenplay_text, write_screenplay_pdf
+from run_pipeline import BATCH_MANIFEST_FILE, process_batch
+
+
+def test_one_corrupt_pdf_does_not_abort_the_batch(tmp_path):
+    input_dir = tmp_path / "scripts"
+    (input_dir / "season1").mkdir(parents=True)
+    good = str(input_dir / "season1" / "ep1.pdf")
+    write_screenplay_pdf(generate_screenplay_text(6), good)
+    bad = str(input_dir / "broken.pdf")
+    with open(bad, "wb") as f:
+        f.write(b"%PDF-1.4 this is not really a PDF")
+
+    output_root = str(tmp_path / "out")
+    seen = []
+    manifest = process_batch(str(input_dir), output_root, workers=2, use_cache=False,
+                             progress=lambda done, total, entry: seen.append((total, entry["pdf"])))
+
+    with open(os.path.join(output_root, BATCH_MANIFEST_FILE), encoding="utf-8") as f:
+        assert json.load(f) == manifest
+    assert (manifest["succeeded"], manifest["failed"]) == (1, 1)
+    assert sorted(seen) == [(2, bad), (2, good)]
+
+    broken, episode = manifest["scripts"]  # input order
+    assert broken["pdf"] == bad and broken["status"] == "failed" and broken["error"]
+    assert episode["pdf"] == good and episode["status"] == "ok"
+    assert episode["scenes"] == 6
+    assert episode["output_dir"] == os.path.join(output_root, "season1", "ep1")
+    assert os.path.exists(os.path.join(episode["output_dir"], "shooting_schedule.json"))
@@ -0,0 +1,34 @@
+# tests/test_bm25.py
+
+from script_utils.bm25 import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = [
+    "Oppenheimer lectures on quantum mechanics.",
+    "Kitty rides a horse across the mesa.",
+    "Groves and Oppenheimer walk the mesa at Los Alamos.",
+]
+
+
+def test_tokenize_lowercases_and_keeps_apostrophes():
+    assert tokenize("Kitty's HORSE, at 5pm!") == ["kitty's", "horse", "at", "5pm"]
+
+
+def test_search_ranks_documents_matching_more_terms_first():
+    index = BM25Index(DOCS)
+    results = index.search("Groves crosses the mesa")
+    assert [doc_id for doc_id, _ in results] == [2, 1]
+    assert results[0][1] > results[1][1] > 0
+
+
+def test_search_ignores_unknown_terms_and_respects_top_k():
+    index = BM25Index(DOCS)
+    assert index.search("plutonium") == []
+    assert len(index.search("mesa", top_k=1)) == 1
+
+
+def test_empty_index_returns_nothing():
+    assert BM25Index([]).search("mesa") == []
+
+
+def test_reciprocal_rank_fusion_favours_ids_ranked_by_both_lists():
+    assert reciprocal_rank_fusion([[1, 2, 3], [2, 4, 1]]) == [2, 1, 4, 3]
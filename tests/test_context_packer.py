@@ -0,0 +1,68 @@
+# tests/test_context_packer.py
+
+from script_utils.context_packer import TRUNCATION_MARKER, estimate_tokens, pack_context
+from script_utils.instrumentation import Recorder
+from script_utils.rag_engine import RAGSearchEngine
+
+CAMP = "EXT. BASE CAMP - DAY"
+
+
+def scene_passage(number, lines, **extra):
+    return {"kind": "scene", "scene": number, "heading": CAMP, "text": "\n".join(lines), **extra}
+
+
+def test_schedule_rows_fold_into_their_own_scene():
+    passages = [
+        scene_passage(1, ["First camp scene."]),
+        scene_passage(7, ["Second camp scene."]),
+        {"kind": "schedule", "scene": 7, "heading": CAMP, "text": "full row", "note": "Day 3"},
+    ]
+    packed = pack_context(passages)
+    assert packed["contexts"] == ["First camp scene.", "Second camp scene.\nSCHEDULED: Day 3"]
+
+
+def test_schedule_rows_without_scene_fold_by_heading():
+    passages = [{"kind": "scene", "heading": CAMP, "text": "Camp."},
+                {"kind": "schedule", "heading": CAMP, "text": "full row", "note": "Day 1"}]
+    assert pack_context(passages)["contexts"] == ["Camp.\nSCHEDULED: Day 1"]
+
+
+def test_overflowing_scene_keeps_header_and_matched_lines():
+    lines = ["=== Scene 3 ===", "HEADING: " + CAMP] + [f"Filler line number {i:03d}." for i in range(200)]
+    lines[150] = "The detonator is armed."
+    passage = scene_passage(3, lines, focus=(150, 150), header_lines=2)
+    budget = 100
+
+    text = pack_context([passage], budget)["contexts"][0]
+    kept = text.split("\n")
+    assert kept[:3] == ["=== Scene 3 ===", "HEADING: " + CAMP, TRUNCATION_MARKER]
+    assert "The detonator is armed." in kept
+    assert "Filler line number 149." in kept and "Filler line number 151." in kept
+    assert kept[-1] == TRUNCATION_MARKER
+    assert estimate_tokens(text) <= budget + 1
+
+
+def test_overflowing_passage_without_focus_is_cut_from_the_end():
+    lines = [f"Line {i:03d} of the scene." for i in range(200)]
+    kept = pack_context([scene_passage(1, lines)], 100)["contexts"][0].split("\n")
+    assert kept[0] == lines[0]
+    assert kept[-1] == TRUNCATION_MARKER
+
+
+def test_context_stats_are_recorded_per_prompt(hash_embedding):
+    lines = [f"Sandbags are stacked along the wall, row {i}." for i in range(60)]
+    lines[55] = "Kistiakowsky polishes the explosive lens."
+    scenes = [{"scene_number": 1, "heading": CAMP, "location": "BASE CAMP", "time_of_day": "DAY",
+               "characters": ["KISTY"], "actions": lines}]
+    recorder = Recorder()
+    engine = RAGSearchEngine(scenes, [], answer_cache=False, fast_path=False,
+                             context_token_budget=200, recorder=recorder)
+
+    _, hits = engine.retrieve(["Who polishes the explosive lens?"], top_k=1)
+    prompt = engine.prepare_prompt("Who polishes the explosive lens?", hits[0])
+    assert "Kistiakowsky polishes the explosive lens." in prompt
+    (span,) = [span for span in recorder.spans if span.name == "query/prompt"]
+    assert span.counters["context_passages"] == 1
+    assert span.counters["dropped_passages"] == 0
+    assert span.counters["context_tokens"] <= 200
+    assert span.counters["prompt_tokens"] == estimate_tokens(prompt)
@@ -0,0 +1,65 @@
+# tests/test_index_store.py
+
+import os
+
+import faiss
+import numpy as np
+
+from script_utils.index_store import (
+    PQ_MIN_POINTS_PER_CENTROID, IndexStore, build_index, recall_at_k,
+)
+from script_utils.instrumentation import Recorder
+from script_utils.rag_engine import RAGSearchEngine
+
+
+def random_vectors(count, dim=64):
+    return np.random.default_rng(0).random((count, dim), dtype="float32")
+
+
+def test_pq_falls_back_when_too_few_vectors_to_train():
+    assert isinstance(build_index(random_vectors(1), "pq"), faiss.IndexScalarQuantizer)
+    enough = 2 * PQ_MIN_POINTS_PER_CENTROID
+    assert isinstance(build_index(random_vectors(enough - 1), "pq"), faiss.IndexScalarQuantizer)
+    assert isinstance(build_index(random_vectors(enough), "pq"), faiss.IndexPQ)
+
+
+def test_quantized_types_accept_no_vectors():
+    for index_type in ("sq8", "pq"):
+        assert build_index(random_vectors(0), index_type).ntotal == 0
+
+
+def test_sq8_recall_against_flat():
+    vectors = random_vectors(500)
+    flat = build_index(vectors, "flat")
+    assert recall_at_k(flat, flat, vectors[:50], 5) == 1.0
+    assert recall_at_k(flat, build_index(vectors, "sq8"), vectors[:50], 5) > 0.9
+
+
+def test_store_reuses_cached_vectors_across_types(tmp_path):
+    texts = [f"scene text {i}" for i in range(3)]
+    calls = []
+
+    def encode(batch):
+        calls.append(len(batch))
+        return random_vectors(len(batch))
+
+    assert IndexStore(str(tmp_path), "flat").load_or_build(texts, encode).ntotal == 3
+    assert IndexStore(str(tmp_path), "pq", mmap=True).load_or_build(texts, encode).ntotal == 3
+    assert calls == [3]
+
+    recorder = Recorder()
+    with recorder.span("encode") as span:
+        IndexStore(str(tmp_path)).load_or_build(texts + ["a new scene"], encode, span)
+    assert calls == [3, 1]
+    assert recorder.spans[0].counters == {"encoded": 1, "reused": 3}
+    # Nothing is left behind by the atomic writes
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_single_scene_engine_with_pq_index(hash_embedding, tmp_path):
+    scenes = [{"scene_number": 1, "heading": "INT. LAB - NIGHT", "location": "LAB",
+               "time_of_day": "NIGHT", "characters": ["KITTY"], "actions": ["Kitty waits."]}]
+    engine = RAGSearchEngine(scenes, [], index_dir=str(tmp_path), index_type="pq",
+                             answer_cache=False, fast_path=False)
+    _, hits = engine.retrieve(["Where does Kitty wait?"], top_k=1)
+    assert len(hits[0]) == 1
@@ -0,0 +1,76 @@
+# tests/test_instrumentation.py
+
+import os
+import time
+
+import pytest
+
+from script_utils.instrumentation import Recorder
+from script_utils.models import registry
+from script_utils.rag_engine import RAGSearchEngine
+from script_utils.stub_llm import start_stub_server
+
+
+def test_span_records_rss_around_itself():
+    recorder = Recorder()
+    with recorder.span("allocate"):
+        block = bytearray(32 * 1024 * 1024)
+        block[::4096] = b"x" * len(block[::4096])
+    (span,) = recorder.spans
+    record = span.to_dict()
+    assert "peak_rss_bytes" not in record
+    if not os.path.exists("/proc/self/statm"):
+        pytest.skip("needs /proc")
+    assert record["rss_after_bytes"] - record["rss_before_bytes"] >= 16 * 1024 * 1024
+    del block
+
+
+def test_paused_time_is_left_out_of_the_span():
+    recorder = Recorder()
+    with recorder.span("work") as span:
+        with span.paused():
+            time.sleep(0.2)
+    assert recorder.spans[0].seconds < 0.1
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    server, url = start_stub_server()
+    monkeypatch.setenv("OLLAMA_HOST", url)
+    registry.reset("llm_client")
+    yield
+    server.shutdown()
+    registry.reset("llm_client")
+
+
+def test_stream_spans_leave_out_the_consumer(hash_embedding, stub_llm):
+    scenes = [{"scene_number": 1, "heading": "INT. LAB - NIGHT", "location": "LAB",
+               "time_of_day": "NIGHT", "characters": ["KITTY"], "actions": ["Kitty waits."]}]
+    recorder = Recorder()
+    engine = RAGSearchEngine(scenes, [], answer_cache=False, fast_path=False, recorder=recorder)
+
+    tokens = []
+    start = time.perf_counter()
+    for token in engine.query_stream("Why does Kitty wait?"):
+        tokens.append(token)
+        time.sleep(0.05)
+    wall_seconds = time.perf_counter() - start
+    assert "".join(tokens) == "Stub answer to: Why does Kitty wait?"
+
+    spans = {span.name: span for span in recorder.spans}
+    consumer_seconds = 0.05 * len(tokens)
+    for name in ("query/generate", "query"):
+        assert spans[name].seconds < wall_seconds - 0.8 * consumer_seconds
+
+
+def test_engine_views_record_into_their_own_recorder(hash_embedding):
+    scenes = [{"scene_number": 1, "heading": "INT. LAB - NIGHT", "location": "LAB",
+               "time_of_day": "NIGHT", "characters": ["KITTY"], "actions": ["Kitty waits."]}]
+    shared = RAGSearchEngine(scenes, [], answer_cache=False, recorder=Recorder())
+    session_a, session_b = Recorder(), Recorder()
+
+    assert shared.with_recorder(session_a).query("Which scenes is Kitty in?").startswith("KITTY")
+    assert [span.name for span in session_a.spans] == ["query"]
+    assert not session_b.spans
+    assert all(span.name.startswith("index/") for span in shared.recorder.spans)
+    assert shared.with_recorder(session_b).index is shared.index
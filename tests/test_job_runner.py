@@ -0,0 +1,74 @@
+# tests/test_job_runner.py
+
+import json
+import os
+
+from PyPDF2 import PdfReader
+
+from benchmarks.synthetic_script import generate_screenplay_text, write_screenplay_pdf
+from script_utils.job_runner import DONE, JOB_STATUS_FILE, JobRunner
+from script_utils.pdf_extractor import MIN_PAGES_FOR_POOL
+from script_utils.script_cache import ScriptCache
+
+
+def make_job_dir(jobs_dir, job_id, modified):
+    path = os.path.join(jobs_dir, job_id)
+    os.makedirs(path)
+    status = os.path.join(path, JOB_STATUS_FILE)
+    with open(status, "w") as f:
+        f.write("{}")
+    os.utime(status, (modified, modified))
+
+
+def test_prune_keeps_newest_untracked_job_dirs(tmp_path):
+    jobs_dir = str(tmp_path)
+    for i in range(4):
+        make_job_dir(jobs_dir, f"old{i}", modified=1000 + i)
+    with JobRunner(jobs_dir=jobs_dir, max_kept_jobs=2):
+        assert sorted(os.listdir(jobs_dir)) == ["old2", "old3"]
+
+
+def test_prune_keeps_dirs_without_status(tmp_path):
+    # A job another runner is still creating has no job.json yet
+    jobs_dir = str(tmp_path)
+    os.makedirs(os.path.join(jobs_dir, "starting"))
+    make_job_dir(jobs_dir, "old", modified=1000)
+    with JobRunner(jobs_dir=jobs_dir, max_kept_jobs=0):
+        assert os.listdir(jobs_dir) == ["starting"]
+
+
+def test_finished_jobs_lists_done_jobs_on_disk_newest_first(tmp_path):
+    jobs_dir = str(tmp_path)
+    for job_id, status, finished_at in (("a", "done", 1), ("b", "failed", 2), ("c", "done", 3)):
+        os.makedirs(os.path.join(jobs_dir, job_id))
+        with open(os.path.join(jobs_dir, job_id, JOB_STATUS_FILE), "w") as f:
+            json.dump({"id": job_id, "status": status, "finished_at": finished_at}, f)
+    with JobRunner(jobs_dir=jobs_dir) as runner:
+        assert [status["id"] for status in runner.finished_jobs()] == ["c", "a"]
+
+
+def test_evicted_jobs_are_pruned(tmp_path):
+    # Enough pages that extraction uses the process pool from the job thread
+    pdfs = []
+    for seed in range(3):
+        path = str(tmp_path / f"script{seed}.pdf")
+        write_screenplay_pdf(generate_screenplay_text(120, seed=seed), path)
+        assert len(PdfReader(path).pages) >= MIN_PAGES_FOR_POOL
+        with open(path, "rb") as f:
+            pdfs.append(f.read())
+
+    jobs_dir = str(tmp_path / "jobs")
+    with JobRunner(jobs_dir=jobs_dir, max_workers=1, max_kept_jobs=1,
+                   pipeline_options={"use_cache": False, "extract_workers": 2}) as runner:
+        cache = ScriptCache(runner, max_entries=1)
+        jobs = []
+        for pdf_bytes in pdfs:
+            job = cache.get_or_submit(pdf_bytes)
+            job.result(timeout=120)
+            jobs.append(job)
+    # Shutting down waits for the eviction callbacks on the worker
+
+    assert all(job.status == DONE for job in jobs)
+    assert len(cache) == 1
+    # The cached job plus max_kept_jobs of the evicted ones
+    assert sorted(os.listdir(jobs_dir)) == sorted([jobs[2].id, jobs[1].id])
@@ -0,0 +1,93 @@
+# tests/test_library_engine.py
+
+import pytest
+
+from script_utils.library_engine import IVF_RETRAIN_GROWTH, ScriptLibrary
+from script_utils.scheduler import generate_schedule
+
+
+def make_scene(number, heading, characters, actions):
+    location, time_of_day = heading.split(". ", 1)[1].split(" - ")
+    return {"scene_number": number, "heading": heading, "location": location,
+            "time_of_day": time_of_day, "characters": characters, "actions": actions}
+
+
+OPPENHEIMER = [
+    make_scene(1, "INT. HEARING ROOM - DAY", ["STRAUSS"], ["Strauss reads the transcript."]),
+    make_scene(2, "EXT. MESA - NIGHT", ["KITTY"], ["Kitty rides a horse across the mesa."]),
+    make_scene(3, "INT. HEARING ROOM - DAY", ["KITTY"], ["Kitty faces the board."]),
+]
+BARBIE = [
+    make_scene(1, "EXT. DREAMHOUSE - DAY", ["BARBIE"], ["Barbie waves from the balcony."]),
+    make_scene(2, "EXT. BEACH - DAY", ["KEN"], ["Ken rides a horse along the beach."]),
+]
+
+
+def build_library(index_type):
+    library = ScriptLibrary(index_type=index_type)
+    for name, scenes in (("Oppenheimer", OPPENHEIMER), ("Barbie", BARBIE)):
+        # One scene a day, so scenes sharing a heading land on different days
+        library.add_production(name, scenes, generate_schedule(scenes, max_hours_per_day=1))
+    return library
+
+
+def scene_hits(library, question, **filters):
+    return [(meta["production"], meta["scene_number"])
+            for _, meta in library.search(question, top_k=10, filters=filters)
+            if meta["kind"] == "scene"]
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf", "flat"])
+def test_filters_restrict_hits(hash_embedding, index_type):
+    library = build_library(index_type)
+    assert {hit[0] for hit in scene_hits(library, "rides a horse", production="Barbie")} == \
+        {"Barbie"}
+    assert scene_hits(library, "rides a horse", production="Oppenheimer",
+                      characters="KITTY")[0] == ("Oppenheimer", 2)
+    # Scene 3 shares scene 1's heading but is shot on a day of its own
+    days = {entry["scene_number"]: entry["day"]
+            for entry in library.productions["Oppenheimer"]["schedule"]}
+    assert days[1] != days[3]
+    assert scene_hits(library, "hearing room", production="Oppenheimer", day=days[3]) == \
+        [("Oppenheimer", 3)]
+
+
+def test_long_scenes_are_indexed_in_full(hash_embedding):
+    actions = [f"Filler line {i}." for i in range(60)] + ["Kitty polishes the explosive lens."]
+    library = ScriptLibrary(index_type="flat")
+    library.add_production("Oppenheimer", [make_scene(1, "INT. LAB - DAY", ["KITTY"], actions)], [])
+    hits = library.search("Kitty polishes the explosive lens", top_k=5)
+    # Several chunks matched, but the scene is returned once
+    assert len(hits) == 1
+    assert hits[0][1]["scene_number"] == 1
+
+
+@pytest.mark.parametrize("index_type", ["hnsw", "ivf"])
+def test_save_and_load(hash_embedding, tmp_path, index_type):
+    library = build_library(index_type)
+    expected = scene_hits(library, "Kitty", production="Oppenheimer")
+    library.save(str(tmp_path))
+    loaded = ScriptLibrary.load(str(tmp_path))
+    assert loaded.index_type == index_type
+    assert len(loaded) == len(library)
+    assert scene_hits(loaded, "Kitty", production="Oppenheimer") == expected
+
+
+def test_productions_added_after_build_are_searchable(hash_embedding):
+    library = ScriptLibrary(index_type="ivf")
+    library.add_production("Oppenheimer", OPPENHEIMER, generate_schedule(OPPENHEIMER))
+    library.build()
+    trained_on = library.index.ntotal
+
+    library.add_production("Barbie", BARBIE, generate_schedule(BARBIE))
+    assert scene_hits(library, "Barbie waves", production="Barbie")[0] == ("Barbie", 1)
+    assert library.index.ntotal == len(library)
+
+    # Enough new vectors and the cells are retrained over everything
+    scenes = [make_scene(n, "EXT. LAB - DAY", ["GROVES"], [f"Groves inspects crate {n}."])
+              for n in range(1, IVF_RETRAIN_GROWTH * trained_on + 1)]
+    library.add_production("Crates", scenes, [])
+    library.build()
+    assert library._trained_on == library.index.ntotal == len(library)
+    with pytest.raises(ValueError):
+        library.add_production("Barbie", BARBIE, [])
@@ -0,0 +1,77 @@
+# tests/test_models.py
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from script_utils.models import HEAVY_MODULES, ModelRegistry, check_import_budget
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PIPELINE_MODULES = ["run_pipeline", "script_utils.rag_engine", "script_utils.ner_tagger"]
+
+
+@pytest.mark.parametrize("module_name", PIPELINE_MODULES)
+def test_import_loads_no_heavy_modules(module_name, monkeypatch):
+    monkeypatch.chdir(REPO_ROOT)
+    assert check_import_budget(module_name)["loaded"] == []
+
+
+def test_import_does_not_even_try_heavy_modules():
+    # Catches attempts too, whether or not torch or spaCy are installed here
+    code = (
+        "import importlib.abc, sys\n"
+        "attempted = []\n"
+        "class Block(importlib.abc.MetaPathFinder):\n"
+        "    def find_spec(self, name, path, target=None):\n"
+        f"        if name.split('.')[0] in {list(HEAVY_MODULES)!r}:\n"
+        "            attempted.append(name)\n"
+        "            raise ImportError(name)\n"
+        "sys.meta_path.insert(0, Block())\n"
+        f"for module_name in {PIPELINE_MODULES!r}:\n"
+        "    __import__(module_name)\n"
+        "print(attempted)\n"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT,
+                               capture_output=True, text=True, check=True)
+    assert completed.stdout.strip() == "[]"
+
+
+def test_get_loads_once_and_returns_the_same_instance():
+    loads = []
+
+    def loader():
+        loads.append(None)
+        time.sleep(0.05)
+        return object()
+
+    registry = ModelRegistry()
+    registry.register("model", loader)
+    assert not registry.is_loaded("model")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+    assert all(model is results[0] for model in results)
+    assert registry.get("model") is results[0]
+
+    registry.reset("model")
+    assert registry.get("model") is not results[0]
+    assert len(loads) == 2
+
+
+def test_register_replaces_a_loaded_model():
+    registry = ModelRegistry()
+    registry.register("model", lambda: "first")
+    assert registry.get("model") == "first"
+    registry.register("model", lambda: "second")
+    assert registry.get("model") == "second"
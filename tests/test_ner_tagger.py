@@ -0,0 +1,54 @@
+# tests/test_ner_tagger.py
+
+import random
+import re
+
+import pytest
+
+from script_utils.ner_tagger import CharacterMatcher, extract_known_characters_from_actions
+
+
+def regex_find(names, text):
+    """The per-name regex search the matcher replaced."""
+    return {name for name in names if re.search(r"\b" + re.escape(name) + r"\b", text)}
+
+
+NAMES = ["KITTY", "KIT", "OPPENHEIMER", "OPPIE", "J. ROBERT", "ROBERT", "DR. HILL",
+         "ERNEST LAWRENCE", "LAWRENCE", "ANNE", "ANNE'S", "MAN #2", "HILL"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Inside longer words
+    ("KITTYHAWK AND SKITTY", set()),
+    ("OPPENHEIMERS ARRIVE", set()),
+    ("UNDERHILL", set()),
+    # Punctuation around and inside names
+    ("KITTY, KIT.", {"KITTY", "KIT"}),
+    ("(OPPIE)", {"OPPIE"}),
+    ("DR. HILL NODS", {"DR. HILL", "HILL"}),
+    ("J. ROBERT SMILES", {"J. ROBERT", "ROBERT"}),
+    ("ANNE'S DESK", {"ANNE", "ANNE'S"}),
+    ("MAN #2 WAITS", {"MAN #2"}),
+    ("MAN #23", set()),
+    # Overlapping names
+    ("ERNEST LAWRENCE", {"ERNEST LAWRENCE", "LAWRENCE"}),
+    ("KITTY KIT", {"KITTY", "KIT"}),
+    ("", set()),
+])
+def test_matches_the_regex_search(text, expected):
+    assert CharacterMatcher(NAMES).find(text) == expected == regex_find(NAMES, text)
+
+
+def test_random_texts_match_the_regex_search():
+    rng = random.Random(0)
+    alphabet = ["KIT", "TY", "HILL", "DR.", " ", " ", ".", ",", "'", "S", "#2", "ANNE", "_",
+                "ROBERT", "J.", "LAWRENCE", "ERNEST", "OPPIE", "3"]
+    matcher = CharacterMatcher(NAMES)
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        assert matcher.find(text) == regex_find(NAMES, text), text
+
+
+def test_known_characters_in_action_lines():
+    found = extract_known_characters_from_actions(["Kitty watches.", "Oppie, gone."], NAMES)
+    assert sorted(found) == ["KITTY", "OPPIE"]
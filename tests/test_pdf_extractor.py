@@ -0,0 +1,30 @@
+# tests/test_pdf_extractor.py
+
+from PyPDF2 import PdfWriter
+
+from script_utils import pdf_extractor
+
+
+def write_blank_pdf(path, pages):
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def test_serial_extraction_opens_the_pdf_once(tmp_path, monkeypatch):
+    pdf_path = str(tmp_path / "blank.pdf")
+    write_blank_pdf(pdf_path, 3 * pdf_extractor.PAGES_PER_SHARD)
+    opened = []
+    open_reader = pdf_extractor.PdfReader
+
+    def counting_reader(path):
+        opened.append(path)
+        return open_reader(path)
+
+    monkeypatch.setattr(pdf_extractor, "PdfReader", counting_reader)
+    pages = list(pdf_extractor.iter_pdf_pages(pdf_path, workers=1))
+
+    assert pages == [(number, "") for number in range(3 * pdf_extractor.PAGES_PER_SHARD)]
+    assert opened == [pdf_path]
@@ -0,0 +1,114 @@
+# tests/test_query_service.py
+
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.synthetic_script import generate_screenplay_text
+from script_utils.parser import parse_screenplay
+from script_utils.query_service import MAX_REQUEST_BYTES, QueryService
+from script_utils.rag_engine import RAGSearchEngine
+from script_utils.scheduler import generate_schedule
+from script_utils.stub_llm import start_stub_server
+
+
+@pytest.fixture
+def engine(hash_embedding):
+    scenes = parse_screenplay(generate_screenplay_text(20))
+    return RAGSearchEngine(scenes, generate_schedule(scenes), answer_cache=False,
+                           fast_path=False)
+
+
+def run_service(engine, check, failures=0, **options):
+    """Serve engine against a stub LLM and run the coroutine check(port)."""
+    stub, url = start_stub_server(failures=failures)
+
+    async def main():
+        service = QueryService(engine, llm_host=url, **options)
+        server = await service.serve(port=0)
+        try:
+            return await check(server.sockets[0].getsockname()[1])
+        finally:
+            server.close()
+            await server.wait_closed()
+            await service.stop()
+
+    try:
+        return asyncio.run(main())
+    finally:
+        stub.shutdown()
+
+
+async def send(port, raw):
+    """Send raw request bytes; return (status, payload) of the reply and whether it closed."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        writer.write(raw)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) not in (b"\r\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        payload = json.loads(await reader.readexactly(int(headers["content-length"])))
+        closed = await reader.read(1) == b""
+        return status, payload, closed
+    finally:
+        writer.close()
+
+
+def request(method, path, body=b""):
+    return (f"{method} {path} HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body
+
+
+def query(question):
+    return request("POST", "/query", json.dumps({"question": question}).encode("utf-8"))
+
+
+def test_concurrent_questions_share_search_batches(engine):
+    questions = [f"What happens with the lantern number {i}?" for i in range(8)]
+
+    async def check(port):
+        replies = await asyncio.gather(*(send(port, query(q)) for q in questions))
+        _, stats, _ = await send(port, request("GET", "/stats"))
+        return replies, stats
+
+    replies, stats = run_service(engine, check, max_wait=0.05)
+    assert [(status, payload["answer"], payload["source"]) for status, payload, _ in replies] == \
+        [(200, f"Stub answer to: {q}", "llm") for q in questions]
+    latency = stats["latency"]
+    assert latency["service/request"]["count"] == len(questions)
+    assert latency["service/llm"]["count"] == len(questions)
+    assert latency["service/search_batch"]["count"] < len(questions)
+
+
+def test_llm_errors_are_retried(engine):
+    async def check(port):
+        reply = await send(port, query("Who carries the lantern?"))
+        _, stats, _ = await send(port, request("GET", "/stats"))
+        return reply, stats
+
+    (status, payload, _), stats = run_service(engine, check, failures=1, llm_retries=1)
+    assert status == 200
+    assert payload["answer"] == "Stub answer to: Who carries the lantern?"
+    assert stats["latency"]["service/llm"]["count"] == 2
+
+
+def test_oversized_body_is_rejected_and_closed(engine):
+    body = json.dumps({"question": "x" * (MAX_REQUEST_BYTES + 1)}).encode("utf-8")
+    raw = (f"POST /query HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+
+    status, _, closed = run_service(engine, lambda port: send(port, raw))
+    assert (status, closed) == (413, True)
+
+
+@pytest.mark.parametrize("raw", [
+    b"garbage\r\n\r\n",
+    b"GET /health HTTP/1.1\r\nno colon here\r\n\r\n",
+    b"POST /query HTTP/1.1\r\nContent-Length: ten\r\n\r\n",
+])
+def test_malformed_requests_get_400(engine, raw):
+    status, _, closed = run_service(engine, lambda port: send(port, raw))
+    assert (status, closed) == (400, True)
@@ -0,0 +1,38 @@
+# tests/test_revision.py
+
+from script_utils.revision import changed_pages, diff_scenes, diff_summary
+
+
+def make_scene(heading, *actions):
+    return {"heading": heading, "characters": [], "actions": list(actions)}
+
+
+LAB = make_scene("INT. LAB - DAY", "Kitty enters.")
+MESA = make_scene("EXT. MESA - NIGHT", "Wind.")
+POND = make_scene("EXT. POND - DAY", "Ripples.")
+
+
+def test_identical_drafts_are_unchanged():
+    diff = diff_scenes([LAB, MESA], [LAB, MESA])
+    assert diff == {"unchanged": [(0, 0), (1, 1)], "changed": [], "removed": [], "added": []}
+
+
+def test_rewritten_scene_is_changed_in_place():
+    rewritten = make_scene("INT. LAB - DAY", "Kitty storms in.")
+    diff = diff_scenes([LAB, MESA, POND], [LAB, rewritten, POND])
+    assert diff["unchanged"] == [(0, 0), (2, 2)]
+    assert diff["changed"] == [(1, 1)]
+
+
+def test_inserted_and_deleted_scenes_shift_positions():
+    diff = diff_scenes([LAB, MESA, POND], [POND, LAB, POND])
+    assert diff["unchanged"] == [(0, 1), (2, 2)]
+    assert diff["added"] == [0]
+    assert diff["removed"] == [1]
+    assert diff_summary(diff) == {"unchanged": 2, "changed": 0, "removed": 1, "added": 1}
+
+
+def test_changed_pages_are_those_with_unknown_fingerprints():
+    previous = [{"fingerprint": "a"}, {"fingerprint": "b"}]
+    pages = [{"fingerprint": "b"}, {"fingerprint": "c"}, {"fingerprint": "a"}]
+    assert changed_pages(pages, previous) == [1]
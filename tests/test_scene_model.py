@@ -0,0 +1,49 @@
+# tests/test_scene_model.py
+
+import json
+
+from script_utils.revision import LEGACY_PAGES_FILE, load_pages, save_pages
+from script_utils.scene_model import SCENES_BINARY_FILE, SCENES_JSON_FILE, SceneTable, load_scenes
+from script_utils.scene_store import SceneStore
+
+SCENES = [
+    {"scene_number": 1, "heading": "INT. LAB - DAY", "location": "LAB", "time_of_day": "DAY",
+     "characters": ["KITTY"], "actions": ["Kitty enters.", "She sits."]},
+    {"scene_number": 2, "heading": "EXT. POND - NIGHT", "location": "POND",
+     "time_of_day": "NIGHT", "characters": [], "actions": []},
+]
+
+
+def test_table_round_trips_scenes():
+    table = SceneTable.from_scenes(SCENES)
+    assert SceneTable.from_bytes(table.to_bytes()).to_scenes() == SCENES
+
+
+def test_scene_actions_are_split_once():
+    scene = SceneTable.from_scenes(SCENES)[0]
+    assert scene.actions == ["Kitty enters.", "She sits."]
+    assert scene.actions is scene.actions
+
+
+def test_load_scenes_prefers_the_binary_table(tmp_path):
+    SceneTable.from_scenes(SCENES).save(str(tmp_path / SCENES_BINARY_FILE))
+    # Other formats of the same run are not read when the table is there
+    SceneStore.write(SCENES[:1], str(tmp_path)).close()
+    (tmp_path / SCENES_JSON_FILE).write_text(json.dumps(SCENES[:1]))
+    assert load_scenes(str(tmp_path)).to_scenes() == SCENES
+
+
+def test_load_scenes_without_binary_table(tmp_path):
+    (tmp_path / SCENES_JSON_FILE).write_text(json.dumps(SCENES))
+    assert load_scenes(str(tmp_path)).to_scenes() == SCENES
+    SceneStore.write(SCENES, str(tmp_path)).close()
+    assert load_scenes(str(tmp_path)).to_scenes() == SCENES
+
+
+def test_pages_round_trip_and_legacy_file(tmp_path):
+    pages = [{"fingerprint": "ab", "text": "INT. LAB - DAY"}]
+    assert load_pages(str(tmp_path)) == []
+    (tmp_path / LEGACY_PAGES_FILE).write_text(json.dumps(pages))
+    assert load_pages(str(tmp_path)) == pages
+    save_pages(str(tmp_path), pages + pages)
+    assert load_pages(str(tmp_path)) == pages + pages
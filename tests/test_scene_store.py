@@ -0,0 +1,45 @@
+# tests/test_scene_store.py
+
+import pytest
+
+from script_utils.scene_store import SceneStore
+
+SCENES = [
+    {"scene_number": 1, "heading": "INT. LAB - DAY", "location": "LAB", "time_of_day": "DAY",
+     "characters": ["KITTY"], "actions": ["Kitty enters.", "Ünïcode survives."]},
+    {"scene_number": 2, "heading": "EXT. MESA - NIGHT", "location": "MESA",
+     "time_of_day": "NIGHT", "characters": [], "actions": []},
+    {"scene_number": 3, "heading": "INT. LAB - DAY", "location": "LAB", "time_of_day": "DAY",
+     "characters": ["GROVES"], "actions": ["Groves waits."]},
+]
+
+
+def test_store_reads_scenes_by_position_and_number(tmp_path):
+    SceneStore.write(SCENES, str(tmp_path)).close()
+    with SceneStore(str(tmp_path)) as store:
+        assert len(store) == 3
+        assert list(store) == SCENES
+        assert store[-1] == SCENES[2]
+        assert store[1:] == SCENES[1:]
+        assert store.get(2) == SCENES[1]
+        assert store.get(9) is None
+        with pytest.raises(IndexError):
+            store[3]
+
+
+def test_metadata_is_available_without_reading_scenes(tmp_path):
+    with SceneStore.write(SCENES, str(tmp_path)) as store:
+        assert store.metadata[2] == {key: value for key, value in SCENES[2].items()
+                                     if key != "actions"}
+        # The first scene with a repeated heading
+        assert store.position_of_heading("INT. LAB - DAY") == 0
+        assert store.position_of_heading("INT. NOWHERE - DAY") is None
+        assert store._map is None
+
+
+def test_empty_store(tmp_path):
+    assert not SceneStore.exists(str(tmp_path))
+    with SceneStore.write([], str(tmp_path)) as store:
+        assert SceneStore.exists(str(tmp_path))
+        assert len(store) == 0
+        assert list(store) == []
@@ -0,0 +1,67 @@
+# tests/test_schedule_optimizer.py
+
+from collections import defaultdict
+
+import pytest
+
+from script_utils.schedule_optimizer import optimize_schedule
+from script_utils.scheduler import parse_minutes
+
+
+def make_scene(number, location, characters):
+    return {"scene_number": number, "heading": f"{number} INT. {location} - DAY",
+            "location": location, "time_of_day": "DAY", "characters": characters}
+
+
+# Story order alternates between two locations and casts
+SCENES = [make_scene(i, "LAB" if i % 2 else "MESA", ["KITTY"] if i % 2 else ["GROVES"])
+          for i in range(1, 13)]
+
+
+def by_day(schedule):
+    days = defaultdict(list)
+    for entry in schedule:
+        days[entry["day"]].append(entry)
+    return days
+
+
+def test_every_scene_is_scheduled_once_within_the_day_length():
+    schedule = optimize_schedule(SCENES, max_hours_per_day=4, meal_after_hours=6)
+    assert sorted(entry["scene_number"] for entry in schedule) == list(range(1, 13))
+    for entries in by_day(schedule).values():
+        hours = sum(int(entry["estimated_duration"].split()[0]) for entry in entries)
+        assert hours <= 4
+
+
+def test_scenes_are_grouped_by_location():
+    schedule = optimize_schedule(SCENES, max_hours_per_day=6, meal_after_hours=8)
+    days = by_day(schedule)
+    assert len(days) == 2
+    assert all(len({entry["location"] for entry in entries}) == 1 for entries in days.values())
+
+
+def test_meal_break_is_inserted_before_exceeding_meal_after_hours():
+    schedule = optimize_schedule(SCENES[:2] + SCENES[2:4], max_hours_per_day=10,
+                                 meal_after_hours=2, meal_hours=1)
+    starts = [parse_minutes(entry["start_time"]) for entry in by_day(schedule)[1]]
+    assert starts == [480, 540, 660, 720]
+
+
+def test_scenes_only_land_on_days_their_cast_is_available():
+    schedule = optimize_schedule(SCENES, max_hours_per_day=4,
+                                 actor_availability={"GROVES": [2, 5]})
+    groves_days = {entry["day"] for entry in schedule if "GROVES" in entry["characters"]}
+    assert groves_days <= {2, 5}
+
+
+def test_unsatisfiable_availability_raises():
+    with pytest.raises(ValueError, match="availability"):
+        optimize_schedule(SCENES, max_hours_per_day=1, actor_availability={"GROVES": [1]})
+
+
+def test_same_inputs_give_the_same_schedule():
+    scenes = [make_scene(i, f"SET {i % 5}", [f"ACTOR{i % 7}", f"ACTOR{i % 3}"])
+              for i in range(1, 61)]
+    first = optimize_schedule(scenes, max_hours_per_day=6, max_iterations=5000)
+    assert optimize_schedule(scenes, max_hours_per_day=6, max_iterations=5000) == first
+    assert optimize_schedule(scenes, max_hours_per_day=6, max_iterations=5000, seed=1) != first
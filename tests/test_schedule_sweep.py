@@ -0,0 +1,59 @@
+# tests/test_schedule_sweep.py
+
+from collections import defaultdict
+
+from script_utils.schedule_sweep import expand_grid, sweep_schedules
+from script_utils.scheduler import generate_schedule, parse_minutes
+
+OVERTIME_AFTER_HOURS = 4
+
+
+def make_scene(number, location, characters):
+    return {"scene_number": number, "heading": f"{number} INT. {location} - DAY",
+            "location": location, "time_of_day": "DAY", "characters": characters,
+            "actions": [f"Action of scene {number}."] * (number * 15)}
+
+
+SCENES = [make_scene(i, "LAB" if i % 3 else "MESA",
+                     ["KITTY", "GROVES", "RABI"][:1 + i % 3] + (["TELLER"] if i % 4 == 0 else []))
+          for i in range(1, 13)]
+
+GRID = {
+    "max_hours_per_day": [4, 8],
+    "start_time": ["07:00", "09:30"],
+    "meal_time": ["13:00", None],
+    "duration_model": ["cast_size", "script_length"],
+}
+
+
+def schedule_metrics(params):
+    """The sweep's metrics, worked out from generate_schedule's own output."""
+    schedule = generate_schedule(SCENES, **params)
+    cast_by_day = defaultdict(set)
+    bounds = {}
+    for entry in schedule:
+        day = entry["day"]
+        cast_by_day[day].update(entry["characters"])
+        start = parse_minutes(entry["start_time"])
+        end = start + int(entry["estimated_duration"].split()[0]) * 60
+        first, last = bounds.get(day, (start, end))
+        bounds[day] = (min(first, start), max(last, end))
+    return {
+        **params,
+        "total_days": len(cast_by_day),
+        "cast_days": sum(len(cast) for cast in cast_by_day.values()),
+        "overtime_hours": sum(max(0.0, (end - first) / 60 - OVERTIME_AFTER_HOURS)
+                              for first, end in bounds.values()),
+    }
+
+
+def test_sweep_matches_generate_schedule():
+    rows = sweep_schedules(SCENES, GRID, workers=1, overtime_after_hours=OVERTIME_AFTER_HOURS)
+    assert rows == [schedule_metrics(params) for params in expand_grid(GRID)]
+
+
+def test_process_pool_keeps_grid_order():
+    serial = sweep_schedules(SCENES, GRID, workers=1, overtime_after_hours=OVERTIME_AFTER_HOURS)
+    parallel = sweep_schedules(SCENES, GRID, workers=3, overtime_after_hours=OVERTIME_AFTER_HOURS)
+    assert [{key: row[key] for key in GRID} for row in parallel] == expand_grid(GRID)
+    assert parallel == serial
@@ -0,0 +1,75 @@
+# tests/test_scheduler.py
+
+from script_utils.revision import diff_scenes
+from script_utils.scheduler import generate_schedule, reschedule
+
+
+def make_scene(number, heading, characters, actions=None):
+    location = heading.split(". ", 1)[1].split(" - ")[0]
+    return {
+        "scene_number": number,
+        "heading": heading,
+        "location": location,
+        "time_of_day": heading.rsplit(" - ", 1)[1],
+        "characters": characters,
+        "actions": actions or [f"Action of scene {number}."],
+    }
+
+
+def renumber(scenes):
+    return [{**scene, "scene_number": i} for i, scene in enumerate(scenes, start=1)]
+
+
+CAMP = "EXT. BASE CAMP - CONTINUOUS"
+
+
+def test_generate_schedule_records_scene_numbers():
+    scenes = [make_scene(1, CAMP, ["A"]), make_scene(2, CAMP, ["B"])]
+    schedule = generate_schedule(scenes)
+    assert [entry["scene_number"] for entry in schedule] == [1, 2]
+
+
+def test_reschedule_keeps_locked_scenes_with_repeated_headings():
+    old = [make_scene(i, CAMP, [f"ACTOR{i}"]) for i in range(1, 13)]
+    previous_schedule = generate_schedule(old, max_hours_per_day=4)
+    locked = [entry for entry in previous_schedule if entry["day"] == 1]
+    assert locked
+
+    # A new scene with the same heading is inserted ahead of all the others
+    new = renumber([make_scene(0, CAMP, ["NOBODY"], ["Brand new."])] + old)
+    diff = diff_scenes(old, new)
+    schedule = reschedule(previous_schedule, old, new, diff["unchanged"] + diff["changed"],
+                          [1], max_hours_per_day=4)
+
+    day_one = [entry for entry in schedule if entry["day"] == 1]
+    assert [(e["start_time"], e["characters"]) for e in day_one] == \
+        [(e["start_time"], e["characters"]) for e in locked]
+    assert all("NOBODY" not in e["characters"] for e in day_one)
+    # Every scene is scheduled exactly once
+    assert sorted(e["scene_number"] for e in schedule) == list(range(1, len(new) + 1))
+
+
+def test_reschedule_drops_removed_locked_scenes():
+    old = [make_scene(i, CAMP, [f"ACTOR{i}"]) for i in range(1, 5)]
+    previous_schedule = generate_schedule(old, max_hours_per_day=2)
+    new = renumber(old[1:])
+    diff = diff_scenes(old, new)
+    schedule = reschedule(previous_schedule, old, new, diff["unchanged"] + diff["changed"],
+                          [1], max_hours_per_day=2)
+
+    assert all("ACTOR1" not in e["characters"] for e in schedule)
+    assert sorted(e["scene_number"] for e in schedule) == [1, 2, 3]
+    # Day 1 keeps its surviving scene at its old slot; nothing new lands there
+    assert [e["characters"] for e in schedule if e["day"] == 1] == [["ACTOR2"]]
+
+
+def test_reschedule_matches_legacy_entries_by_heading_order():
+    old = [make_scene(i, CAMP, [f"ACTOR{i}"]) for i in range(1, 5)]
+    previous_schedule = [{k: v for k, v in entry.items() if k != "scene_number"}
+                         for entry in generate_schedule(old, max_hours_per_day=2)]
+    new = renumber([make_scene(0, CAMP, ["NOBODY"], ["Brand new."])] + old)
+    diff = diff_scenes(old, new)
+    schedule = reschedule(previous_schedule, old, new, diff["unchanged"] + diff["changed"],
+                          [1], max_hours_per_day=2)
+
+    assert [e["characters"] for e in schedule if e["day"] == 1] == [["ACTOR1"], ["ACTOR2"]]
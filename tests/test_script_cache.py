@@ -0,0 +1,88 @@
+# tests/test_script_cache.py
+
+from concurrent.futures import Future
+
+from script_utils.job_runner import DONE, FAILED
+from script_utils.script_cache import ScriptCache
+
+
+class FakeJob:
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = None
+        self.future = Future()
+
+    def finish(self, value, status=DONE):
+        self.status = status
+        if status == FAILED:
+            self.future.set_exception(RuntimeError(value))
+        else:
+            self.future.set_result(value)
+
+
+class FakeRunner:
+    """Records submissions; jobs finish when a test finishes them."""
+
+    def __init__(self):
+        self.submitted = []
+        self.forgotten = []
+        self.prunes = 0
+
+    def submit(self, pdf_bytes, name=None, then=None, **options):
+        job = FakeJob(f"job{len(self.submitted)}")
+        self.submitted.append(job)
+        return job
+
+    def forget(self, job_id):
+        self.forgotten.append(job_id)
+
+    def prune(self):
+        self.prunes += 1
+
+
+def test_same_bytes_share_one_job():
+    runner = FakeRunner()
+    cache = ScriptCache(runner)
+    job = cache.get_or_submit(b"%PDF draft")
+    assert cache.get_or_submit(b"%PDF draft") is job
+    assert cache.get(ScriptCache.key_for(b"%PDF draft")) is job
+    assert len(runner.submitted) == 1
+
+
+def test_failed_jobs_are_resubmitted():
+    runner = FakeRunner()
+    cache = ScriptCache(runner)
+    cache.get_or_submit(b"%PDF draft").finish("boom", FAILED)
+    retry = cache.get_or_submit(b"%PDF draft")
+    assert retry is runner.submitted[1]
+    assert len(cache) == 1
+
+
+def test_finished_jobs_are_evicted_least_recently_used_first():
+    runner = FakeRunner()
+    cache = ScriptCache(runner, max_entries=2)
+    first = cache.get_or_submit(b"one")
+    second = cache.get_or_submit(b"two")
+    first.finish("engine one")
+    second.finish("engine two")
+    assert runner.forgotten == []
+
+    cache.get_or_submit(b"one")
+    third = cache.get_or_submit(b"three")
+    # Running jobs are never evicted, so the cache may exceed max_entries meanwhile
+    assert len(cache) == 3
+    third.finish("engine three")
+    assert cache.jobs() == [first, third]
+    assert runner.forgotten == [second.id]
+    assert runner.prunes == 1
+
+
+def test_entries_over_max_bytes_are_evicted():
+    runner = FakeRunner()
+    cache = ScriptCache(runner, max_bytes=10, sizeof=len)
+    first = cache.get_or_submit(b"one")
+    second = cache.get_or_submit(b"two")
+    first.finish("x" * 6)
+    assert len(cache) == 2
+    second.finish("y" * 6)
+    assert cache.jobs() == [second]
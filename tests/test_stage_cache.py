@@ -0,0 +1,43 @@
+# tests/test_stage_cache.py
+
+import os
+
+from script_utils import stage_cache
+from script_utils.stage_cache import StageCache, fingerprint, stage_key
+
+
+def test_get_returns_what_was_put(tmp_path):
+    cache = StageCache(str(tmp_path))
+    key = stage_key("scenes", "parent")
+    assert cache.get("scenes", key) is None
+    cache.put("scenes", key, [{"scene_number": 1}])
+    assert cache.get("scenes", key) == [{"scene_number": 1}]
+
+
+def test_key_follows_parent_config_and_version(monkeypatch):
+    key = stage_key("schedule", "parent", {"mode": "greedy"})
+    assert key == stage_key("schedule", "parent", {"mode": "greedy"})
+    assert key != stage_key("schedule", "other parent", {"mode": "greedy"})
+    assert key != stage_key("schedule", "parent", {"mode": "optimize"})
+    monkeypatch.setitem(stage_cache.STAGE_VERSIONS, "schedule",
+                        stage_cache.STAGE_VERSIONS["schedule"] + 1)
+    assert key != stage_key("schedule", "parent", {"mode": "greedy"})
+
+
+def test_fingerprint_ignores_dict_order():
+    assert fingerprint({"a": 1, "b": 2}) == fingerprint({"b": 2, "a": 1})
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = StageCache(str(tmp_path), max_bytes=250)
+    value = "x" * 90
+    for i, key in enumerate(("a", "b")):
+        cache.put("text", key, value)
+        os.utime(cache._path("text", key), (1000 + i, 1000 + i))
+
+    # A hit makes "a" the most recently used, so adding "c" evicts "b"
+    assert cache.get("text", "a") == value
+    cache.put("text", "c", value)
+    assert cache.get("text", "b") is None
+    assert cache.get("text", "a") == value
+    assert cache.get("text", "c") == value
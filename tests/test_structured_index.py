@@ -0,0 +1,73 @@
+# tests/test_structured_index.py
+
+import pytest
+
+from script_utils.scheduler import generate_schedule
+from script_utils.structured_index import StructuredIndex
+
+
+def make_scene(number, heading, characters):
+    location, time_of_day = heading.split(". ", 1)[1].split(" - ")
+    return {
+        "scene_number": number,
+        "heading": heading,
+        "location": location,
+        "time_of_day": time_of_day,
+        "characters": characters,
+        "actions": [f"Action of scene {number}."],
+    }
+
+
+SCENES = [
+    make_scene(1, "INT. LAB - DAY", ["OPPENHEIMER", "KITTY", "MIT."]),
+    make_scene(2, "EXT. POND - NIGHT", ["OPPENHEIMER", "EINSTEIN", "RADIO"]),
+    make_scene(3, "INT. HEARING ROOM - DAY", ["STRAUSS (V.O.)", "KITTY", "FBI..."]),
+    make_scene(4, "INT. HEARING ROOM - NIGHT", ["STRAUSS (O.S.)", "VOICE"]),
+]
+
+
+@pytest.fixture
+def index():
+    return StructuredIndex(SCENES, generate_schedule(SCENES))
+
+
+@pytest.mark.parametrize("question", [
+    "What happens in the scene where Oppenheimer meets Einstein?",
+    "Which scenes does Kitty argue in?",
+    "Describe the day 1 scenes mood",
+    "What happens in the hearing room?",
+    "Why is Strauss angry at night?",
+])
+def test_open_questions_fall_back_to_rag(index, question):
+    assert index.answer(question) is None
+
+
+def test_character_scenes(index):
+    assert index.answer("Which scenes is Kitty in?").splitlines()[0] == "KITTY appears in 2 scene(s):"
+    assert index.answer("How many scenes does Strauss appear in?").startswith(
+        "STRAUSS appears in 2 scene(s):")
+
+
+def test_character_days(index):
+    assert index.answer("What days is Einstein scheduled?").startswith("EINSTEIN is scheduled on day(s)")
+
+
+def test_day_location_and_time_of_day_lookups(index):
+    assert index.answer("Who is needed on day 1?").startswith("Day 1 call sheet:")
+    assert index.answer("Which scenes take place at night?").startswith("2 scene(s) take place at night:")
+    assert index.answer("Which scenes are set in the hearing room?").startswith(
+        "Scenes at HEARING ROOM:")
+
+
+def test_character_index_skips_non_character_cues(index):
+    assert set(index.character_scenes) == {"OPPENHEIMER", "KITTY", "EINSTEIN", "STRAUSS"}
+    assert index.answer("Which scenes is MIT in?") is None
+
+
+def test_location_days_are_per_scene_not_per_heading():
+    scenes = [make_scene(number, "INT. HEARING ROOM - DAY", ["STRAUSS"]) for number in (1, 2)]
+    index = StructuredIndex(scenes, generate_schedule(scenes, max_hours_per_day=1))
+    assert index.answer("Which scenes are set in the hearing room?").splitlines()[1:] == [
+        "- Scene 1: INT. HEARING ROOM - DAY (day 1)",
+        "- Scene 2: INT. HEARING ROOM - DAY (day 2)",
+    ]
@@ -3,8 +3,143 @@
 import streamlit as st
 import json
 import os
+import time
+from script_utils.index_store import INDEX_DIR_NAME
+from script_utils.instrumentation import METRICS_FILE, Recorder
+from script_utils.job_runner import DONE, FAILED, QUEUED, JobQueueFull, JobRunner
 from script_utils.rag_engine import RAGSearchEngine
-from run_pipeline import process_screenplay_from_pdf
+from script_utils.scene_model import load_scenes
+from script_utils.scene_store import SceneStore
+from script_utils.script_cache import ScriptCache
+
+STAGE_LABELS = {
+    "text": "Extracting text",
+    "scenes": "Parsing scenes",
+    "tags": "Tagging props and cast",
+    "schedule": "Building the shooting schedule",
+    "call_sheets": "Generating call sheets",
+    "done": "Saving outputs",
+    "finishing": "Building the search index",
+}
+
+
+def build_engine(job, result):
+    """Runs on the job's worker once the pipeline is done."""
+    # Keep only the scene index in memory; scenes are read from the store on demand
+    result['scenes'] = SceneStore(job.output_dir)
+    engine = RAGSearchEngine(
+        result['scenes'],
+        result['schedule'],
+        index_dir=os.path.join(job.output_dir, INDEX_DIR_NAME)
+    )
+    return {'data': result, 'engine': engine}
+
+
+def load_output(output_dir):
+    """Scenes, schedule, call sheets and metrics a pipeline run wrote to output_dir."""
+    # Scene store (index only, scenes read on demand); older outputs fall
+    # back to the compact scene table
+    if SceneStore.exists(output_dir):
+        scenes = SceneStore(output_dir)
+    else:
+        scenes = load_scenes(output_dir)
+    with open(os.path.join(output_dir, "shooting_schedule.json")) as f:
+        schedule = json.load(f)
+
+    call_sheets = {}
+    call_sheets_dir = os.path.join(output_dir, "call_sheets")
+    if os.path.exists(call_sheets_dir):
+        for file in os.listdir(call_sheets_dir):
+            if file.startswith("day_") and file.endswith(".json"):
+                day_num = int(file.replace("day_", "").replace(".json", ""))
+                with open(os.path.join(call_sheets_dir, file)) as f:
+                    call_sheets[day_num] = json.load(f)
+
+    metrics = None
+    metrics_path = os.path.join(output_dir, METRICS_FILE)
+    if os.path.exists(metrics_path):
+        with open(metrics_path) as f:
+            metrics = json.load(f)
+
+    return {'scenes': scenes, 'schedule': schedule, 'call_sheets': call_sheets,
+            'metrics': metrics}
+
+
+@st.cache_resource(max_entries=4)
+def load_finished_output(output_dir):
+    """A finished run's data and engine, shared by every session that opens it."""
+    data = load_output(output_dir)
+    engine = RAGSearchEngine(data['scenes'], data['schedule'],
+                             index_dir=os.path.join(output_dir, INDEX_DIR_NAME))
+    return {'data': data, 'engine': engine}
+
+
+def finished_outputs():
+    """(label, output dir) of every processed script on disk, newest first."""
+    outputs = []
+    for status in get_job_runner().finished_jobs():
+        if not os.path.exists(os.path.join(status['output_dir'], "shooting_schedule.json")):
+            continue
+        finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(status['finished_at']))
+        outputs.append((f"{status['name'] or status['id']} ({finished})", status['output_dir']))
+    # Output of a command-line run of run_pipeline.py
+    if ((SceneStore.exists("output") or os.path.exists("output/parsed_script.json"))
+            and os.path.exists("output/shooting_schedule.json")):
+        outputs.append(("output/ (command-line run)", "output"))
+    return outputs
+
+
+def open_finished_output(output_dir):
+    """Shared data and engine for output_dir, reusing a cached job's when it has one."""
+    for job in get_script_cache().jobs():
+        if job.output_dir == output_dir and job.status == DONE:
+            return job.result()
+    return load_finished_output(output_dir)
+
+
+@st.cache_resource
+def get_job_runner():
+    """One runner per server process, shared by every browser session."""
+    return JobRunner()
+
+
+@st.cache_resource
+def get_script_cache():
+    """Processed scripts and their engines, shared by every session and keyed by script hash."""
+    return ScriptCache(get_job_runner(), prepare=build_engine,
+                       sizeof=lambda value: value['engine'].memory_bytes())
+
+
+@st.fragment(run_every=1)
+def show_job_progress(job):
+    """Poll the background job without blocking the rest of the page."""
+    if job.done():
+        st.rerun()
+    if job.status == QUEUED:
+        label = "Waiting for a free worker"
+    else:
+        label = STAGE_LABELS.get(job.stage, "Processing")
+    st.progress(job.progress, text=f"{label}...")
+
+
+def scene_metadata(scenes):
+    """Per-scene heading, location and characters, without reading action lines."""
+    return scenes.metadata if isinstance(scenes, SceneStore) else scenes
+
+
+def find_scheduled_scene(scenes, item):
+    """Fetch the scene a schedule row refers to, or None."""
+    number = item.get('scene_number')
+    if isinstance(scenes, SceneStore):
+        if number is not None:
+            return scenes.get(number)
+        position = scenes.position_of_heading(item['scene_heading'])
+        return None if position is None else scenes[position]
+    # Older schedules only name the scene by its (not necessarily unique) heading
+    if number is not None:
+        return next((scene for scene in scenes if scene['scene_number'] == number), None)
+    return next((scene for scene in scenes if scene['heading'] == item['scene_heading']), None)
+
 
 st.set_page_config(page_title="Screenplay Scheduler", layout="wide")
 st.title("🎬 Screenplay Scheduler & Q&A")
@@ -17,6 +152,8 @@ if 'rag_engine' not in st.session_state:
     st.session_state.rag_engine = None
 if 'processing_complete' not in st.session_state:
     st.session_state.processing_complete = False
+if 'script_job' not in st.session_state:
+    st.session_state.script_job = None
 
 # Sidebar for PDF upload
 with st.sidebar:
@@ -35,42 +172,43 @@ with st.sidebar:
             st.session_state.processing_complete = False
             st.session_state.processed_data = None
             st.session_state.rag_engine = None
+            st.session_state.script_job = None
 
 # Main content area
 # Process uploaded PDF if there's a new file
-if uploaded_file is not None:
-    # Process the PDF if not already processed
-    if not st.session_state.processing_complete:
-        with st.spinner("Processing screenplay... This may take a moment."):
-            try:
-                # Read PDF bytes
-                pdf_bytes = uploaded_file.read()
-                
-                # Process the screenplay
-                result = process_screenplay_from_pdf(pdf_bytes=pdf_bytes)
-                
-                # Store in session state
-                st.session_state.processed_data = result
-                st.session_state.processing_complete = True
-                
-                # Create RAG engine with new data
-                st.session_state.rag_engine = RAGSearchEngine(
-                    result['scenes'],
-                    result['schedule']
-                )
-                
-                st.success("✅ Screenplay processed successfully!")
-                
-            except Exception as e:
-                st.error(f"❌ Error processing screenplay: {str(e)}")
-                st.session_state.processing_complete = False
+if uploaded_file is not None and not st.session_state.processing_complete:
+    if st.session_state.script_job is None:
+        try:
+            # Scripts already processed (or being processed) for any session
+            # are shared; otherwise this starts a background job
+            st.session_state.script_job = get_script_cache().get_or_submit(
+                uploaded_file.getvalue(), name=uploaded_file.name
+            )
+        except JobQueueFull:
+            st.error("❌ The server is busy processing other scripts. Please try again shortly.")
+    
+    job = st.session_state.script_job
+    if job is not None and not job.done():
+        show_job_progress(job)
+    elif job is not None and job.status == FAILED:
+        st.error(f"❌ Error processing screenplay: {job.error}")
+        if st.button("Retry"):
+            st.session_state.script_job = None
+            st.rerun()
+    elif job is not None:
+        shared = job.result()
+        st.session_state.processed_data = shared['data']
+        # The engine is shared; its spans for this session's questions are not
+        st.session_state.rag_engine = shared['engine'].with_recorder(Recorder())
+        st.session_state.processing_complete = True
+        st.success("✅ Screenplay processed successfully!")
 
 # Display results if we have processed data (either from upload or loaded existing)
 if st.session_state.processing_complete and st.session_state.processed_data:
         data = st.session_state.processed_data
         
         # Create tabs for different views
-        tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "🎭 Scenes", "📅 Schedule", "❓ Q&A"])
+        tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Overview", "🎭 Scenes", "📅 Schedule", "❓ Q&A", "🩺 Diagnostics"])
         
         with tab1:
             st.header("Overview")
@@ -91,7 +229,7 @@ if st.session_state.processing_complete and st.session_state.processed_data:
             
             # Characters
             all_characters = set()
-            for scene in data['scenes']:
+            for scene in scene_metadata(data['scenes']):
                 all_characters.update(scene.get('characters', []))
             
             st.write(f"**Total Characters:** {len(all_characters)}")
@@ -99,7 +237,7 @@ if st.session_state.processing_complete and st.session_state.processed_data:
             
             # Locations
             all_locations = set()
-            for scene in data['scenes']:
+            for scene in scene_metadata(data['scenes']):
                 if scene.get('location') and scene['location'] != 'UNKNOWN':
                     all_locations.add(scene['location'])
             
@@ -111,16 +249,19 @@ if st.session_state.processing_complete and st.session_state.processed_data:
             st.write(f"Total scenes: {len(data['scenes'])}")
             
             # Scene selector
-            scene_options = [f"Scene {s['scene_number']}: {s['heading'][:50]}..." for s in data['scenes']]
+            scene_options = [f"Scene {s['scene_number']}: {s['heading'][:50]}..." for s in scene_metadata(data['scenes'])]
             selected_scene_idx = st.selectbox("Select a scene to view details:", range(len(data['scenes'])), format_func=lambda x: scene_options[x])
             
             if selected_scene_idx is not None:
+                # Only the selected scene is read
                 scene = data['scenes'][selected_scene_idx]
                 st.subheader(f"Scene {scene['scene_number']}")
                 st.write(f"**Heading:** {scene['heading']}")
                 st.write(f"**Location:** {scene['location']}")
                 st.write(f"**Time of Day:** {scene['time_of_day']}")
                 st.write(f"**Characters:** {', '.join(scene.get('characters', []))}")
+                with st.expander("Scene text"):
+                    st.text("\n".join(scene.get('actions', [])))
         
         with tab3:
             st.header("📅 Shooting Schedule")
@@ -148,6 +289,9 @@ if st.session_state.processing_complete and st.session_state.processed_data:
                         st.write(f"**Time of Day:** {item['time_of_day']}")
                         st.write(f"**Characters:** {', '.join(item['characters'])}")
                         st.write(f"**Duration:** {item['estimated_duration']}")
+                        scene = find_scheduled_scene(data['scenes'], item)
+                        if scene and scene.get('actions'):
+                            st.text("\n".join(scene['actions']))
         
         with tab4:
             st.header("❓ Ask Questions")
@@ -161,49 +305,73 @@ if st.session_state.processing_complete and st.session_state.processed_data:
                 )
                 
                 if query:
-                    with st.spinner("Thinking..."):
-                        try:
-                            answer = st.session_state.rag_engine.query(query)
-                            st.markdown("### Answer:")
-                            st.write(answer)
-                        except Exception as e:
-                            st.error(f"Error generating answer: {str(e)}")
+                    st.markdown("### Answer:")
+                    try:
+                        # Render tokens as the model produces them
+                        st.write_stream(st.session_state.rag_engine.query_stream(query))
+                    except Exception as e:
+                        st.error(f"Error generating answer: {str(e)}")
             else:
                 st.warning("RAG engine not initialized. Please process a screenplay first.")
+        
+        with tab5:
+            st.header("🩺 Diagnostics")
+            
+            # Pipeline stages: one row per span of the last processing run
+            st.subheader("Pipeline stages")
+            metrics = data.get('metrics')
+            if metrics:
+                st.dataframe([
+                    {
+                        "stage": span['name'],
+                        "seconds": round(span['seconds'], 3),
+                        "RSS change (MB)": round(((span.get('rss_after_bytes') or 0)
+                                                  - (span.get('rss_before_bytes') or 0)) / 1e6, 1),
+                        **span['counters'],
+                    }
+                    for span in metrics['spans']
+                ])
+                if metrics.get('peak_rss_bytes'):
+                    st.caption(f"Process peak RSS: {metrics['peak_rss_bytes'] / 1e6:.1f} MB")
+            else:
+                st.info("No pipeline metrics recorded for this data.")
+            
+            # Query phases, aggregated over this session's questions
+            st.subheader("Query phases")
+            engine = st.session_state.rag_engine
+            summary = engine.recorder.summary() if engine else {}
+            if summary:
+                st.dataframe([
+                    {
+                        "phase": name,
+                        "count": stats['count'],
+                        "mean seconds": round(stats['mean_seconds'], 3),
+                        "max seconds": round(stats['max_seconds'], 3),
+                    }
+                    for name, stats in summary.items()
+                ])
+                with st.expander("Recent query spans"):
+                    st.json([span.to_dict() for span in list(engine.recorder.spans)[-20:]])
+            else:
+                st.info("Ask a question to see query timings.")
     
 # Show upload prompt only if no data is loaded
 if not (st.session_state.processing_complete and st.session_state.processed_data):
     st.info("👆 Please upload a screenplay PDF using the sidebar to get started.")
     
-    # Show existing data if available
-    if os.path.exists("output/parsed_script.json") and os.path.exists("output/shooting_schedule.json"):
+    # Scripts processed earlier, by any session or from the command line
+    outputs = finished_outputs()
+    if outputs:
         st.markdown("---")
-        st.subheader("📂 Existing Data Found")
-        st.write("You have previously processed data. Upload a new PDF to process it, or load existing data below.")
+        st.subheader("📂 Previously Processed Scripts")
+        st.write("Upload a new PDF to process it, or load a script processed earlier.")
+        selected = st.selectbox("Processed script:", outputs, format_func=lambda output: output[0])
         
         if st.button("Load Existing Data"):
             try:
-                with open("output/parsed_script.json") as f:
-                    scenes = json.load(f)
-                with open("output/shooting_schedule.json") as f:
-                    schedule = json.load(f)
-                
-                # Load call sheets
-                call_sheets = {}
-                call_sheets_dir = "output/call_sheets"
-                if os.path.exists(call_sheets_dir):
-                    for file in os.listdir(call_sheets_dir):
-                        if file.startswith("day_") and file.endswith(".json"):
-                            day_num = int(file.replace("day_", "").replace(".json", ""))
-                            with open(os.path.join(call_sheets_dir, file)) as f:
-                                call_sheets[day_num] = json.load(f)
-                
-                st.session_state.processed_data = {
-                    'scenes': scenes,
-                    'schedule': schedule,
-                    'call_sheets': call_sheets
-                }
-                st.session_state.rag_engine = RAGSearchEngine(scenes, schedule)
+                shared = open_finished_output(selected[1])
+                st.session_state.processed_data = shared['data']
+                st.session_state.rag_engine = shared['engine'].with_recorder(Recorder())
                 st.session_state.processing_complete = True
                 st.success("✅ Existing data loaded successfully!")
                 st.rerun()